@@ -0,0 +1,70 @@
+"""
+compare the generic deserializer of the generated client with the compiled decoders on a page of messages
+
+    python benchmarks/bench_client_decode.py [--messages 100] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+
+from openapi_client.api_client import ApiClient  # noqa: E402
+from openapi_client.configuration import Configuration  # noqa: E402
+from openapi_client.model.message import Message  # noqa: E402
+
+
+class Response:
+    def __init__(self, data: bytes):
+        """
+        stand-in for the response of the REST client
+        :param data: body of the response
+        """
+        self.data = data
+
+
+def measure(api_client: ApiClient, response: Response, repeat: int):
+    """
+    :param api_client: client deserializing the response
+    :param response: page of messages
+    :param repeat: number of deserializations
+    :return: best time (in seconds) of a single deserialization and the deserialized messages
+    """
+    best = float("inf")
+    messages = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        messages = api_client.deserialize(response, ([Message],), True)
+        best = min(best, time.perf_counter() - start)
+    return best, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    response = Response(json.dumps([{"msg_content": f"message {i}", "from_usr": 1, "id": i, "to_usr": 2,
+                                     "date": f"2024-01-01T12:00:{i % 60:02d}.{i:06d}"}
+                                    for i in range(args.messages)]).encode())
+
+    results = {}
+    for name, fast_decode, check_types in [("generic", False, False), ("compiled", True, False),
+                                           ("compiled+check", True, True)]:
+        configuration = Configuration()
+        configuration.fast_decode = fast_decode
+        configuration.fast_decode_check_types = check_types
+        results[name] = measure(ApiClient(configuration), response, args.repeat)
+
+    assert results["generic"][1] == results["compiled"][1] == results["compiled+check"][1]
+    generic = results["generic"][0]
+    for name, (best, _) in results.items():
+        print(f"{name:>15}: {best * 1000:8.3f} ms per {args.messages} messages ({generic / best:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
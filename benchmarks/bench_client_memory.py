@@ -0,0 +1,66 @@
+"""
+compare the memory taken by a page of messages deserialized into the generated models and into the compact models
+
+    python benchmarks/bench_client_memory.py [--messages 10000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+
+from openapi_client.api_client import ApiClient  # noqa: E402
+from openapi_client.configuration import Configuration  # noqa: E402
+from openapi_client.model.message import Message  # noqa: E402
+
+
+class Response:
+    def __init__(self, data: bytes):
+        """
+        stand-in for the response of the REST client
+        :param data: body of the response
+        """
+        self.data = data
+
+
+def measure(api_client: ApiClient, response: Response, compact: bool):
+    """
+    :param api_client: client deserializing the response
+    :param response: page of messages
+    :param compact: whether to deserialize into the compact models
+    :return: bytes still allocated once the messages are deserialized and the deserialized messages
+    """
+    api_client.deserialize(response, ([Message],), True, compact)  # warm up the decoders
+    gc.collect()
+    tracemalloc.start()
+    messages = api_client.deserialize(response, ([Message],), True, compact)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10000)
+    args = parser.parse_args()
+
+    response = Response(json.dumps([{"msg_content": f"message {i}", "from_usr": 1, "id": i, "to_usr": 2,
+                                     "date": f"2024-01-01T12:00:{i % 60:02d}.{i:06d}"}
+                                    for i in range(args.messages)]).encode())
+
+    api_client = ApiClient(Configuration())
+    full, full_messages = measure(api_client, response, False)
+    compact, compact_messages = measure(api_client, response, True)
+
+    assert compact_messages == full_messages
+    print(f"{'models':>8}: {full / args.messages:7.0f} bytes per message")
+    print(f"{'compact':>8}: {compact / args.messages:7.0f} bytes per message ({full / compact:4.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
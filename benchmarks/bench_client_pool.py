@@ -0,0 +1,67 @@
+"""
+send bursts of concurrent requests with the blocking client, as the GUI does when it refreshes the users, and count
+the connections it opens with a blocking pool and with urllib3's default of throwaway extra connections
+
+a server is started on a free port against a fresh database file:
+    python benchmarks/bench_client_pool.py [--bursts 50] [--burst 16] [--connections 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_client_sessions import start_server  # noqa: E402
+from openapi_client.api.default_api import DefaultApi  # noqa: E402
+from openapi_client.api_client import ApiClient  # noqa: E402
+from openapi_client.configuration import Configuration  # noqa: E402
+
+
+def run(url: str, block: bool, bursts: int, burst: int, connections: int):
+    """
+    :param url: url of the server
+    :param block: whether requests wait for a pooled connection
+    :param bursts: number of bursts
+    :param burst: requests sent at the same time in a burst
+    :param connections: connections kept to the server
+    :return: elapsed seconds and the connection counters
+    """
+    config = Configuration(host=url)
+    config.connection_pool_maxsize = connections
+    config.connection_pool_block = block
+    config.pool_threads = burst
+    config.etag_cache_size = 0
+    with ApiClient(config) as api_client:
+        api = DefaultApi(api_client)
+        start = time.perf_counter()
+        for _ in range(bursts):
+            for result in [api.read_users_users_get(async_req=True) for _ in range(burst)]:
+                result.get()
+        return time.perf_counter() - start, api_client.connection_stats.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bursts", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=16)
+    parser.add_argument("--connections", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, url = start_server(directory)
+        try:
+            for name, block in (("overflow", False), ("block", True)):
+                elapsed, stats = run(url, block, args.bursts, args.burst, args.connections)
+                print(f"{name:>9}: {stats['requests'] / elapsed:6.0f} requests/s, {stats['new']:4d} connections opened, "
+                      f"{stats['reuse_ratio']:4.0%} reused, {stats['discarded']:4d} discarded")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+drive many concurrent chat sessions from one process, with the blocking client (a thread per request in flight,
+async_req=True) and with the asyncio client (AsyncDefaultApi, a single thread)
+
+a server is started on a free port against a fresh database file:
+    python benchmarks/bench_client_sessions.py [--sessions 200] [--requests 5] [--connections 20]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+
+from openapi_client.api.async_default_api import AsyncDefaultApi  # noqa: E402
+from openapi_client.api.default_api import DefaultApi  # noqa: E402
+from openapi_client.api_client import ApiClient  # noqa: E402
+from openapi_client.async_api_client import AsyncApiClient  # noqa: E402
+from openapi_client.configuration import Configuration  # noqa: E402
+from openapi_client.model.message_create import MessageCreate  # noqa: E402
+from openapi_client.model.user_create import UserCreate  # noqa: E402
+
+
+def start_server(directory: str):
+    """
+    :param directory: directory of the database file
+    :return: the server process and its url
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, CHAT_PASSWORD_ITERATIONS="1000",
+               CHAT_DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + "/docs")
+            return server, url
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("the server did not start")
+
+
+def configuration(url: str, connections: int):
+    """
+    :param url: url of the server
+    :param connections: connections kept to the server
+    :return: configuration of the clients
+    """
+    config = Configuration(host=url)
+    config.connection_pool_maxsize = connections
+    config.connection_pool_block = True
+    return config
+
+
+def run_threads(url: str, user_id: int, sessions: int, requests: int, connections: int):
+    """
+    :return: elapsed seconds and the largest number of threads seen
+    """
+    api = DefaultApi(ApiClient(configuration(url, connections), pool_threads=sessions))
+    start = time.perf_counter()
+    threads = 0
+    for _ in range(requests):
+        results = [api.create_message_from_user_message_receiver_id_post(
+            0, MessageCreate(msg_content=f"session {i}", from_usr=user_id), async_req=True)
+            for i in range(sessions)]
+        results += [api.read_users_users_get(async_req=True) for _ in range(sessions)]
+        threads = max(threads, threading.active_count())
+        for result in results:
+            result.get()
+    elapsed = time.perf_counter() - start
+    api.api_client.close()
+    return elapsed, threads
+
+
+async def run_asyncio(url: str, user_id: int, sessions: int, requests: int, connections: int):
+    """
+    :return: elapsed seconds and the largest number of threads seen
+    """
+    async with AsyncApiClient(configuration(url, connections)) as api_client:
+        api = AsyncDefaultApi(api_client)
+        start = time.perf_counter()
+        threads = 0
+        for _ in range(requests):
+            calls = [api.create_message_from_user_message_receiver_id_post(
+                0, MessageCreate(msg_content=f"session {i}", from_usr=user_id)) for i in range(sessions)]
+            calls += [api.read_users_users_get() for _ in range(sessions)]
+            threads = max(threads, threading.active_count())
+            await asyncio.gather(*calls)
+        return time.perf_counter() - start, threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--connections", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, url = start_server(directory)
+        try:
+            user = DefaultApi(ApiClient(Configuration(host=url))).create_user_users_post(
+                UserCreate(login="bench", password="bench"))
+            calls = 2 * args.sessions * args.requests
+            for mode in ("threads", "asyncio"):
+                if mode == "threads":
+                    elapsed, threads = run_threads(url, user.id, args.sessions, args.requests, args.connections)
+                else:
+                    elapsed, threads = asyncio.run(run_asyncio(url, user.id, args.sessions, args.requests,
+                                                               args.connections))
+                print(f"{mode:>8}: {calls / elapsed:7.0f} calls/s, {threads:4d} threads "
+                      f"({args.sessions} sessions, {args.connections} connections)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
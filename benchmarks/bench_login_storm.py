@@ -0,0 +1,122 @@
+"""
+measure how a storm of logins affects the latency of other requests
+
+every mode runs in its own process against a fresh database file, "pool" hashes passwords in the worker pool,
+"inline" hashes them on the event loop as a naive implementation would:
+    python benchmarks/bench_login_storm.py [--users 50] [--logins 400] [--concurrency 50] [--iterations 100000]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, p):
+    """
+    :param samples: sorted latencies
+    :param p: percentile between 0 and 1
+    :return: latency in milliseconds
+    """
+    return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+
+async def probe(client, user_id: int, running):
+    """
+    read a user over and over while running() is true
+    :param client: client of the application
+    :param user_id: id of the read user
+    :param running: function telling whether to go on
+    :return: sorted latencies
+    """
+    latencies = []
+    while running():
+        start = time.perf_counter()
+        await client.get(f"/users/{user_id}")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+    latencies.sort()
+    return latencies
+
+
+async def run_mode(mode: str, users: int, logins: int, concurrency: int):
+    """
+    log users in through POST /users/login while other requests are measured
+    :param mode: "pool" or "inline"
+    :param users: number of users created before the storm
+    :param logins: number of logins of the storm
+    :param concurrency: number of logins in flight at the same time
+    :return:
+    """
+    import httpx
+    import main
+    from server.passwords import password_hasher
+
+    if mode == "inline":
+        async def run_inline(function, *args):
+            return function(*args)
+        password_hasher._run = run_inline
+
+    await main.create_tables()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ids = [(await client.post("/users/", json={"login": f"user{i}", "password": f"secret{i}"})).json()["id"]
+               for i in range(users)]
+
+        deadline = time.perf_counter() + 1.0
+        idle = await probe(client, ids[0], lambda: time.perf_counter() < deadline)
+
+        storming = True
+        probing = asyncio.create_task(probe(client, ids[0], lambda: storming))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(i):
+            async with semaphore:
+                user = {"login": f"user{i % users}", "password": f"secret{i % users}"}
+                assert (await client.post("/users/login", json=user)).status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - start
+        storming = False
+        busy = await probing
+    await main.flush_messages()
+
+    print(f"{mode:>7}: {logins / elapsed:7.0f} logins/s ({password_hasher.iterations} iterations)"
+          f", other requests p50/p99 idle {percentile(idle, 0.5):.2f}/{percentile(idle, 0.99):.2f} ms, "
+          f"during logins {percentile(busy, 0.5):.2f}/{percentile(busy, 0.99):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["pool", "inline"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        asyncio.run(run_mode(args.child, args.users, args.logins, args.concurrency))
+        return
+
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ,
+                       CHAT_PASSWORD_ITERATIONS=str(args.iterations),
+                       CHAT_PASSWORD_WORKERS=str(args.workers),
+                       CHAT_DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+            subprocess.run([sys.executable, __file__, "--child", mode, "--users", str(args.users),
+                            "--logins", str(args.logins), "--concurrency", str(args.concurrency)],
+                           env=env, check=True, cwd=ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+compare the SQLite storage profiles on message writes and conversation reads
+
+the queries of server.crud run directly on the engine, one transaction per message and without the in-memory
+history, so that every write pays for its commit and every read for its query as set by the profile; every
+profile runs in its own process against a fresh database file:
+    python benchmarks/bench_storage.py [--messages 2000] [--concurrency 10] [--read-interval 0.01]
+                                       [--profiles throughput durable] [--directory DIR]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, p):
+    """
+    :param samples: sorted latencies
+    :param p: percentile between 0 and 1
+    :return: latency in milliseconds
+    """
+    return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+
+async def run_profile(messages: int, concurrency: int, read_interval: float):
+    """
+    write messages one transaction at a time with crud.create_messages while reading the conversation back
+    :param messages: number of messages to write
+    :param concurrency: number of transactions in flight at the same time
+    :param read_interval: pause (in seconds) of every reader between two reads
+    :return:
+    """
+    from server import crud, migrations, models, schemas
+    from server.database import SessionLocal, engine
+
+    async with engine.begin() as connection:
+        await connection.run_sync(migrations.upgrade)
+    conversation = models.conversation_key(1, 2)
+
+    read_latencies = []
+    writing = True
+
+    async def read_loop():
+        while writing:
+            start = time.perf_counter()
+            async with SessionLocal() as db:
+                await crud.get_latest_messages(db, conversation, 100)
+            read_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(read_interval)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def write(i):
+        async with semaphore:
+            async with SessionLocal() as db:
+                await crud.create_messages(db, [(schemas.MessageCreate(msg_content=f"message {i}", from_usr=1), 2)])
+
+    readers = [asyncio.create_task(read_loop()) for _ in range(4)]
+    start = time.perf_counter()
+    await asyncio.gather(*(write(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    writing = False
+    await asyncio.gather(*readers)
+    await engine.dispose()
+
+    read_latencies.sort()
+    print(f"{os.environ['CHAT_STORAGE_PROFILE']:>12}: {messages / elapsed:8.0f} msg/s written, "
+          f"{len(read_latencies)} reads, read p50 {percentile(read_latencies, 0.5):.2f} ms, "
+          f"p99 {percentile(read_latencies, 0.99):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--read-interval", type=float, default=0.01)
+    parser.add_argument("--profiles", nargs="+", default=["throughput", "durable"])
+    parser.add_argument("--directory", default=None, help="where the databases are created, on the disk to measure")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        asyncio.run(run_profile(args.messages, args.concurrency, args.read_interval))
+        return
+
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+            env = dict(os.environ,
+                       CHAT_STORAGE_PROFILE=profile,
+                       CHAT_DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+            subprocess.run([sys.executable, __file__, "--child", "--messages", str(args.messages),
+                            "--concurrency", str(args.concurrency), "--read-interval", str(args.read_interval)],
+                           env=env, check=True, cwd=ROOT)
+
+
+if __name__ == "__main__":
+    main()
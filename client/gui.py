@@ -4,12 +4,36 @@ import tkinter.messagebox as messagebox
 from openapi_client.api.default_api import DefaultApi
 from openapi_client.api_client import ApiClient
 from openapi_client.configuration import Configuration
+from openapi_client.compact import CompactModel
 import openapi_client.models as models
+from openapi_client.events import MESSAGE, PRESENCE_EVENTS, Event, parse_event
 from datetime import datetime
+import queue
 import threading
 import websockets
 import websocket
 
+# response header of login and registration carrying the session token
+SESSION_TOKEN_HEADER = 'X-Session-Token'
+
+# time (in milliseconds) between two passes of the event dispatcher over the events received from the server
+DISPATCH_INTERVAL = 50
+
+# name of the events carrying the history of a chat, fetched in a worker thread, to the dispatcher
+HISTORY = "history"
+
+
+def conversation_of(message, my_id):
+    """
+    find the chat a message belongs to
+    :param message: message received over the websocket
+    :param my_id: id of the current user
+    :return: id of the other user of the conversation, 0 for chat 'general'
+    """
+    if message.to_usr == 0:
+        return 0
+    return message.from_usr if message.to_usr == my_id else message.to_usr
+
 
 class ChatGUI:
     def __init__(self, api: DefaultApi):
@@ -23,9 +47,12 @@ class ChatGUI:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.is_running = True
 
-        self.chats = []
+        self.chats = dict()
+        self.events = queue.Queue()
         self.user = None
         self.users = dict()
+        self.logins = dict()
+        self.presence = dict()
         self.show_login()
 
         self.greet_label = tk.Label(self.root)
@@ -51,6 +78,7 @@ class ChatGUI:
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.users_frame.grid(column=0, row=0, rowspan=10)
 
+        self.root.after(DISPATCH_INTERVAL, self.dispatch_events)
         self.root.mainloop()
 
     def show_login(self):
@@ -61,12 +89,14 @@ class ChatGUI:
         self.root.withdraw()
         self.webSoc_thread = threading.Thread(target=self.websockets_connect, daemon=True)
 
-        for i in range(len(self.chats)):
-            self.chats[i].destroy()
+        for chat in self.chats.values():
+            chat.destroy()
+        self.chats.clear()
 
         if self.user:
             self.try_change_status(False)
         self.user = None
+        api.api_client.configuration.access_token = None
 
         login_window = tk.Toplevel(self.root)
         login_window.title("Login")
@@ -104,16 +134,36 @@ class ChatGUI:
         """
         users: list(models.User) = None
         try:
-            users = api.read_users_users_get()
+            users = list(api.iter_users())
         except:
             messagebox.showerror("Error", "Failed to obtain list of users!")
+            return
+
+        self.presence = {user.id: user for user in users}
+        self.show_users_list()
+
+    def update_presence(self, user):
+        """
+        apply a presence change pushed by the server without asking for the whole list of users
+        :param user: current state of the user whose presence changed
+        :return:
+        """
+        self.presence[user.id] = user
+        self.show_users_list()
 
+    def show_users_list(self):
+        """
+        showing the list of users known to the client
+        :return:
+        """
         self.users_list.delete(0, 'end')
         self.users.clear()
-        for i in range(len(users)):
-            if users[i].login != 'admin':
-                self.users_list.insert(i, f"{'(+)' if users[i].is_active else '(-)'} {users[i].login}")
-                self.users[users[i].login] = users[i].id
+        self.logins.clear()
+        for user in self.presence.values():
+            self.logins[user.id] = user.login
+            if user.login != 'admin':
+                self.users_list.insert('end', f"{'(+)' if user.is_active else '(-)'} {user.login}")
+                self.users[user.login] = user.id
         self.users_list.insert(0, '(+) general')
         self.users['general'] = 0
 
@@ -125,12 +175,17 @@ class ChatGUI:
         """
         receiver_login = self.users_list.get(self.users_list.curselection()[0])[4:]
         receiver_id = self.users[receiver_login]
-        chat = self.ChatWindow(self.user.login, self.user.id, receiver_login, receiver_id)
+        chat = self.chats.get(receiver_id)
+        if chat is not None and chat.is_running:
+            chat.lift()
+            return
+        chat = self.ChatWindow(self.user.login, self.user.id, receiver_login, receiver_id, self.logins.get,
+                               self.events)
         x = self.root.winfo_x()
         y = self.root.winfo_y()
         chat.geometry("+%d+%d" % (x + 100, y + 200))
 
-        self.chats.append(chat)
+        self.chats[receiver_id] = chat
 
     def try_login(self, login, password, login_window=None):
         """
@@ -154,7 +209,8 @@ class ChatGUI:
             if ban_state:
                 messagebox.showerror("Login error", "You are banned from this server!")
             elif not loggedIn:
-                res = api.login_user_users_login_post(models.UserCreate(login, password))
+                res = api.login_user_users_login_post(models.UserCreate(login, password),
+                                                      _return_http_data_only=False)
             else:
                 messagebox.showerror("Login error", "User with given login is already logged in!")
         except:
@@ -172,7 +228,7 @@ class ChatGUI:
         """
         res = None
         try:
-            res = api.create_user_users_post(models.UserCreate(login, password))
+            res = api.create_user_users_post(models.UserCreate(login, password), _return_http_data_only=False)
         except:
             messagebox.showerror("Register error", "User with this name already exists!")
 
@@ -182,11 +238,12 @@ class ChatGUI:
     def login_successful(self, res, login_window):
         """
         perform login for the user
-        :param res: user who logs in
+        :param res: user who logs in, response status and headers holding the session token
         :param login_window: window for which the method was called
         :return:
         """
-        self.user = res
+        self.user, _, headers = res
+        api.api_client.configuration.access_token = headers.get(SESSION_TOKEN_HEADER)
         self.try_change_status(True)
         self.greet_label.config(text=f"Welcome, {self.user.login}!")
         self.root.deiconify()
@@ -221,38 +278,75 @@ class ChatGUI:
         :return:
         """
         websocket.enableTrace(True)
-        self.ws = websocket.WebSocketApp(f"ws://127.0.0.1:8000/ws/{self.user.id}",
+        token = api.api_client.configuration.access_token
+        self.ws = websocket.WebSocketApp(f"ws://127.0.0.1:8000/ws/{self.user.id}?token={token}",
                                          on_message=self.on_message)
         self.ws.run_forever()
 
     def on_message(self, x, message):
         """
-        receiving control commands from the server
+        receiving control commands from the server, called in the websocket thread:
+        the event is only queued, Tk widgets are touched by dispatch_events in the main loop
         :param x:
         :param message: message send from server
         :return:
         """
-        active_chats = []
-        for chat in self.chats:
-            if not chat.is_running:
-                chat.destroy()
-                chat.update()
+        self.events.put(parse_event(message, compact=True))
+
+    def dispatch_events(self):
+        """
+        handle all queued events in the Tk main loop: messages are shown only in the chat they belong to,
+        one batch per chat, and the list of users is redrawn at most once per pass
+        :return:
+        """
+        if not self.is_running:
+            return
+        self.chats = {receiver_id: chat for receiver_id, chat in self.chats.items() if chat.is_running}
+        messages = dict()
+        presence_changed = False
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event.name == MESSAGE:
+                messages.setdefault(conversation_of(event.data, self.user.id if self.user else None),
+                                    []).append(event.data)
+            elif event.name == HISTORY:
+                receiver_id, history = event.data
+                chat = self.chats.get(receiver_id)
+                if chat is not None:
+                    chat.show_messages(history)
+            elif event.name in PRESENCE_EVENTS:
+                self.presence[event.data.id] = event.data
+                presence_changed = True
             else:
-                active_chats.append(chat)
-        self.chats = active_chats
-        if message == "offline":
+                self.handle_control(event)
+                if not self.is_running:
+                    return
+
+        for receiver_id, batch in messages.items():
+            chat = self.chats.get(receiver_id)
+            if chat is not None:
+                chat.show_messages(batch)
+        if presence_changed:
+            self.show_users_list()
+        self.root.after(DISPATCH_INTERVAL, self.dispatch_events)
+
+    def handle_control(self, event):
+        """
+        react to a control frame of the server
+        :param event: event without payload (offline, kick or ban)
+        :return:
+        """
+        if event.name == "offline":
             self.ws.close()
-        elif message == "status":
-            self.update_users_list()
-        elif message == "update_mess":
-            for chat in self.chats:
-                chat.update_messages()
-        elif message == "kick":
+        elif event.name == "kick":
             res = messagebox.showinfo("KICK FROM SERVER", "You were kicked out of the server")
             if res:
                 self.try_change_status(False)
             self.close()
-        elif message == "ban":
+        elif event.name == "ban":
             res = messagebox.showinfo("KICK FROM SERVER", "You were kicked out of the server")
             if res:
                 self.try_change_status(False)
@@ -268,13 +362,15 @@ class ChatGUI:
         self.root.destroy()
 
     class ChatWindow(tk.Toplevel):
-        def __init__(self, my_login, my_id, receiver_login, receiver_id, *args, **kwargs):
+        def __init__(self, my_login, my_id, receiver_login, receiver_id, login_of, events, *args, **kwargs):
             """
-
+            chat window showing the history once opened and then the messages routed to it by the dispatcher
             :param my_login: login of the current user
             :param my_id: id of the current user
             :param receiver_login: login of the user with which the current user is writing
             :param receiver_id: id of the user with which the current user is writing
+            :param login_of: function returning the login of the user with a given id
+            :param events: queue of the dispatcher, receives the fetched history
             :param args:
             :param kwargs:
             """
@@ -283,7 +379,11 @@ class ChatGUI:
             self.my_login = my_login
             self.receiver_id = receiver_id
             self.receiver_login = receiver_login
-            self.messages: [models.Message] = []
+            self.login_of = login_of
+            self.events = events
+            # messages are kept in their compact read-only form, see openapi_client/compact.py
+            self.messages: [CompactModel] = []
+            self.message_ids = set()
             self.is_running = True
             self.last_update = datetime.fromtimestamp(0)
 
@@ -299,9 +399,7 @@ class ChatGUI:
             self.scroll.config(command=self.chat_text.yview)
             self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-            self.update_messages_loop = threading.Thread(target=self.update_messages, daemon=True,
-                                                         args=(lambda: self.is_running,))
-            self.update_messages_loop.start()
+            self.update_messages()
 
             self.message_entry = tk.Entry(self)
             self.message_entry.bind('<Return>', lambda event: self.send_message())
@@ -309,41 +407,56 @@ class ChatGUI:
 
             self.send_button = tk.Button(self, text='Send', command=self.send_message)
             self.send_button.grid(sticky=tk.EW)
-            # self.update_messages()
 
-        def update_messages(self, test=True):
+        def update_messages(self):
             """
-            updating messages
+            fetch the messages stored since the last update in a worker thread, so that the Tk main loop never
+            waits for the server; the dispatcher shows them
+            :return:
+            """
+            since = self.last_update
+            self.last_update = datetime.now()
+            threading.Thread(target=self.fetch_messages, args=(since,), daemon=True).start()
+
+        def fetch_messages(self, since):
+            """
+            read messages from the server and queue them for the dispatcher, called in a worker thread:
+            Tk widgets are only touched in the main loop
+            :param since: date after which messages are fetched
             :return:
             """
-            temp_time = datetime.now()
             try:
-                self.messages = api. \
+                messages = api. \
                     read_messages_to_user_from_date_message_receiver_id_sender_id_from_date_get(
                     self.my_id,
                     self.receiver_id,
-                    self.last_update.strftime('%Y-%m-%dT%H:%M:%S.%f'))
+                    since.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+                    _compact_models=True)
             except:
-                self.messages = []
-
-            if len(self.messages) > 0:
-                users: list(models.User) = None
-                try:
-                    users = api.read_users_users_get()
-                except:
-                    messagebox.showerror("Error", "Failed to obtain list of users!")
-
-                self.chat_text.config(state='normal')
-                for i in range(len(self.messages)):
-                    header = users[self.messages[i].from_usr - 1].login
-                    header = 'You' if header == self.my_login else header
-                    line = f"'{header}' said at {self.messages[i].date.strftime('%H:%M:%S, %m/%d/%y')}\n" \
-                           f"{self.messages[i].msg_content}\n\n"
-                    self.chat_text.insert('end', line)
-                    self.chat_text.see(tk.END)
-                self.chat_text.config(state='disabled')
-
-            self.last_update = temp_time
+                return
+            self.events.put(Event(HISTORY, (self.receiver_id, messages)))
+
+        def show_messages(self, messages):
+            """
+            append messages that are not displayed yet to the chat
+            :param messages: messages to be displayed
+            :return:
+            """
+            messages = [message for message in messages if message.id not in self.message_ids]
+            if len(messages) == 0:
+                return
+
+            self.chat_text.config(state='normal')
+            for message in messages:
+                header = self.login_of(message.from_usr, str(message.from_usr))
+                header = 'You' if header == self.my_login else header
+                line = f"'{header}' said at {message.date.strftime('%H:%M:%S, %m/%d/%y')}\n" \
+                       f"{message.msg_content}\n\n"
+                self.chat_text.insert('end', line)
+                self.message_ids.add(message.id)
+            self.chat_text.see(tk.END)
+            self.chat_text.config(state='disabled')
+            self.messages.extend(messages)
 
         def send_message(self):
             """
@@ -0,0 +1,33 @@
+"""
+    Chat
+
+    DefaultApi driven by the asyncio transport.
+"""
+
+
+from openapi_client.api.default_api import DefaultApi
+from openapi_client.async_api_client import AsyncApiClient
+from openapi_client.exceptions import ApiTypeError
+from openapi_client.pagination import aiterate_items
+
+
+class AsyncDefaultApi(DefaultApi):
+    """DefaultApi whose methods are coroutines.
+
+    Takes the same arguments and returns the same models as DefaultApi,
+    but every endpoint has to be awaited and the iter_* helpers return
+    asynchronous iterators (async for). A single event loop can drive
+    thousands of concurrent calls without a thread per request.
+
+    Args:
+        api_client (AsyncApiClient): defaults to a new AsyncApiClient
+    """
+
+    iterate_items = staticmethod(aiterate_items)
+
+    def __init__(self, api_client=None):
+        if api_client is None:
+            api_client = AsyncApiClient()
+        if not isinstance(api_client, AsyncApiClient):
+            raise ApiTypeError("AsyncDefaultApi needs an AsyncApiClient, got %s" % type(api_client).__name__)
+        super(AsyncDefaultApi, self).__init__(api_client)
@@ -27,6 +27,7 @@ from openapi_client.model.message_create import MessageCreate
 from openapi_client.model.user import User
 from openapi_client.model.user_ban import UserBan
 from openapi_client.model.user_create import UserCreate
+from openapi_client.pagination import iterate_items
 
 
 class DefaultApi(object):
@@ -36,6 +37,9 @@ class DefaultApi(object):
     Do not edit the class manually.
     """
 
+    # turns a list endpoint into an iterator over the items of all its pages
+    iterate_items = staticmethod(iterate_items)
+
     def __init__(self, api_client=None):
         if api_client is None:
             api_client = ApiClient()
@@ -76,6 +80,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -102,6 +109,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['user_ban'] = \
                 user_ban
             return self.call_with_http_info(**kwargs)
@@ -109,7 +119,9 @@ class DefaultApi(object):
         self.ban_user_user_ban_put = _Endpoint(
             settings={
                 'response_type': (User,),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/user/ban',
                 'operation_id': 'ban_user_user_ban_put',
                 'http_method': 'PUT',
@@ -195,6 +207,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -221,6 +236,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['receiver_id'] = \
                 receiver_id
             kwargs['message_create'] = \
@@ -230,7 +248,9 @@ class DefaultApi(object):
         self.create_message_from_user_message_receiver_id_post = _Endpoint(
             settings={
                 'response_type': (Message,),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/message/{receiver_id}/',
                 'operation_id': 'create_message_from_user_message_receiver_id_post',
                 'http_method': 'POST',
@@ -320,6 +340,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -346,6 +369,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['user_create'] = \
                 user_create
             return self.call_with_http_info(**kwargs)
@@ -437,6 +463,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -463,6 +492,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['message_id'] = \
                 message_id
             return self.call_with_http_info(**kwargs)
@@ -470,7 +502,9 @@ class DefaultApi(object):
         self.delete_message_by_id_message_message_id_delete = _Endpoint(
             settings={
                 'response_type': (bool, date, datetime, dict, float, int, list, str, none_type,),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/message/{message_id}',
                 'operation_id': 'delete_message_by_id_message_message_id_delete',
                 'http_method': 'DELETE',
@@ -553,6 +587,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -579,6 +616,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['status'] = \
                 status
             return self.call_with_http_info(**kwargs)
@@ -669,6 +709,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -695,6 +738,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['receiver_id'] = \
                 receiver_id
             return self.call_with_http_info(**kwargs)
@@ -702,7 +748,9 @@ class DefaultApi(object):
         self.kick_user_user_kick_get = _Endpoint(
             settings={
                 'response_type': (User,),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/user/kick',
                 'operation_id': 'kick_user_user_kick_get',
                 'http_method': 'GET',
@@ -785,6 +833,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -811,6 +862,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['user_create'] = \
                 user_create
             return self.call_with_http_info(**kwargs)
@@ -883,6 +937,7 @@ class DefaultApi(object):
             Keyword Args:
                 skip (int): [optional] if omitted the server will use the default value of 0
                 limit (int): [optional] if omitted the server will use the default value of 100
+                cursor (str): [optional] X-Next-Cursor header of the previous page
                 _return_http_data_only (bool): response data without head status
                     code and headers. Default is True.
                 _preload_content (bool): if False, the urllib3.HTTPResponse object
@@ -901,6 +956,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -927,12 +985,17 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             return self.call_with_http_info(**kwargs)
 
         self.read_all_messages_message_get = _Endpoint(
             settings={
                 'response_type': ([Message],),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/message/',
                 'operation_id': 'read_all_messages_message_get',
                 'http_method': 'GET',
@@ -942,6 +1005,7 @@ class DefaultApi(object):
                 'all': [
                     'skip',
                     'limit',
+                    'cursor',
                 ],
                 'required': [],
                 'nullable': [
@@ -961,14 +1025,18 @@ class DefaultApi(object):
                         (int,),
                     'limit':
                         (int,),
+                    'cursor':
+                        (str,),
                 },
                 'attribute_map': {
                     'skip': 'skip',
                     'limit': 'limit',
+                    'cursor': 'cursor',
                 },
                 'location_map': {
                     'skip': 'query',
                     'limit': 'query',
+                    'cursor': 'query',
                 },
                 'collection_format_map': {
                 }
@@ -1006,6 +1074,7 @@ class DefaultApi(object):
             Keyword Args:
                 skip (int): [optional] if omitted the server will use the default value of 0
                 limit (int): [optional] if omitted the server will use the default value of 100
+                cursor (str): [optional] X-Next-Cursor header of the previous page
                 _return_http_data_only (bool): response data without head status
                     code and headers. Default is True.
                 _preload_content (bool): if False, the urllib3.HTTPResponse object
@@ -1024,6 +1093,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -1050,6 +1122,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['receiver_id'] = \
                 receiver_id
             kwargs['sender_id'] = \
@@ -1061,7 +1136,9 @@ class DefaultApi(object):
         self.read_messages_to_user_from_date_message_receiver_id_sender_id_from_date_get = _Endpoint(
             settings={
                 'response_type': ([Message],),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/message/{receiver_id}/{sender_id}/{from_date}',
                 'operation_id': 'read_messages_to_user_from_date_message_receiver_id_sender_id_from_date_get',
                 'http_method': 'GET',
@@ -1074,6 +1151,7 @@ class DefaultApi(object):
                     'from_date',
                     'skip',
                     'limit',
+                    'cursor',
                 ],
                 'required': [
                     'receiver_id',
@@ -1103,6 +1181,8 @@ class DefaultApi(object):
                         (int,),
                     'limit':
                         (int,),
+                    'cursor':
+                        (str,),
                 },
                 'attribute_map': {
                     'receiver_id': 'receiver_id',
@@ -1110,6 +1190,7 @@ class DefaultApi(object):
                     'from_date': 'from_date',
                     'skip': 'skip',
                     'limit': 'limit',
+                    'cursor': 'cursor',
                 },
                 'location_map': {
                     'receiver_id': 'path',
@@ -1117,6 +1198,7 @@ class DefaultApi(object):
                     'from_date': 'path',
                     'skip': 'query',
                     'limit': 'query',
+                    'cursor': 'query',
                 },
                 'collection_format_map': {
                 }
@@ -1152,6 +1234,7 @@ class DefaultApi(object):
             Keyword Args:
                 skip (int): [optional] if omitted the server will use the default value of 0
                 limit (int): [optional] if omitted the server will use the default value of 100
+                cursor (str): [optional] X-Next-Cursor header of the previous page
                 _return_http_data_only (bool): response data without head status
                     code and headers. Default is True.
                 _preload_content (bool): if False, the urllib3.HTTPResponse object
@@ -1170,6 +1253,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -1196,6 +1282,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['receiver_id'] = \
                 receiver_id
             kwargs['sender_id'] = \
@@ -1205,7 +1294,9 @@ class DefaultApi(object):
         self.read_messages_to_user_from_message_receiver_id_sender_id_get = _Endpoint(
             settings={
                 'response_type': ([Message],),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/message/{receiver_id}/{sender_id}/',
                 'operation_id': 'read_messages_to_user_from_message_receiver_id_sender_id_get',
                 'http_method': 'GET',
@@ -1217,6 +1308,7 @@ class DefaultApi(object):
                     'sender_id',
                     'skip',
                     'limit',
+                    'cursor',
                 ],
                 'required': [
                     'receiver_id',
@@ -1243,18 +1335,22 @@ class DefaultApi(object):
                         (int,),
                     'limit':
                         (int,),
+                    'cursor':
+                        (str,),
                 },
                 'attribute_map': {
                     'receiver_id': 'receiver_id',
                     'sender_id': 'sender_id',
                     'skip': 'skip',
                     'limit': 'limit',
+                    'cursor': 'cursor',
                 },
                 'location_map': {
                     'receiver_id': 'path',
                     'sender_id': 'path',
                     'skip': 'query',
                     'limit': 'query',
+                    'cursor': 'query',
                 },
                 'collection_format_map': {
                 }
@@ -1304,6 +1400,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -1330,6 +1429,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['user_id'] = \
                 user_id
             return self.call_with_http_info(**kwargs)
@@ -1401,6 +1503,7 @@ class DefaultApi(object):
             Keyword Args:
                 skip (int): [optional] if omitted the server will use the default value of 0
                 limit (int): [optional] if omitted the server will use the default value of 100
+                cursor (str): [optional] X-Next-Cursor header of the previous page
                 _return_http_data_only (bool): response data without head status
                     code and headers. Default is True.
                 _preload_content (bool): if False, the urllib3.HTTPResponse object
@@ -1419,6 +1522,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -1445,6 +1551,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             return self.call_with_http_info(**kwargs)
 
         self.read_users_users_get = _Endpoint(
@@ -1460,6 +1569,7 @@ class DefaultApi(object):
                 'all': [
                     'skip',
                     'limit',
+                    'cursor',
                 ],
                 'required': [],
                 'nullable': [
@@ -1479,14 +1589,18 @@ class DefaultApi(object):
                         (int,),
                     'limit':
                         (int,),
+                    'cursor':
+                        (str,),
                 },
                 'attribute_map': {
                     'skip': 'skip',
                     'limit': 'limit',
+                    'cursor': 'cursor',
                 },
                 'location_map': {
                     'skip': 'query',
                     'limit': 'query',
+                    'cursor': 'query',
                 },
                 'collection_format_map': {
                 }
@@ -1536,6 +1650,9 @@ class DefaultApi(object):
                 _host_index (int/None): specifies the index of the server
                     that we want to use.
                     Default is read from the configuration.
+                _compact_models (bool): specifies if the models of the
+                    response are returned in their read-only compact form.
+                    Default is False.
                 async_req (bool): execute request asynchronously
 
             Returns:
@@ -1562,6 +1679,9 @@ class DefaultApi(object):
                 '_check_return_type', True
             )
             kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['_compact_models'] = kwargs.get(
+                '_compact_models', False
+            )
             kwargs['user'] = \
                 user
             return self.call_with_http_info(**kwargs)
@@ -1569,7 +1689,9 @@ class DefaultApi(object):
         self.update_user_status_users_status_put = _Endpoint(
             settings={
                 'response_type': (User,),
-                'auth': [],
+                'auth': [
+                    'HTTPBearer'
+                ],
                 'endpoint_path': '/users/status',
                 'operation_id': 'update_user_status_users_status_put',
                 'http_method': 'PUT',
@@ -1617,3 +1739,64 @@ class DefaultApi(object):
             api_client=api_client,
             callable=__update_user_status_users_status_put
         )
+
+    def iter_users(self, **kwargs):
+        """Iterates over all users, requesting the pages lazily.
+
+        Keyword Args:
+            the keyword arguments of read_users_users_get, `limit` sets
+            the page size
+
+        Returns:
+            generator of User
+        """
+        return self.iterate_items(self.read_users_users_get, **kwargs)
+
+    def iter_all_messages(self, **kwargs):
+        """Iterates over all messages, requesting the pages lazily.
+
+        Keyword Args:
+            the keyword arguments of read_all_messages_message_get, `limit`
+            sets the page size
+
+        Returns:
+            generator of Message
+        """
+        return self.iterate_items(self.read_all_messages_message_get, **kwargs)
+
+    def iter_messages_to_user_from(self, receiver_id, sender_id, **kwargs):
+        """Iterates over a conversation, requesting the pages lazily.
+
+        Args:
+            receiver_id (int):
+            sender_id (int):
+
+        Keyword Args:
+            the keyword arguments of
+            read_messages_to_user_from_message_receiver_id_sender_id_get,
+            `limit` sets the page size
+
+        Returns:
+            generator of Message
+        """
+        return self.iterate_items(self.read_messages_to_user_from_message_receiver_id_sender_id_get,
+                                  receiver_id, sender_id, **kwargs)
+
+    def iter_messages_to_user_from_date(self, receiver_id, sender_id, from_date, **kwargs):
+        """Iterates over a conversation since a given date, requesting the pages lazily.
+
+        Args:
+            receiver_id (int):
+            sender_id (int):
+            from_date (datetime):
+
+        Keyword Args:
+            the keyword arguments of
+            read_messages_to_user_from_date_message_receiver_id_sender_id_from_date_get,
+            `limit` sets the page size
+
+        Returns:
+            generator of Message
+        """
+        return self.iterate_items(self.read_messages_to_user_from_date_message_receiver_id_sender_id_from_date_get,
+                                  receiver_id, sender_id, from_date, **kwargs)
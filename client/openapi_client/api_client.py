@@ -8,6 +8,7 @@
 """
 
 
+import collections
 import json
 import atexit
 import mimetypes
@@ -22,6 +23,9 @@ from urllib3.fields import RequestField
 
 from openapi_client import rest
 from openapi_client.configuration import Configuration
+from openapi_client.etag_cache import ETagCache
+from openapi_client import fast_decode
+from openapi_client.compact import to_compact
 from openapi_client.exceptions import ApiTypeError, ApiValueError, ApiException
 from openapi_client.model_utils import (
     ModelNormal,
@@ -39,6 +43,12 @@ from openapi_client.model_utils import (
 )
 
 
+# a call serialized by ApiClient.prepare_request, ready to be sent by a REST client
+PreparedRequest = collections.namedtuple(
+    'PreparedRequest',
+    ['url', 'query_params', 'headers', 'post_params', 'body', 'cache_key'])
+
+
 class ApiClient(object):
     """Generic API client for OpenAPI client library builds.
 
@@ -59,18 +69,22 @@ class ApiClient(object):
         to the API
     :param pool_threads: The number of threads to use for async requests
         to the API. More threads means more concurrent API requests.
+        Defaults to configuration.pool_threads.
     """
 
     _pool = None
 
     def __init__(self, configuration=None, header_name=None, header_value=None,
-                 cookie=None, pool_threads=1):
+                 cookie=None, pool_threads=None):
         if configuration is None:
             configuration = Configuration.get_default_copy()
         self.configuration = configuration
+        if pool_threads is None:
+            pool_threads = configuration.pool_threads
         self.pool_threads = pool_threads
 
         self.rest_client = rest.RESTClientObject(configuration)
+        self.etag_cache = ETagCache(configuration.etag_cache_size)
         self.default_headers = {}
         if header_name is not None:
             self.default_headers[header_name] = header_value
@@ -102,6 +116,11 @@ class ApiClient(object):
             self._pool = ThreadPool(self.pool_threads)
         return self._pool
 
+    @property
+    def connection_stats(self):
+        """ConnectionStats of the connections to the server"""
+        return self.rest_client.connection_stats
+
     @property
     def user_agent(self):
         """User agent for this API client"""
@@ -131,9 +150,44 @@ class ApiClient(object):
         _preload_content: bool = True,
         _request_timeout: typing.Optional[typing.Union[int, typing.Tuple]] = None,
         _host: typing.Optional[str] = None,
-        _check_type: typing.Optional[bool] = None
+        _check_type: typing.Optional[bool] = None,
+        _compact_models: bool = False
     ):
 
+        request = self.prepare_request(resource_path, method, path_params,
+                                       query_params, header_params, body,
+                                       post_params, files, auth_settings,
+                                       collection_formats, _preload_content,
+                                       _host)
+
+        try:
+            # perform request and return response
+            response_data = self.request(
+                method, request.url, query_params=request.query_params,
+                headers=request.headers, post_params=request.post_params,
+                body=request.body, _preload_content=_preload_content,
+                _request_timeout=_request_timeout)
+            if request.cache_key is not None:
+                self.etag_cache.store(request.cache_key, response_data)
+        except ApiException as e:
+            response_data = self.revalidated_response(e, request.cache_key)
+
+        return self.handle_response(response_data, response_type,
+                                    _return_http_data_only, _preload_content,
+                                    _check_type, _compact_models)
+
+    def prepare_request(self, resource_path, method, path_params=None,
+                        query_params=None, header_params=None, body=None,
+                        post_params=None, files=None, auth_settings=None,
+                        collection_formats=None, _preload_content=True,
+                        _host=None):
+        """Serializes the parameters of a call into the request to send.
+
+        Shared by the blocking and the asyncio clients, see call_api for
+        the parameters.
+
+        :return: PreparedRequest
+        """
         config = self.configuration
 
         # header parameters
@@ -190,17 +244,48 @@ class ApiClient(object):
             # use server/host defined in path or operation instead
             url = _host + resource_path
 
-        try:
-            # perform request and return response
-            response_data = self.request(
-                method, url, query_params=query_params, headers=header_params,
-                post_params=post_params, body=body,
-                _preload_content=_preload_content,
-                _request_timeout=_request_timeout)
-        except ApiException as e:
-            e.body = e.body.decode('utf-8')
-            raise e
-
+        # conditional request: revalidate a cached body instead of downloading it again
+        cache_key = None
+        if method == 'GET' and _preload_content and self.etag_cache.max_entries > 0:
+            cache_key = self.etag_cache.key(url, query_params)
+            etag = self.etag_cache.etag(cache_key)
+            if etag is not None:
+                header_params = dict(header_params or {})
+                header_params['If-None-Match'] = etag
+
+        return PreparedRequest(url, query_params, header_params, post_params,
+                               body, cache_key)
+
+    def revalidated_response(self, exception, cache_key):
+        """Replays the cached response of a request answered with 304.
+
+        :param exception: ApiException raised by the REST client
+        :param cache_key: key of the request in the ETag cache, None if it
+            was not a conditional request
+        :raises ApiException: the exception itself if there is nothing to
+            replay
+        :return: CachedResponse
+        """
+        cached = None
+        if exception.status == 304 and cache_key is not None:
+            cached = self.etag_cache.revalidated(cache_key)
+        if cached is None:
+            exception.body = exception.body.decode('utf-8') if exception.body is not None else exception.body
+            raise exception
+        return cached
+
+    def handle_response(self, response_data, response_type,
+                        _return_http_data_only=None, _preload_content=True,
+                        _check_type=None, _compact_models=False):
+        """Deserializes the response of a call.
+
+        Shared by the blocking and the asyncio clients, see call_api for
+        the parameters.
+
+        :param response_data: response of the REST client
+        :return: the deserialized data, with the status and the headers
+            unless _return_http_data_only is set
+        """
         self.last_response = response_data
 
         return_data = response_data
@@ -223,7 +308,8 @@ class ApiClient(object):
             return_data = self.deserialize(
                 response_data,
                 response_type,
-                _check_type
+                _check_type,
+                _compact_models
             )
         else:
             return_data = None
@@ -286,7 +372,7 @@ class ApiClient(object):
             return {key: cls.sanitize_for_serialization(val) for key, val in obj.items()}
         raise ApiValueError('Unable to prepare type {} for serialization'.format(obj.__class__.__name__))
 
-    def deserialize(self, response, response_type, _check_type):
+    def deserialize(self, response, response_type, _check_type, _compact_models=False):
         """Deserializes response into an object.
 
         :param response: RESTResponse object to be deserialized.
@@ -303,6 +389,9 @@ class ApiClient(object):
         :param _check_type: boolean, whether to check the types of the data
             received from the server
         :type _check_type: bool
+        :param _compact_models: boolean, whether to return the read-only
+            compact form of the models (see compact.py)
+        :type _compact_models: bool
 
         :return: deserialized object.
         """
@@ -319,6 +408,18 @@ class ApiClient(object):
         except ValueError:
             received_data = response.data
 
+        if _check_type and self.configuration.fast_decode:
+            deserialized_data = fast_decode.deserialize(
+                received_data,
+                response_type,
+                ['received_data'],
+                self.configuration,
+                check_types=self.configuration.fast_decode_check_types,
+                compact=_compact_models
+            )
+            if deserialized_data is not fast_decode.UNSUPPORTED:
+                return deserialized_data
+
         # store our data under the key of 'received_data' so users have some
         # context if they are deserializing a string and the data type is wrong
         deserialized_data = validate_and_convert_types(
@@ -329,6 +430,8 @@ class ApiClient(object):
             _check_type,
             configuration=self.configuration
         )
+        if _compact_models:
+            deserialized_data = to_compact(deserialized_data)
         return deserialized_data
 
     def call_api(
@@ -349,7 +452,8 @@ class ApiClient(object):
         _preload_content: bool = True,
         _request_timeout: typing.Optional[typing.Union[int, typing.Tuple]] = None,
         _host: typing.Optional[str] = None,
-        _check_type: typing.Optional[bool] = None
+        _check_type: typing.Optional[bool] = None,
+        _compact_models: bool = False
     ):
         """Makes the HTTP request (synchronous) and returns deserialized data.
 
@@ -397,6 +501,9 @@ class ApiClient(object):
         :param _check_type: boolean describing if the data back from the server
             should have its type checked.
         :type _check_type: bool, optional
+        :param _compact_models: if True, the models of the response are
+            returned in their read-only compact form (see compact.py).
+        :type _compact_models: bool, optional
         :return:
             If async_req parameter is True,
             the request will be called asynchronously.
@@ -411,7 +518,7 @@ class ApiClient(object):
                                    response_type, auth_settings,
                                    _return_http_data_only, collection_formats,
                                    _preload_content, _request_timeout, _host,
-                                   _check_type)
+                                   _check_type, _compact_models)
 
         return self.pool.apply_async(self.__call_api, (resource_path,
                                                        method, path_params,
@@ -424,7 +531,8 @@ class ApiClient(object):
                                                        collection_formats,
                                                        _preload_content,
                                                        _request_timeout,
-                                                       _host, _check_type))
+                                                       _host, _check_type,
+                                                       _compact_models))
 
     def request(self, method, url, query_params=None, headers=None,
                 post_params=None, body=None, _preload_content=True,
@@ -664,7 +772,8 @@ class Endpoint(object):
             '_request_timeout',
             '_return_http_data_only',
             '_check_input_type',
-            '_check_return_type'
+            '_check_return_type',
+            '_compact_models'
         ])
         self.params_map['nullable'].extend(['_request_timeout'])
         self.validations = root_map['validations']
@@ -677,7 +786,8 @@ class Endpoint(object):
             '_request_timeout': (none_type, int, (int,), [int]),
             '_return_http_data_only': (bool,),
             '_check_input_type': (bool,),
-            '_check_return_type': (bool,)
+            '_check_return_type': (bool,),
+            '_compact_models': (bool,)
         }
         self.openapi_types.update(extra_types)
         self.attribute_map = root_map['attribute_map']
@@ -842,6 +952,7 @@ class Endpoint(object):
             auth_settings=self.settings['auth'],
             async_req=kwargs['async_req'],
             _check_type=kwargs['_check_return_type'],
+            _compact_models=kwargs.get('_compact_models', False),
             _return_http_data_only=kwargs['_return_http_data_only'],
             _preload_content=kwargs['_preload_content'],
             _request_timeout=kwargs['_request_timeout'],
@@ -0,0 +1,120 @@
+"""
+    Chat
+
+    API client sending its requests with the asyncio transport.
+"""
+
+
+import io
+import typing
+
+from openapi_client.api_client import ApiClient
+from openapi_client.async_rest import AsyncRESTClientObject
+from openapi_client.exceptions import ApiException, ApiValueError
+
+
+class AsyncApiClient(ApiClient):
+    """API client whose calls are coroutines.
+
+    Parameters are serialized and responses deserialized exactly as by
+    ApiClient, with the same models, only the requests go through
+    AsyncRESTClientObject instead of urllib3. Endpoints called through an
+    AsyncApiClient (see AsyncDefaultApi) return awaitables:
+
+        async with AsyncApiClient(configuration) as api_client:
+            api = AsyncDefaultApi(api_client)
+            users = await api.read_users_users_get()
+
+    :param configuration: .Configuration object for this client
+    :param header_name: a header to pass when making calls to the API.
+    :param header_value: a header value to pass when making calls to
+        the API.
+    :param cookie: a cookie to include in the header when making calls
+        to the API
+    """
+
+    def __init__(self, configuration=None, header_name=None, header_value=None,
+                 cookie=None):
+        super(AsyncApiClient, self).__init__(configuration, header_name, header_value, cookie)
+        self.rest_client = AsyncRESTClientObject(self.configuration)
+
+    def __enter__(self):
+        raise TypeError("use 'async with' with AsyncApiClient")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes the idle connections."""
+        await self.rest_client.close()
+
+    async def call_api(
+        self,
+        resource_path: str,
+        method: str,
+        path_params: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        query_params: typing.Optional[typing.List[typing.Tuple[str, typing.Any]]] = None,
+        header_params: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        body: typing.Optional[typing.Any] = None,
+        post_params: typing.Optional[typing.List[typing.Tuple[str, typing.Any]]] = None,
+        files: typing.Optional[typing.Dict[str, typing.List[io.IOBase]]] = None,
+        response_type: typing.Optional[typing.Tuple[typing.Any]] = None,
+        auth_settings: typing.Optional[typing.List[str]] = None,
+        async_req: typing.Optional[bool] = None,
+        _return_http_data_only: typing.Optional[bool] = None,
+        collection_formats: typing.Optional[typing.Dict[str, str]] = None,
+        _preload_content: bool = True,
+        _request_timeout: typing.Optional[typing.Union[int, typing.Tuple]] = None,
+        _host: typing.Optional[str] = None,
+        _check_type: typing.Optional[bool] = None,
+        _compact_models: bool = False
+    ):
+        """Makes the HTTP request and returns deserialized data.
+
+        Takes the parameters of ApiClient.call_api except async_req: the
+        call is a coroutine already, run several of them concurrently
+        with asyncio.gather instead.
+        """
+        if async_req:
+            raise ApiValueError("async_req is not supported by AsyncApiClient, await the call instead")
+
+        request = self.prepare_request(resource_path, method, path_params,
+                                       query_params, header_params, body,
+                                       post_params, files, auth_settings,
+                                       collection_formats, _preload_content,
+                                       _host)
+
+        try:
+            response_data = await self.request(
+                method, request.url, query_params=request.query_params,
+                headers=request.headers, post_params=request.post_params,
+                body=request.body, _preload_content=_preload_content,
+                _request_timeout=_request_timeout)
+            if request.cache_key is not None:
+                self.etag_cache.store(request.cache_key, response_data)
+        except ApiException as e:
+            response_data = self.revalidated_response(e, request.cache_key)
+
+        return self.handle_response(response_data, response_type,
+                                    _return_http_data_only, _preload_content,
+                                    _check_type, _compact_models)
+
+    async def request(self, method, url, query_params=None, headers=None,
+                      post_params=None, body=None, _preload_content=True,
+                      _request_timeout=None):
+        """Makes the HTTP request using AsyncRESTClientObject."""
+        if method not in ['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE']:
+            raise ApiValueError(
+                "http method must be `GET`, `HEAD`, `OPTIONS`,"
+                " `POST`, `PATCH`, `PUT` or `DELETE`."
+            )
+        return await self.rest_client.request(method, url,
+                                              query_params=query_params,
+                                              headers=headers,
+                                              post_params=post_params,
+                                              _preload_content=_preload_content,
+                                              _request_timeout=_request_timeout,
+                                              body=body)
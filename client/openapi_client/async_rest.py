@@ -0,0 +1,504 @@
+"""
+    Chat
+
+    HTTP/1.1 transport on top of asyncio streams, the asyncio counterpart of
+    rest.RESTClientObject.
+"""
+
+
+import asyncio
+import collections
+import json
+import logging
+import re
+import ssl
+from urllib.parse import urlencode, urlsplit
+
+import urllib3
+from urllib3._collections import HTTPHeaderDict
+
+from openapi_client.connection_stats import ConnectionStats
+from openapi_client.exceptions import ApiException, UnauthorizedException, ForbiddenException, NotFoundException, ServiceException, ApiValueError
+
+
+logger = logging.getLogger(__name__)
+
+# connections kept per host when the configuration does not say otherwise
+DEFAULT_MAXSIZE = 100
+
+# longest status line or header line accepted from the server
+MAX_LINE = 65536
+
+
+class AsyncRESTResponse(object):
+    """A response read in full from the server.
+
+    Has the attributes and methods of rest.RESTResponse, so ApiClient and
+    the exceptions handle both alike.
+    """
+
+    def __init__(self, status, reason, headers, data):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+    def getheaders(self):
+        """Returns a dictionary of the response headers."""
+        return self.headers
+
+    def getheader(self, name, default=None):
+        """Returns a given response header."""
+        return self.headers.get(name, default)
+
+
+class Connection(object):
+    """A keep-alive connection to a server.
+
+    Args:
+        reader (asyncio.StreamReader): the reading end of the connection
+        writer (asyncio.StreamWriter): the writing end of the connection
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        # False for the extra connections opened when the pool does not block
+        self.pooled = True
+
+    def close(self):
+        """Closes the connection without waiting for the peer."""
+        self.writer.close()
+
+
+class ConnectionPool(object):
+    """The connections to a single server.
+
+    At most maxsize pooled connections are in use at the same time. When
+    all of them are busy, a request waits for one to be released (block)
+    or gets an extra connection closed after the request. Released
+    connections are kept open and reused by the next requests.
+
+    Args:
+        scheme (str): "http" or "https"
+        host (str): host name of the server
+        port (int): port of the server
+        maxsize (int): maximal number of pooled connections
+        ssl_context (ssl.SSLContext): used for https, None for http
+        block (bool): whether to wait for a pooled connection
+        timeout (float): seconds to wait for a pooled connection, None
+            waits as long as needed
+        stats (ConnectionStats): counters of the connections
+    """
+
+    def __init__(self, scheme, host, port, maxsize, ssl_context=None, block=False, timeout=None, stats=None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context if scheme == 'https' else None
+        self.slots = asyncio.Semaphore(maxsize)
+        self.idle = collections.deque()
+        self.block = block
+        self.timeout = timeout
+        self.stats = stats or ConnectionStats()
+
+    async def acquire(self, timeout=None):
+        """Returns an idle connection or a new one.
+
+        Args:
+            timeout (float): seconds allowed to open a new connection
+
+        Returns:
+            (Connection, bool): the connection and whether it was reused
+        """
+        if not self.slots.locked():
+            await self.slots.acquire()
+        elif not self.block:
+            connection = await self.connect(timeout)
+            connection.pooled = False
+            return connection, False
+        else:
+            try:
+                await asyncio.wait_for(self.slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.stats.count('exhausted')
+                raise ApiException(status=0, reason="EmptyPoolError\nevery connection to %s:%d stayed busy for %s "
+                                                    "seconds" % (self.host, self.port, self.timeout))
+        try:
+            while self.idle:
+                connection = self.idle.pop()
+                if not connection.reader.at_eof() and not connection.writer.is_closing():
+                    self.stats.count('reused')
+                    return connection, True
+                connection.close()
+            return await self.connect(timeout), False
+        except BaseException:
+            self.slots.release()
+            raise
+
+    async def connect(self, timeout=None):
+        """Opens a new connection to the server.
+
+        Args:
+            timeout (float): seconds allowed to connect
+
+        Returns:
+            Connection
+        """
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl_context, limit=MAX_LINE),
+            timeout)
+        self.stats.count('new')
+        return Connection(reader, writer)
+
+    def release(self, connection, reusable):
+        """Gives a connection back after a request.
+
+        Args:
+            connection (Connection): the connection returned by acquire
+            reusable (bool): whether the connection can carry another request
+        """
+        if not connection.pooled:
+            connection.close()
+            self.stats.count('discarded')
+            return
+        if reusable:
+            self.idle.append(connection)
+        else:
+            connection.close()
+        self.slots.release()
+
+    def close(self):
+        """Closes the idle connections."""
+        while self.idle:
+            self.idle.pop().close()
+
+
+class AsyncRESTClientObject(object):
+    """Sends the requests of AsyncApiClient over asyncio streams.
+
+    Connections are pooled per server and kept alive between requests, so
+    thousands of concurrent calls share a few sockets and no thread.
+
+    Args:
+        configuration (Configuration): the configuration of the client
+        maxsize (int): maximal number of connections per server, defaults
+            to configuration.connection_pool_maxsize
+
+    connection_pool_block and connection_pool_timeout of the configuration
+    apply as for RESTClientObject, and connection_stats counts the
+    connections the same way.
+    """
+
+    def __init__(self, configuration, maxsize=None):
+        if configuration.proxy:
+            raise ApiValueError("proxies are not supported by the asyncio transport")
+
+        if maxsize is None:
+            if configuration.connection_pool_maxsize is not None:
+                maxsize = configuration.connection_pool_maxsize
+            else:
+                maxsize = DEFAULT_MAXSIZE
+        self.maxsize = maxsize
+        self.block = configuration.connection_pool_block
+        self.pool_timeout = configuration.connection_pool_timeout
+        self.connection_stats = ConnectionStats()
+
+        self.ssl_context = ssl.create_default_context(cafile=configuration.ssl_ca_cert)
+        if configuration.cert_file:
+            self.ssl_context.load_cert_chain(configuration.cert_file, keyfile=configuration.key_file)
+        if not configuration.verify_ssl or configuration.assert_hostname is False:
+            self.ssl_context.check_hostname = False
+        if not configuration.verify_ssl:
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+
+        self.pools = {}
+
+    def pool(self, url):
+        """Returns the connection pool of the server of a url.
+
+        Args:
+            url (str): the url of a request
+
+        Returns:
+            (ConnectionPool, str): the pool and the target of the request
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ApiValueError("unsupported url scheme: %r" % url)
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(scheme, parts.hostname, port, self.maxsize, self.ssl_context,
+                                  self.block, self.pool_timeout, self.connection_stats)
+            self.pools[key] = pool
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        return pool, target
+
+    async def close(self):
+        """Closes the idle connections of every server."""
+        for pool in self.pools.values():
+            pool.close()
+        self.pools.clear()
+
+    def encode_body(self, method, url, query_params, headers, body, post_params):
+        """Builds the url and the payload of a request, as RESTClientObject does.
+
+        Returns:
+            (str, bytes): the url with the query string and the payload
+        """
+        payload = b''
+        if method in ['POST', 'PUT', 'PATCH', 'OPTIONS', 'DELETE']:
+            if query_params:
+                url += '?' + urlencode(query_params)
+            if re.search('json', headers['Content-Type'], re.IGNORECASE):
+                if body is not None:
+                    payload = json.dumps(body).encode('utf-8')
+            elif headers['Content-Type'] == 'application/x-www-form-urlencoded':  # noqa: E501
+                payload = urlencode(post_params).encode('utf-8')
+            elif headers['Content-Type'] == 'multipart/form-data':
+                payload, headers['Content-Type'] = urllib3.encode_multipart_formdata(post_params)
+            # Pass a `string` parameter directly in the body to support
+            # other content types than Json when `body` argument is
+            # provided in serialized form
+            elif isinstance(body, str) or isinstance(body, bytes):
+                payload = body.encode('utf-8') if isinstance(body, str) else body
+            else:
+                # Cannot generate the request from given parameters
+                msg = """Cannot prepare a request message for provided
+                         arguments. Please check that your arguments match
+                         declared content type."""
+                raise ApiException(status=0, reason=msg)
+        elif query_params:
+            url += '?' + urlencode(query_params)
+        return url, payload
+
+    async def request(self, method, url, query_params=None, headers=None,
+                      body=None, post_params=None, _preload_content=True,
+                      _request_timeout=None):
+        """Perform requests.
+
+        :param method: http request method
+        :param url: http request url
+        :param query_params: query parameters in the url
+        :param headers: http request headers
+        :param body: request json body, for `application/json`
+        :param post_params: request post parameters,
+                            `application/x-www-form-urlencoded`
+                            and `multipart/form-data`
+        :param _preload_content: ignored, the body is always read in full
+        :param _request_timeout: timeout setting for this request. If one
+                                 number provided, it will be total request
+                                 timeout. It can also be a pair (tuple) of
+                                 (connection, read) timeouts.
+        """
+        method = method.upper()
+        assert method in ['GET', 'HEAD', 'DELETE', 'POST', 'PUT',
+                          'PATCH', 'OPTIONS']
+
+        if post_params and body:
+            raise ApiValueError(
+                "body parameter cannot be used with post_params parameter."
+            )
+
+        post_params = post_params or {}
+        headers = dict(headers or {})
+
+        connect_timeout = read_timeout = None
+        if _request_timeout:
+            if isinstance(_request_timeout, (int, float)):  # noqa: E501,F821
+                connect_timeout = read_timeout = _request_timeout
+            elif (isinstance(_request_timeout, tuple) and
+                  len(_request_timeout) == 2):
+                connect_timeout, read_timeout = _request_timeout
+
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = 'application/json'
+
+        url, payload = self.encode_body(method, url, query_params, headers, body, post_params)
+        pool, target = self.pool(url)
+        message = self.encode_request(method, target, pool, headers, payload)
+
+        try:
+            r = await self.exchange(pool, method, message, connect_timeout, read_timeout)
+        except ssl.SSLError as e:
+            msg = "{0}\n{1}".format(type(e).__name__, str(e))
+            raise ApiException(status=0, reason=msg)
+
+        # log response body
+        logger.debug("response body: %s", r.data)
+
+        if not 200 <= r.status <= 299:
+            if r.status == 401:
+                raise UnauthorizedException(http_resp=r)
+
+            if r.status == 403:
+                raise ForbiddenException(http_resp=r)
+
+            if r.status == 404:
+                raise NotFoundException(http_resp=r)
+
+            if 500 <= r.status <= 599:
+                raise ServiceException(http_resp=r)
+
+            raise ApiException(http_resp=r)
+
+        return r
+
+    @staticmethod
+    def encode_request(method, target, pool, headers, payload):
+        """Builds the bytes of a request.
+
+        Returns:
+            bytes
+        """
+        default_port = 443 if pool.scheme == 'https' else 80
+        host = pool.host if pool.port == default_port else '%s:%d' % (pool.host, pool.port)
+        lines = ['%s %s HTTP/1.1' % (method, target), 'Host: %s' % host]
+        for name, value in headers.items():
+            lines.append('%s: %s' % (name, value))
+        if payload or method in ['POST', 'PUT', 'PATCH']:
+            lines.append('Content-Length: %d' % len(payload))
+        lines.append('Connection: keep-alive')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+    async def exchange(self, pool, method, message, connect_timeout=None, read_timeout=None):
+        """Sends a request and reads its response.
+
+        A kept-alive connection may have been closed by the server in the
+        meantime, such a request is sent again once on a new connection.
+
+        Returns:
+            AsyncRESTResponse
+        """
+        connection, reused = await pool.acquire(connect_timeout)
+        reusable = False
+        try:
+            while True:
+                try:
+                    connection.writer.write(message)
+                    await connection.writer.drain()
+                    response, reusable = await asyncio.wait_for(
+                        self.read_response(connection.reader, method), read_timeout)
+                    return response
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if not reused:
+                        raise
+                    connection.close()
+                    pooled = connection.pooled
+                    connection, reused = await pool.connect(connect_timeout), False
+                    connection.pooled = pooled
+        finally:
+            pool.release(connection, reusable)
+
+    @staticmethod
+    async def read_response(reader, method):
+        """Reads a response from the server.
+
+        Returns:
+            (AsyncRESTResponse, bool): the response and whether the
+            connection can carry another request
+        """
+        status_line = await reader.readuntil(b'\r\n')
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        status = int(status)
+        headers = HTTPHeaderDict()
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.add(name.strip(), value.strip())
+
+        connection = headers.get('Connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            data = b''
+        elif 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                if size == 0:
+                    # skip the trailers
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b''.join(chunks)
+        elif 'Content-Length' in headers:
+            data = await reader.readexactly(int(headers['Content-Length']))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return AsyncRESTResponse(status, reason, headers, data), keep_alive
+
+    async def GET(self, url, headers=None, query_params=None, _preload_content=True,
+                  _request_timeout=None):
+        return await self.request("GET", url,
+                                  headers=headers,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  query_params=query_params)
+
+    async def HEAD(self, url, headers=None, query_params=None, _preload_content=True,
+                   _request_timeout=None):
+        return await self.request("HEAD", url,
+                                  headers=headers,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  query_params=query_params)
+
+    async def OPTIONS(self, url, headers=None, query_params=None, post_params=None,
+                      body=None, _preload_content=True, _request_timeout=None):
+        return await self.request("OPTIONS", url,
+                                  headers=headers,
+                                  query_params=query_params,
+                                  post_params=post_params,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  body=body)
+
+    async def DELETE(self, url, headers=None, query_params=None, body=None,
+                     _preload_content=True, _request_timeout=None):
+        return await self.request("DELETE", url,
+                                  headers=headers,
+                                  query_params=query_params,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  body=body)
+
+    async def POST(self, url, headers=None, query_params=None, post_params=None,
+                   body=None, _preload_content=True, _request_timeout=None):
+        return await self.request("POST", url,
+                                  headers=headers,
+                                  query_params=query_params,
+                                  post_params=post_params,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  body=body)
+
+    async def PUT(self, url, headers=None, query_params=None, post_params=None,
+                  body=None, _preload_content=True, _request_timeout=None):
+        return await self.request("PUT", url,
+                                  headers=headers,
+                                  query_params=query_params,
+                                  post_params=post_params,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  body=body)
+
+    async def PATCH(self, url, headers=None, query_params=None, post_params=None,
+                    body=None, _preload_content=True, _request_timeout=None):
+        return await self.request("PATCH", url,
+                                  headers=headers,
+                                  query_params=query_params,
+                                  post_params=post_params,
+                                  _preload_content=_preload_content,
+                                  _request_timeout=_request_timeout,
+                                  body=body)
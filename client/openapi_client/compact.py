@@ -0,0 +1,138 @@
+"""
+    Chat
+
+    Compact read-only representation of the response models.
+"""
+
+
+from openapi_client.model_utils import OpenApiModel
+
+
+class CompactModel(object):
+    """Base of the compact models, a read-only record backed by __slots__.
+
+    A compact model has the attributes of its generated model, without the
+    per-instance bookkeeping (_data_store, _path_to_item, _configuration,
+    ...), so it takes a fraction of the memory. Use to_model() to get the
+    generated model back, e.g. to send it to the server.
+    """
+
+    __slots__ = ()
+
+    # the generated model class this class is the compact form of
+    model_class = None
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            object.__setattr__(self, name, value)
+        for name, value in kwargs.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __getitem__(self, name):
+        """get the value of an attribute using square-bracket notation: `instance[attr]`"""
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def get(self, name, default=None):
+        """returns the value of an attribute or the default value"""
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        """Returns the attributes that are set as a dict"""
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+    def to_model(self):
+        """Returns the equivalent instance of the generated model"""
+        return self.model_class(**self.to_dict())
+
+    def __iter__(self):
+        return iter(self.to_dict().items())
+
+    def __eq__(self, other):
+        if isinstance(other, CompactModel):
+            return type(other) is type(self) and other.to_dict() == self.to_dict()
+        if isinstance(other, OpenApiModel):
+            return isinstance(other, self.model_class) and other.to_dict() == self.to_dict()
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash((type(self), tuple(self.to_dict().items())))
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (name, value) for name, value in self.to_dict().items()))
+
+    def __reduce__(self):
+        return compact_instance, (self.model_class, self.to_dict())
+
+
+# generated model class -> its compact class
+_compact_classes = {}
+
+
+def compact_class(model_class):
+    """Returns the compact class of a generated model, creating it on first use.
+
+    Args:
+        model_class (type): a generated model class
+
+    Returns:
+        type: subclass of CompactModel named Compact<Model> with a slot per
+        attribute, in the order of openapi_types
+    """
+    try:
+        return _compact_classes[model_class]
+    except KeyError:
+        pass
+    cls = type('Compact' + model_class.__name__, (CompactModel,), {
+        '__slots__': tuple(model_class.openapi_types),
+        '__module__': __name__,
+        'model_class': model_class,
+    })
+    _compact_classes[model_class] = cls
+    return cls
+
+
+def compact_instance(model_class, values):
+    """Builds the compact form of a model from its attribute values.
+
+    Args:
+        model_class (type): a generated model class
+        values (dict): attribute name -> value
+
+    Returns:
+        CompactModel
+    """
+    return compact_class(model_class)(**values)
+
+
+def to_compact(data):
+    """Turns deserialized models, possibly inside lists and dicts, into
+    their compact form.
+
+    Args:
+        data: a model, a list or dict of models or any other value
+
+    Returns:
+        the data with CompactModel instances in place of the models
+    """
+    if isinstance(data, OpenApiModel):
+        return compact_instance(type(data), {name: to_compact(data[name]) for name in data.openapi_types
+                                             if name in data})
+    if isinstance(data, list):
+        return [to_compact(item) for item in data]
+    if isinstance(data, dict):
+        return {key: to_compact(value) for key, value in data.items()}
+    return data
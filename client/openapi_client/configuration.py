@@ -174,6 +174,30 @@ class Configuration(object):
            not the best value when you are making a lot of possibly parallel
            requests to the same host, which is often the case here.
            cpu_count * 5 is used as default value to increase performance.
+           Also caps the connections of the asyncio transport.
+        """
+        self.connection_pools = 4
+        """Number of servers whose connection pools are kept (urllib3's
+           num_pools), the least recently used one is closed beyond that
+        """
+        self.connection_pool_block = False
+        """When every connection to the server is busy, wait for one to be
+           released (True) instead of opening an extra connection that is
+           closed after a single request (False, urllib3's default). A
+           blocking pool should be at least as large as the number of
+           requests sent at once (pool_threads, or concurrent coroutines):
+           a request waiting for a connection that is only released by a
+           later request of the same caller never gets one
+        """
+        self.connection_pool_timeout = 30
+        """Seconds to wait for a free connection when connection_pool_block
+           is set, then the request fails with an ApiException (status 0)
+           instead of waiting forever; None waits as long as needed and 0
+           fails at once
+        """
+        self.pool_threads = 1
+        """Number of threads of ApiClient.pool running the requests made
+           with async_req=True
         """
 
         self.proxy = None
@@ -194,6 +218,19 @@ class Configuration(object):
         # Options to pass down to the underlying urllib3 socket
         self.socket_options = None
 
+        self.fast_decode = True
+        """Deserialize models with decoders compiled once per model class
+           (see fast_decode.py) instead of validate_and_convert_types
+        """
+        self.fast_decode_check_types = False
+        """Make the compiled decoders verify the type of every value
+           instead of trusting the server
+        """
+        self.etag_cache_size = 256
+        """Number of GET responses kept to be revalidated with If-None-Match,
+           0 disables conditional requests
+        """
+
     def __deepcopy__(self, memo):
         cls = self.__class__
         result = cls.__new__(cls)
@@ -366,6 +403,13 @@ class Configuration(object):
         :return: The Auth Settings information dict.
         """
         auth = {}
+        if self.access_token is not None:
+            auth['HTTPBearer'] = {
+                'type': 'bearer',
+                'in': 'header',
+                'key': 'Authorization',
+                'value': 'Bearer ' + self.access_token
+            }
         return auth
 
     def to_debug_report(self):
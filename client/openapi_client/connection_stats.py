@@ -0,0 +1,103 @@
+"""
+    Chat
+
+    Counters telling how well the connections to the server are reused.
+"""
+
+
+import threading
+
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+
+
+class ConnectionStats(object):
+    """Counts the connections used by the requests of a REST client.
+
+    Every request either reuses a kept-alive connection or pays for a new
+    one (TCP and TLS handshakes); a low share of reused connections means
+    that the pool is too small for the bursts of the client or that the
+    server does not keep connections alive.
+
+    Attributes:
+        new (int): requests sent on a newly opened connection
+        reused (int): requests sent on a kept-alive connection
+        exhausted (int): requests that failed because every connection was
+            busy for connection_pool_timeout seconds
+        discarded (int): connections closed after a single request because
+            the pool was full (connection_pool_block disabled)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.new = 0
+        self.reused = 0
+        self.exhausted = 0
+        self.discarded = 0
+
+    def count(self, name):
+        """Increments a counter, safe to call from several threads.
+
+        Args:
+            name (str): "new", "reused", "exhausted" or "discarded"
+        """
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def reset(self):
+        """Sets every counter back to zero."""
+        with self.lock:
+            self.new = self.reused = self.exhausted = self.discarded = 0
+
+    def summary(self):
+        """Returns the counters.
+
+        Returns:
+            dict: the counters, the number of requests and the share of
+            them sent on a kept-alive connection
+        """
+        with self.lock:
+            requests = self.new + self.reused
+            return {
+                'requests': requests,
+                'new': self.new,
+                'reused': self.reused,
+                'reuse_ratio': self.reused / requests if requests else 0.0,
+                'exhausted': self.exhausted,
+                'discarded': self.discarded,
+            }
+
+
+class CountingPoolMixin(object):
+    """Feeds the ConnectionStats of a RESTClientObject from a urllib3 pool.
+
+    A connection handed out without a socket is opened for the request,
+    either because it is new or because the server dropped it while it
+    was idle in the pool.
+    """
+
+    def __init__(self, *args, connection_stats=None, **kwargs):
+        super(CountingPoolMixin, self).__init__(*args, **kwargs)
+        self.connection_stats = connection_stats
+
+    def _get_conn(self, timeout=None):
+        try:
+            conn = super(CountingPoolMixin, self)._get_conn(timeout)
+        except EmptyPoolError:
+            self.connection_stats.count('exhausted')
+            raise
+        self.connection_stats.count('new' if getattr(conn, 'sock', None) is None else 'reused')
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None and self.pool is not None and self.pool.full():
+            self.connection_stats.count('discarded')
+        super(CountingPoolMixin, self)._put_conn(conn)
+
+
+class CountingHTTPConnectionPool(CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(CountingPoolMixin, HTTPSConnectionPool):
+    pass
@@ -0,0 +1,112 @@
+"""
+    Chat
+
+    Conditional GET support: bodies cached by ETag and revalidated with If-None-Match.
+"""
+
+
+from collections import OrderedDict
+
+from urllib3._collections import HTTPHeaderDict
+
+
+class CachedResponse(object):
+    """Stands in for a RESTResponse when the server answers 304 Not Modified.
+
+    Args:
+        status (int): status of the cached response
+        reason (str): reason phrase of the cached response
+        data (bytes): undecoded body of the cached response
+        headers (HTTPHeaderDict): headers of the cached response
+    """
+
+    def __init__(self, status, reason, data, headers):
+        self.status = status
+        self.reason = reason
+        self.data = data
+        self.headers = headers
+
+    def getheaders(self):
+        """Returns a dictionary of the response headers."""
+        return self.headers
+
+    def getheader(self, name, default=None):
+        """Returns a given response header."""
+        return self.headers.get(name, default)
+
+
+class ETagCache(object):
+    """Least recently used GET responses that carried an ETag header.
+
+    Args:
+        max_entries (int): maximum number of cached responses,
+            0 disables the cache
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url, query_params):
+        """Builds the cache key of a request.
+
+        Args:
+            url (str): full url of the request
+            query_params (list): (name, value) pairs of the query string
+
+        Returns:
+            tuple: hashable key
+        """
+        return url, tuple((name, str(value)) for name, value in (query_params or ()))
+
+    def etag(self, key):
+        """Returns the ETag to send in If-None-Match, or None."""
+        entry = self.entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def store(self, key, response):
+        """Remembers a fresh response if the server tagged it.
+
+        Must be called before the body is decoded.
+
+        Args:
+            key (tuple): key built by ETagCache.key
+            response (RESTResponse): 2xx response of a GET request
+        """
+        if self.max_entries <= 0:
+            return
+        etag = response.getheader('ETag')
+        if etag is None:
+            self.entries.pop(key, None)
+            return
+        self.entries[key] = (etag, response.status, response.reason, response.data,
+                             HTTPHeaderDict(response.getheaders()))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def revalidated(self, key):
+        """Returns the cached response after the server answered 304.
+
+        Args:
+            key (tuple): key built by ETagCache.key
+
+        Returns:
+            CachedResponse: a fresh copy of the cached response, or None
+                if it has been evicted meanwhile
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        _, status, reason, data, headers = entry
+        return CachedResponse(status, reason, data, HTTPHeaderDict(headers))
+
+    def clear(self):
+        """Forgets all cached responses."""
+        self.entries.clear()
@@ -0,0 +1,106 @@
+"""
+    Chat
+
+    Typed events pushed by the server over the /ws/{client_id} channel.
+"""
+
+
+import json
+
+from openapi_client import fast_decode
+from openapi_client.compact import to_compact
+from openapi_client.configuration import Configuration
+from openapi_client.model_utils import validate_and_convert_types
+from openapi_client.model.message import Message
+from openapi_client.model.user import User
+
+
+MESSAGE = "message"
+USER_ONLINE = "user_online"
+USER_OFFLINE = "user_offline"
+USER_BANNED = "user_banned"
+USER_UNBANNED = "user_unbanned"
+
+# presence deltas, each carrying the current state of a single user
+PRESENCE_EVENTS = (USER_ONLINE, USER_OFFLINE, USER_BANNED, USER_UNBANNED)
+
+# the payload type of every typed event, used to deserialize its data
+EVENT_TYPES = {
+    MESSAGE: (Message,),
+    USER_ONLINE: (User,),
+    USER_OFFLINE: (User,),
+    USER_BANNED: (User,),
+    USER_UNBANNED: (User,),
+}
+
+
+class Event(object):
+    """A single frame received from the websocket channel.
+
+    Args:
+        name (str): the event name, or the raw text of a bare control frame
+            such as "offline", "kick" or "ban"
+        data: the deserialized payload of a typed event, None for control
+            frames
+    """
+
+    def __init__(self, name, data=None):
+        self.name = name
+        self.data = data
+
+    def __repr__(self):
+        return "Event(%r, %r)" % (self.name, self.data)
+
+
+def parse_event(frame, configuration=None, compact=False):
+    """Turns a websocket frame into an Event.
+
+    JSON frames of the form {"event": ..., "data": ...} are typed events and
+    their data is deserialized into the matching model, e.g. a Message for
+    "message" events and a User for presence events such as "user_online".
+    Any other frame is a bare control frame.
+
+    Args:
+        frame (str): the text received from the websocket
+        configuration (Configuration): used when converting the payload,
+            defaults to Configuration.get_default_copy()
+        compact (bool): whether the payload is returned in the read-only
+            compact form of its model (see compact.py)
+
+    Returns:
+        Event
+    """
+    try:
+        received = json.loads(frame)
+    except ValueError:
+        return Event(frame)
+    if not isinstance(received, dict) or 'event' not in received:
+        return Event(frame)
+
+    name = received['event']
+    data = received.get('data')
+    if name in EVENT_TYPES:
+        configuration = configuration or Configuration.get_default_copy()
+        decoded = fast_decode.UNSUPPORTED
+        if configuration.fast_decode:
+            decoded = fast_decode.deserialize(
+                data,
+                EVENT_TYPES[name],
+                ['received_data', name],
+                configuration,
+                check_types=configuration.fast_decode_check_types,
+                compact=compact
+            )
+        if decoded is fast_decode.UNSUPPORTED:
+            decoded = validate_and_convert_types(
+                data,
+                EVENT_TYPES[name],
+                ['received_data', name],
+                True,
+                True,
+                configuration=configuration
+            )
+            if compact:
+                decoded = to_compact(decoded)
+        data = decoded
+    return Event(name, data)
@@ -0,0 +1,195 @@
+"""
+    Chat
+
+    Compiled decoders turning parsed JSON straight into model instances.
+"""
+
+
+from openapi_client.compact import compact_class, to_compact
+from openapi_client.model_utils import (
+    ModelNormal,
+    datetime,
+    validate_and_convert_types,
+)
+
+
+# returned by deserialize when the response type has no compiled decoder
+UNSUPPORTED = object()
+
+# field types a compiled decoder copies or converts itself
+PRIMITIVE_TYPES = (str, int, bool, float)
+
+# (model class, check_types, compact) -> compiled decoder, None if the model needs the full path
+_decoders = {}
+
+
+def parse_datetime(value):
+    """Parses an ISO 8601 datetime sent by the server.
+
+    Args:
+        value: the JSON value of a datetime field
+
+    Returns:
+        datetime, or None if the value has to go through the full path
+        (which raises the proper error)
+    """
+    if type(value) is not str or len(value) <= 10:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _supported(model_class):
+    """Tells whether the decoder of a model can skip the generic machinery.
+
+    Args:
+        model_class (type): a generated model class
+
+    Returns:
+        bool
+    """
+    return (
+        issubclass(model_class, ModelNormal) and
+        model_class.discriminator is None and
+        not model_class._composed_schemas and
+        not model_class.allowed_values and
+        not model_class.validations and
+        set(model_class.attribute_map) == set(model_class.openapi_types) and
+        all(len(types) == 1 and (types[0] in PRIMITIVE_TYPES or types[0] is datetime)
+            for types in model_class.openapi_types.values())
+    )
+
+
+def _compile(model_class, check_types, compact=False):
+    """Generates the decoder of a model.
+
+    The decoder accepts the dict of a single object carrying exactly the
+    properties of the model, converts datetimes and fills the instance
+    without going through __setattr__. Any other input is handed to
+    validate_and_convert_types, so errors are reported as before.
+
+    Args:
+        model_class (type): a generated model class
+        check_types (bool): whether to verify the type of every value
+        compact (bool): whether to build the compact form of the model
+
+    Returns:
+        function(data, path_to_item, configuration) -> model instance
+    """
+    name = model_class.__name__
+    lines = [
+        "def decode_%s(data, path_to_item, configuration):" % name,
+        "    if type(data) is not dict or data.keys() != keys:",
+        "        return fallback(data, path_to_item, configuration)",
+    ]
+    fields = {}
+    for index, (var_name, json_name) in enumerate(sorted(model_class.attribute_map.items())):
+        klass = model_class.openapi_types[var_name][0]
+        value = "v%d" % index
+        lines.append("    %s = data[%r]" % (value, json_name))
+        if klass is datetime:
+            lines.append("    %s = parse_datetime(%s)" % (value, value))
+            lines.append("    if %s is None:" % value)
+            lines.append("        return fallback(data, path_to_item, configuration)")
+        elif check_types:
+            lines.append("    if type(%s) is not %s:" % (value, klass.__name__))
+            lines.append("        return fallback(data, path_to_item, configuration)")
+        fields[var_name] = value
+    if compact:
+        arguments = ", ".join(fields[var_name] for var_name in model_class.openapi_types)
+        lines.append("    return compact_cls(%s)" % arguments)
+    else:
+        lines += [
+            "    instance = new(cls)",
+            "    instance.__dict__.update(",
+            "        _data_store={%s}," % ", ".join("%r: %s" % item for item in fields.items()),
+            "        _check_type=True,",
+            "        _spec_property_naming=True,",
+            "        _path_to_item=path_to_item,",
+            "        _configuration=configuration,",
+            "        _visited_composed_classes=(cls,),",
+            "    )",
+            "    return instance",
+        ]
+
+    def fallback(data, path_to_item, configuration):
+        instance = validate_and_convert_types(data, (model_class,), path_to_item, True, True,
+                                              configuration=configuration)
+        return to_compact(instance) if compact else instance
+
+    namespace = {
+        'cls': model_class,
+        'keys': frozenset(model_class.attribute_map.values()),
+        'compact_cls': compact_class(model_class) if compact else None,
+        'new': object.__new__,
+        'parse_datetime': parse_datetime,
+        'fallback': fallback,
+    }
+    exec(compile("\n".join(lines), "<decode_%s>" % name, "exec"), namespace)
+    return namespace["decode_%s" % name]
+
+
+def get_decoder(model_class, check_types=False, compact=False):
+    """Returns the compiled decoder of a model, generating it on first use.
+
+    Args:
+        model_class (type): a generated model class
+        check_types (bool): whether the decoder verifies the type of
+            every value instead of trusting the server
+        compact (bool): whether the decoder builds the compact form
+            of the model (see compact.py)
+
+    Returns:
+        function(data, path_to_item, configuration), or None if the
+        model needs validate_and_convert_types
+    """
+    key = (model_class, check_types, compact)
+    try:
+        return _decoders[key]
+    except KeyError:
+        pass
+    decoder = _compile(model_class, check_types, compact) if _supported(model_class) else None
+    _decoders[key] = decoder
+    return decoder
+
+
+def deserialize(received_data, response_type, path_to_item, configuration, check_types=False, compact=False):
+    """Deserializes a model or a list of models with a compiled decoder.
+
+    Args:
+        received_data: the parsed JSON of the response
+        response_type (tuple): the response type of the endpoint,
+            e.g. (Message,) or ([Message],)
+        path_to_item (list): path of the data, e.g. ['received_data']
+        configuration (Configuration): the configuration of the client
+        check_types (bool): whether to verify the type of every value
+        compact (bool): whether to build the compact form of the models
+
+    Returns:
+        the deserialized data, or UNSUPPORTED if the response type needs
+        validate_and_convert_types
+    """
+    if len(response_type) != 1:
+        return UNSUPPORTED
+    required = response_type[0]
+    if isinstance(required, list):
+        if len(required) != 1 or not isinstance(required[0], type) or type(received_data) is not list:
+            return UNSUPPORTED
+        decoder = get_decoder(required[0], check_types, compact)
+        if decoder is None:
+            return UNSUPPORTED
+        return [decoder(item, path_to_item + [index], configuration)
+                for index, item in enumerate(received_data)]
+    if not isinstance(required, type) or not issubclass(required, ModelNormal):
+        return UNSUPPORTED
+    decoder = get_decoder(required, check_types, compact)
+    if decoder is None:
+        return UNSUPPORTED
+    return decoder(received_data, path_to_item, configuration)
+
+
+def clear():
+    """Forgets the compiled decoders, e.g. after models have been patched."""
+    _decoders.clear()
@@ -9,6 +9,7 @@
 
 
 from datetime import date, datetime  # noqa: F401
+import functools
 import inspect
 import io
 import os
@@ -47,8 +48,88 @@ class cached_property(object):
             return result
 
 
+class TypeResolutionCache(object):
+    """Results of the type resolution helpers, keyed by the helper and its
+    (hashable-normalized) arguments.
+
+    Type specs only depend on the generated classes, so the results stay
+    valid for the life of the process. They are shared between callers and
+    must not be mutated.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the number of entries, hits and misses."""
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def reset(self):
+        """Forgets all results and zeroes the counters, e.g. between tests."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+type_resolution_cache = TypeResolutionCache()
+
+# tags of the containers in normalized type specs, never part of a spec itself
+_LIST_SPEC, _TUPLE_SPEC, _DICT_SPEC = object(), object(), object()
+
+
+def hashable_type_spec(spec):
+    """Turns a type spec into a hashable key.
+
+    Lists, tuples and dicts (e.g. ([Message],) or ({str: (int,)},)) become
+    tuples tagged with their container, classes and flags stay as they are.
+    """
+    if isinstance(spec, list):
+        return (_LIST_SPEC,) + tuple(hashable_type_spec(item) for item in spec)
+    if isinstance(spec, tuple):
+        return (_TUPLE_SPEC,) + tuple(hashable_type_spec(item) for item in spec)
+    if isinstance(spec, dict):
+        return (_DICT_SPEC,) + tuple((key, hashable_type_spec(value)) for key, value in spec.items())
+    return spec
+
+
+def cached_type_resolution(fn):
+    """Memoizes a type resolution helper in type_resolution_cache."""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        cache = type_resolution_cache
+        key = (fn,) + args
+        try:
+            result = cache.entries[key]
+        except TypeError:
+            # the spec holds lists or dicts
+            key = (fn,) + tuple(hashable_type_spec(arg) for arg in args)
+            try:
+                result = cache.entries[key]
+            except TypeError:
+                # e.g. dict views of discriminator classes, not worth caching
+                return fn(*args)
+            except KeyError:
+                cache.misses += 1
+                result = cache.entries[key] = fn(*args)
+                return result
+        except KeyError:
+            cache.misses += 1
+            result = cache.entries[key] = fn(*args)
+            return result
+        cache.hits += 1
+        return result
+    return wrapper
+
+
 PRIMITIVE_TYPES = (list, float, int, bool, datetime, date, str, file_type)
 
+@cached_type_resolution
 def allows_single_value_input(cls):
     """
     This function returns True if the input composed schema model or any
@@ -60,7 +141,6 @@ def allows_single_value_input(cls):
       - StringEnum
       - ArrayModel
       - null
-    TODO: lru_cache this
     """
     if (
         issubclass(cls, ModelSimple) or
@@ -73,11 +153,11 @@ def allows_single_value_input(cls):
         return any(allows_single_value_input(c) for c in cls._composed_schemas['oneOf'])
     return False
 
+@cached_type_resolution
 def composed_model_input_classes(cls):
     """
     This function returns a list of the possible models that can be accepted as
     inputs.
-    TODO: lru_cache this
     """
     if issubclass(cls, ModelSimple) or cls in PRIMITIVE_TYPES:
         return [cls]
@@ -617,6 +697,21 @@ COERCIBLE_TYPE_PAIRS = {
 }
 
 
+# simple classes of the exact types found in JSON data, checked before the isinstance chain
+SIMPLE_CLASS_BY_TYPE = {
+    str: str,
+    int: int,
+    float: float,
+    bool: bool,
+    list: list,
+    dict: dict,
+    tuple: tuple,
+    none_type: none_type,
+    datetime: datetime,
+    date: date,
+}
+
+
 def get_simple_class(input_value):
     """Returns an input_value's simple class that we will use for type checking
     Python2:
@@ -629,6 +724,9 @@ def get_simple_class(input_value):
         input_value (class/class_instance): the item for which we will return
                                             the simple class
     """
+    simple_class = SIMPLE_CLASS_BY_TYPE.get(type(input_value))
+    if simple_class is not None:
+        return simple_class
     if isinstance(input_value, type):
         # input_value is a class
         return input_value
@@ -867,6 +965,7 @@ def check_validations(
         raise ApiValueError(err_msg)
 
 
+@cached_type_resolution
 def order_response_types(required_types):
     """Returns the required types sorted in coercion order
 
@@ -950,10 +1049,10 @@ def remove_uncoercible(required_types_classes, current_item, spec_property_namin
             results_classes.append(required_type_class)
     return results_classes
 
+@cached_type_resolution
 def get_discriminated_classes(cls):
     """
     Returns all the classes that a discriminator converts to
-    TODO: lru_cache this
     """
     possible_classes = []
     key = list(cls.discriminator.keys())[0]
@@ -967,8 +1066,8 @@ def get_discriminated_classes(cls):
     return possible_classes
 
 
+@cached_type_resolution
 def get_possible_classes(cls, from_server_context):
-    # TODO: lru_cache this
     possible_classes = [cls]
     if from_server_context:
         return possible_classes
@@ -980,6 +1079,7 @@ def get_possible_classes(cls, from_server_context):
     return possible_classes
 
 
+@cached_type_resolution
 def get_required_type_classes(required_types_mixed, spec_property_naming):
     """Converts the tuple required_types into a tuple and a dict described
     below
@@ -1077,6 +1177,15 @@ def deserialize_primitive(data, klass, path_to_item):
             if klass == datetime:
                 if len(data) < 8:
                     raise ValueError("This is not a datetime")
+                if len(data) > 10:
+                    # the server sends naive ISO 8601 datetimes, parsed much faster
+                    # by the standard library than by dateutil
+                    try:
+                        parsed_datetime = datetime.fromisoformat(data)
+                    except ValueError:
+                        parsed_datetime = None
+                    if parsed_datetime is not None and parsed_datetime.tzinfo is None:
+                        return parsed_datetime
                 # The string should be in iso8601 datetime format.
                 parsed_datetime = parse(data)
                 date_only = (
@@ -1323,6 +1432,7 @@ def is_type_nullable(input_type):
     return False
 
 
+@cached_type_resolution
 def is_valid_type(input_class_simple, valid_classes):
     """
     Args:
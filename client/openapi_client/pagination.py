@@ -0,0 +1,111 @@
+"""
+    Chat
+
+    Lazy iteration over the cursor-paginated list endpoints.
+"""
+
+
+# response header carrying the cursor of the next page, missing on the last page
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def iterate_pages(endpoint, *args, **kwargs):
+    """Calls a list endpoint page by page, following the X-Next-Cursor header.
+
+    A page is only requested once the previous one has been consumed.
+
+    >>> for page in iterate_pages(api.read_users_users_get, limit=50):
+    ...     print(len(page))
+
+    Args:
+        endpoint (Endpoint): a list endpoint of DefaultApi accepting `cursor`
+        *args: required arguments of the endpoint
+        **kwargs: keyword arguments of the endpoint, `cursor` may be used
+            to resume from a known position, `skip` only applies to the
+            first page
+
+    Yields:
+        list: the deserialized items of each page
+    """
+    cursor = kwargs.pop('cursor', None)
+    kwargs['_return_http_data_only'] = False
+    while True:
+        if cursor is not None:
+            kwargs['cursor'] = cursor
+        page, _, headers = endpoint(*args, **kwargs)
+        # the cursor already points past the skipped items
+        kwargs.pop('skip', None)
+        yield page
+        cursor = headers.get(NEXT_CURSOR_HEADER) if headers else None
+        if not cursor:
+            return
+
+
+def iterate_items(endpoint, *args, **kwargs):
+    """Calls a list endpoint page by page and yields the items one at a time.
+
+    >>> for message in iterate_items(api.read_all_messages_message_get):
+    ...     print(message.msg_content)
+
+    Args:
+        endpoint (Endpoint): a list endpoint of DefaultApi accepting `cursor`
+        *args: required arguments of the endpoint
+        **kwargs: keyword arguments of the endpoint
+
+    Yields:
+        the deserialized items of all pages
+    """
+    for page in iterate_pages(endpoint, *args, **kwargs):
+        for item in page:
+            yield item
+
+
+async def aiterate_pages(endpoint, *args, **kwargs):
+    """Asynchronous iterate_pages, for the endpoints of AsyncDefaultApi.
+
+    >>> async for page in aiterate_pages(api.read_users_users_get, limit=50):
+    ...     print(len(page))
+
+    Args:
+        endpoint (Endpoint): a list endpoint of AsyncDefaultApi accepting
+            `cursor`
+        *args: required arguments of the endpoint
+        **kwargs: keyword arguments of the endpoint, `cursor` may be used
+            to resume from a known position, `skip` only applies to the
+            first page
+
+    Yields:
+        list: the deserialized items of each page
+    """
+    cursor = kwargs.pop('cursor', None)
+    kwargs['_return_http_data_only'] = False
+    while True:
+        if cursor is not None:
+            kwargs['cursor'] = cursor
+        page, _, headers = await endpoint(*args, **kwargs)
+        # the cursor already points past the skipped items
+        kwargs.pop('skip', None)
+        yield page
+        cursor = headers.get(NEXT_CURSOR_HEADER) if headers else None
+        if not cursor:
+            return
+
+
+async def aiterate_items(endpoint, *args, **kwargs):
+    """Asynchronous iterate_items, for the endpoints of AsyncDefaultApi.
+
+    >>> async for message in aiterate_items(api.read_all_messages_message_get):
+    ...     print(message.msg_content)
+
+    Args:
+        endpoint (Endpoint): a list endpoint of AsyncDefaultApi accepting
+            `cursor`
+        *args: required arguments of the endpoint
+        **kwargs: keyword arguments of the endpoint
+
+    Yields:
+        the deserialized items of all pages
+    """
+    async for page in aiterate_pages(endpoint, *args, **kwargs):
+        for item in page:
+            yield item
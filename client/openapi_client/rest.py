@@ -8,6 +8,7 @@
 """
 
 
+import functools
 import io
 import json
 import logging
@@ -17,6 +18,7 @@ from urllib.parse import urlencode
 
 import urllib3
 
+from openapi_client.connection_stats import ConnectionStats, CountingHTTPConnectionPool, CountingHTTPSConnectionPool
 from openapi_client.exceptions import ApiException, UnauthorizedException, ForbiddenException, NotFoundException, ServiceException, ApiValueError
 
 
@@ -42,7 +44,7 @@ class RESTResponse(io.IOBase):
 
 class RESTClientObject(object):
 
-    def __init__(self, configuration, pools_size=4, maxsize=None):
+    def __init__(self, configuration, pools_size=None, maxsize=None):
         # urllib3.PoolManager will pass all kw parameters to connectionpool
         # https://github.com/shazow/urllib3/blob/f9409436f83aeb79fbaf090181cd81b784f1b8ce/urllib3/poolmanager.py#L75  # noqa: E501
         # https://github.com/shazow/urllib3/blob/f9409436f83aeb79fbaf090181cd81b784f1b8ce/urllib3/connectionpool.py#L680  # noqa: E501
@@ -71,6 +73,13 @@ class RESTClientObject(object):
             else:
                 maxsize = 4
 
+        if pools_size is None:
+            pools_size = configuration.connection_pools
+
+        # wait for a pooled connection instead of opening a throwaway one
+        addition_pool_args['block'] = configuration.connection_pool_block
+        self.pool_timeout = configuration.connection_pool_timeout
+
         # https pool manager
         if configuration.proxy:
             self.pool_manager = urllib3.ProxyManager(
@@ -95,6 +104,12 @@ class RESTClientObject(object):
                 **addition_pool_args
             )
 
+        self.connection_stats = ConnectionStats()
+        self.pool_manager.pool_classes_by_scheme = {
+            'http': functools.partial(CountingHTTPConnectionPool, connection_stats=self.connection_stats),
+            'https': functools.partial(CountingHTTPSConnectionPool, connection_stats=self.connection_stats),
+        }
+
     def request(self, method, url, query_params=None, headers=None,
                 body=None, post_params=None, _preload_content=True,
                 _request_timeout=None):
@@ -154,6 +169,7 @@ class RESTClientObject(object):
                         body=request_body,
                         preload_content=_preload_content,
                         timeout=timeout,
+                        pool_timeout=self.pool_timeout,
                         headers=headers)
                 elif headers['Content-Type'] == 'application/x-www-form-urlencoded':  # noqa: E501
                     r = self.pool_manager.request(
@@ -162,6 +178,7 @@ class RESTClientObject(object):
                         encode_multipart=False,
                         preload_content=_preload_content,
                         timeout=timeout,
+                        pool_timeout=self.pool_timeout,
                         headers=headers)
                 elif headers['Content-Type'] == 'multipart/form-data':
                     # must del headers['Content-Type'], or the correct
@@ -174,6 +191,7 @@ class RESTClientObject(object):
                         encode_multipart=True,
                         preload_content=_preload_content,
                         timeout=timeout,
+                        pool_timeout=self.pool_timeout,
                         headers=headers)
                 # Pass a `string` parameter directly in the body to support
                 # other content types than Json when `body` argument is
@@ -185,6 +203,7 @@ class RESTClientObject(object):
                         body=request_body,
                         preload_content=_preload_content,
                         timeout=timeout,
+                        pool_timeout=self.pool_timeout,
                         headers=headers)
                 else:
                     # Cannot generate the request from given parameters
@@ -198,8 +217,9 @@ class RESTClientObject(object):
                                               fields=query_params,
                                               preload_content=_preload_content,
                                               timeout=timeout,
+                                              pool_timeout=self.pool_timeout,
                                               headers=headers)
-        except urllib3.exceptions.SSLError as e:
+        except (urllib3.exceptions.SSLError, urllib3.exceptions.EmptyPoolError) as e:
             msg = "{0}\n{1}".format(type(e).__name__, str(e))
             raise ApiException(status=0, reason=msg)
 
@@ -0,0 +1,129 @@
+"""
+    Chat
+
+    Tests of the asyncio transport and AsyncDefaultApi against a local server.
+"""
+
+
+import asyncio
+import json
+import unittest
+
+from openapi_client.api.async_default_api import AsyncDefaultApi
+from openapi_client.async_api_client import AsyncApiClient
+from openapi_client.configuration import Configuration
+from openapi_client.exceptions import ApiTypeError, NotFoundException
+from openapi_client.model.user import User
+
+USERS = [{"login": "user%d" % i, "id": i, "is_active": True, "is_banned": False} for i in range(3)]
+
+
+class Server(object):
+    """minimal HTTP/1.1 server answering GET /users/ and GET /users/{id}"""
+
+    def __init__(self, chunked=False, close_after=None):
+        self.chunked = chunked
+        self.close_after = close_after
+        self.connections = 0
+        self.requests = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return 'http://127.0.0.1:%d' % self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        served = 0
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while await reader.readline() != b'\r\n':
+                    pass
+                path = request_line.split()[1].decode()
+                self.requests.append(path)
+                writer.write(self.response(path))
+                await writer.drain()
+                served += 1
+                if self.close_after is not None and served >= self.close_after:
+                    break
+        finally:
+            writer.close()
+
+    def response(self, path):
+        if path.split('?')[0] == '/users/':
+            status, body = '200 OK', json.dumps(USERS).encode()
+        elif path == '/users/1':
+            status, body = '200 OK', json.dumps(USERS[1]).encode()
+        else:
+            status, body = '404 Not Found', b'{"detail":"User not found"}'
+        head = 'HTTP/1.1 %s\r\nContent-Type: application/json\r\n' % status
+        if self.chunked:
+            middle = len(body) // 2
+            chunks = b''.join(b'%x\r\n%s\r\n' % (len(part), part) for part in (body[:middle], body[middle:]))
+            return (head + 'Transfer-Encoding: chunked\r\n\r\n').encode() + chunks + b'0\r\n\r\n'
+        return (head + 'Content-Length: %d\r\n\r\n' % len(body)).encode() + body
+
+
+class TestAsyncApi(unittest.IsolatedAsyncioTestCase):
+    """AsyncApiClient and AsyncDefaultApi unit tests"""
+
+    async def client(self, server, maxsize=4, block=False):
+        configuration = Configuration(host=await server.start())
+        configuration.connection_pool_maxsize = maxsize
+        configuration.connection_pool_block = block
+        api_client = AsyncApiClient(configuration)
+        self.addAsyncCleanup(server.stop)
+        self.addAsyncCleanup(api_client.close)
+        return AsyncDefaultApi(api_client)
+
+    async def testConcurrentCalls(self):
+        """Concurrent calls share the pooled keep-alive connections"""
+        server = Server()
+        api = await self.client(server, maxsize=2, block=True)
+        results = await asyncio.gather(*[api.read_user_users_user_id_get(1) for _ in range(20)])
+        self.assertTrue(all(isinstance(user, User) and user.login == 'user1' for user in results))
+        self.assertEqual(len(server.requests), 20)
+        self.assertLessEqual(server.connections, 2)
+
+    async def testChunked(self):
+        """Chunked responses are decoded"""
+        api = await self.client(Server(chunked=True))
+        users = await api.read_users_users_get()
+        self.assertEqual([user.id for user in users], [0, 1, 2])
+
+    async def testServerClosedConnection(self):
+        """A kept-alive connection closed by the server is replaced"""
+        server = Server(close_after=1)
+        api = await self.client(server, maxsize=1)
+        for _ in range(3):
+            self.assertEqual((await api.read_user_users_user_id_get(1)).id, 1)
+            await asyncio.sleep(0.01)
+        self.assertEqual(server.connections, 3)
+
+    async def testErrors(self):
+        """Error statuses raise the exceptions of the blocking client"""
+        api = await self.client(Server())
+        with self.assertRaises(NotFoundException) as context:
+            await api.read_user_users_user_id_get(5)
+        self.assertEqual(context.exception.body, '{"detail":"User not found"}')
+
+    async def testIteration(self):
+        """iter_* helpers are asynchronous iterators"""
+        api = await self.client(Server())
+        self.assertEqual([user.login async for user in api.iter_users()], ['user0', 'user1', 'user2'])
+
+    def testBlockingClient(self):
+        """AsyncDefaultApi refuses a blocking ApiClient"""
+        from openapi_client.api_client import ApiClient
+        with self.assertRaises(ApiTypeError):
+            AsyncDefaultApi(ApiClient())
+
+
+if __name__ == '__main__':
+    unittest.main()
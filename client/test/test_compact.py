@@ -0,0 +1,90 @@
+"""
+    Chat
+
+    Tests of the compact read-only representation of the models.
+"""
+
+
+import copy
+import json
+import pickle
+import unittest
+
+from openapi_client import fast_decode
+from openapi_client.api_client import ApiClient
+from openapi_client.compact import CompactModel, compact_class, to_compact
+from openapi_client.configuration import Configuration
+from openapi_client.events import MESSAGE, parse_event
+from openapi_client.model.message import Message
+from openapi_client.model.user import User
+
+MESSAGES = [
+    {"msg_content": "message %d" % i, "from_usr": 1, "id": i, "to_usr": 2,
+     "date": "2024-01-01T12:00:00.%06d" % i}
+    for i in range(3)
+]
+
+
+class Response(object):
+    """stand-in for the response of the REST client"""
+
+    def __init__(self, data):
+        self.data = data
+
+
+class TestCompact(unittest.TestCase):
+    """compact unit tests"""
+
+    def setUp(self):
+        self.configuration = Configuration()
+
+    def full(self):
+        return fast_decode.deserialize(copy.deepcopy(MESSAGES), ([Message],), ['received_data'], self.configuration)
+
+    def testDecoder(self):
+        """The compiled compact decoder keeps the attributes of the models"""
+        messages = fast_decode.deserialize(copy.deepcopy(MESSAGES), ([Message],), ['received_data'],
+                                           self.configuration, compact=True)
+        self.assertIsInstance(messages[0], compact_class(Message))
+        self.assertEqual(messages, self.full())
+        self.assertEqual(messages[2].msg_content, "message 2")
+        self.assertEqual(messages[2].date.microsecond, 2)
+
+    def testReadOnly(self):
+        """Compact models cannot be modified and have no __dict__"""
+        message = to_compact(self.full()[0])
+        with self.assertRaises(AttributeError):
+            message.id = 5
+        with self.assertRaises(AttributeError):
+            message.__dict__
+        with self.assertRaises(KeyError):
+            message['missing']
+
+    def testRoundTrip(self):
+        """to_model and pickling give back equal models"""
+        message = to_compact(self.full()[1])
+        self.assertEqual(message.to_model(), self.full()[1])
+        self.assertEqual(pickle.loads(pickle.dumps(message)), message)
+        self.assertEqual(hash(message), hash(to_compact(self.full()[1])))
+
+    def testApiClient(self):
+        """ApiClient.deserialize returns compact models when asked, also on the generic path"""
+        response = Response(json.dumps(MESSAGES))
+        for fast in (True, False):
+            self.configuration.fast_decode = fast
+            messages = ApiClient(self.configuration).deserialize(response, ([Message],), True, True)
+            self.assertTrue(all(isinstance(message, CompactModel) for message in messages))
+            self.assertEqual(messages, self.full())
+
+    def testEvent(self):
+        """Event payloads can be compact"""
+        user = {"login": "a", "id": 1, "is_active": True, "is_banned": False}
+        event = parse_event(json.dumps({"event": "user_online", "data": user}), self.configuration, compact=True)
+        self.assertIsInstance(event.data, compact_class(User))
+        self.assertEqual(event.data.login, "a")
+        event = parse_event(json.dumps({"event": MESSAGE, "data": MESSAGES[0]}), self.configuration)
+        self.assertIsInstance(event.data, Message)
+
+
+if __name__ == '__main__':
+    unittest.main()
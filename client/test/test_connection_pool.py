@@ -0,0 +1,126 @@
+"""
+    Chat
+
+    Tests of the pool settings and the connection counters of the REST clients.
+"""
+
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openapi_client.api.async_default_api import AsyncDefaultApi
+from openapi_client.api.default_api import DefaultApi
+from openapi_client.api_client import ApiClient
+from openapi_client.async_api_client import AsyncApiClient
+from openapi_client.configuration import Configuration
+from openapi_client.exceptions import ApiException
+
+USER = {"login": "user", "id": 1, "is_active": True, "is_banned": False}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """answers every GET with a user after `delay` seconds, keeping the connection alive"""
+
+    protocol_version = 'HTTP/1.1'
+    delay = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = json.dumps(USER).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+    """connection pool unit tests"""
+
+    def setUp(self):
+        Handler.delay = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.configuration = Configuration(host='http://127.0.0.1:%d' % self.server.server_address[1])
+        self.configuration.etag_cache_size = 0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def burst(self, api, calls):
+        results = [api.read_user_users_user_id_get(1, async_req=True) for _ in range(calls)]
+        return [result.get() for result in results]
+
+    def testKeepAlive(self):
+        """Sequential requests share one kept-alive connection"""
+        api_client = ApiClient(self.configuration)
+        api = DefaultApi(api_client)
+        for _ in range(5):
+            self.assertEqual(api.read_user_users_user_id_get(1).login, 'user')
+        summary = api_client.connection_stats.summary()
+        self.assertEqual((summary['requests'], summary['new'], summary['reused']), (5, 1, 4))
+
+    def testBlock(self):
+        """A blocking pool never opens more than maxsize connections"""
+        Handler.delay = 0.02
+        self.configuration.connection_pool_maxsize = 2
+        self.configuration.connection_pool_block = True
+        self.configuration.pool_threads = 8
+        with ApiClient(self.configuration) as api_client:
+            self.assertEqual(len(self.burst(DefaultApi(api_client), 16)), 16)
+            stats = api_client.connection_stats
+            self.assertLessEqual(stats.new, 2)
+            self.assertEqual(stats.discarded, 0)
+
+    def testOverflow(self):
+        """By default the pool does not block, the connections beyond maxsize are thrown away"""
+        Handler.delay = 0.05
+        self.configuration.connection_pool_maxsize = 1
+        self.configuration.pool_threads = 4
+        with ApiClient(self.configuration) as api_client:
+            self.burst(DefaultApi(api_client), 4)
+            stats = api_client.connection_stats
+            self.assertGreater(stats.new, 1)
+            self.assertGreater(stats.discarded, 0)
+
+    def testExhausted(self):
+        """A blocking pool fails once connection_pool_timeout is over"""
+        Handler.delay = 0.2
+        self.configuration.connection_pool_maxsize = 1
+        self.configuration.connection_pool_block = True
+        self.configuration.connection_pool_timeout = 0
+        self.configuration.pool_threads = 2
+        with ApiClient(self.configuration) as api_client:
+            with self.assertRaises(ApiException) as context:
+                self.burst(DefaultApi(api_client), 2)
+            self.assertEqual(context.exception.status, 0)
+            self.assertEqual(api_client.connection_stats.exhausted, 1)
+
+    def testAsync(self):
+        """The asyncio transport keeps the same counters"""
+        self.configuration.connection_pool_maxsize = 2
+        self.configuration.connection_pool_block = True
+
+        async def run():
+            async with AsyncApiClient(self.configuration) as api_client:
+                api = AsyncDefaultApi(api_client)
+                await asyncio.gather(*[api.read_user_users_user_id_get(1) for _ in range(10)])
+                return api_client.connection_stats.summary()
+
+        summary = asyncio.run(run())
+        self.assertEqual(summary['requests'], 10)
+        self.assertLessEqual(summary['new'], 2)
+        self.assertEqual(summary['discarded'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
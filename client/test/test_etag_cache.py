@@ -0,0 +1,74 @@
+"""
+    Chat
+
+    Tests of the ETag cache used for conditional GET requests.
+"""
+
+
+import unittest
+
+from urllib3._collections import HTTPHeaderDict
+
+from openapi_client.etag_cache import ETagCache
+
+
+class FakeResponse(object):
+
+    def __init__(self, data, etag=None):
+        self.status = 200
+        self.reason = 'OK'
+        self.data = data
+        self.headers = HTTPHeaderDict({'content-type': 'application/json'})
+        if etag is not None:
+            self.headers['ETag'] = etag
+
+    def getheaders(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+class TestETagCache(unittest.TestCase):
+    """ETagCache unit tests"""
+
+    def testRevalidated(self):
+        """A tagged response is replayed after 304"""
+        cache = ETagCache(2)
+        key = cache.key('http://chat/users/', [('skip', 0)])
+        cache.store(key, FakeResponse(b'[]', 'W/"a-1"'))
+        self.assertEqual(cache.etag(key), 'W/"a-1"')
+        cached = cache.revalidated(key)
+        self.assertEqual(cached.status, 200)
+        self.assertEqual(cached.data, b'[]')
+        self.assertEqual(cached.getheader('content-type'), 'application/json')
+        self.assertEqual(cache.hits, 1)
+
+    def testUntagged(self):
+        """A response without ETag replaces a stale entry"""
+        cache = ETagCache(2)
+        key = cache.key('http://chat/users/', [])
+        cache.store(key, FakeResponse(b'[]', 'W/"a-1"'))
+        cache.store(key, FakeResponse(b'[1]'))
+        self.assertIsNone(cache.etag(key))
+        self.assertIsNone(cache.revalidated(key))
+
+    def testEviction(self):
+        """The least recently used entry is dropped"""
+        cache = ETagCache(2)
+        keys = [cache.key('http://chat/users/%d' % i, []) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.store(key, FakeResponse(b'{}', 'W/"a-%d"' % i))
+        self.assertIsNone(cache.etag(keys[0]))
+        self.assertEqual(cache.etag(keys[2]), 'W/"a-2"')
+
+    def testDisabled(self):
+        """Nothing is kept when the cache size is 0"""
+        cache = ETagCache(0)
+        key = cache.key('http://chat/users/', [])
+        cache.store(key, FakeResponse(b'[]', 'W/"a-1"'))
+        self.assertIsNone(cache.etag(key))
+
+
+if __name__ == '__main__':
+    unittest.main()
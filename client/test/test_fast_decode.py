@@ -0,0 +1,64 @@
+"""
+    Chat
+
+    Tests of the compiled decoders of the models.
+"""
+
+
+import copy
+import unittest
+
+from openapi_client import fast_decode
+from openapi_client.configuration import Configuration
+from openapi_client.exceptions import ApiTypeError
+from openapi_client.model.message import Message
+from openapi_client.model.user import User
+from openapi_client.model_utils import validate_and_convert_types
+
+MESSAGES = [
+    {"msg_content": "message %d" % i, "from_usr": 1, "id": i, "to_usr": 2,
+     "date": "2024-01-01T12:00:00.%06d" % i}
+    for i in range(3)
+]
+
+
+class TestFastDecode(unittest.TestCase):
+    """fast_decode unit tests"""
+
+    def setUp(self):
+        self.configuration = Configuration()
+
+    def slow(self, data, response_type):
+        return validate_and_convert_types(copy.deepcopy(data), response_type, ['received_data'], True, True,
+                                          configuration=self.configuration)
+
+    def testList(self):
+        """A list of messages equals the output of validate_and_convert_types"""
+        messages = fast_decode.deserialize(copy.deepcopy(MESSAGES), ([Message],), ['received_data'],
+                                           self.configuration)
+        self.assertEqual(messages, self.slow(MESSAGES, ([Message],)))
+        self.assertEqual(messages[1]._path_to_item, ['received_data', 1])
+
+    def testSingle(self):
+        """A single model equals the output of validate_and_convert_types"""
+        user = {"login": "a", "id": 1, "is_active": True, "is_banned": False}
+        self.assertEqual(fast_decode.deserialize(dict(user), (User,), ['received_data'], self.configuration),
+                         self.slow(user, (User,)))
+
+    def testCheckTypes(self):
+        """Wrong types are only reported when checking is enabled"""
+        data = [dict(MESSAGES[0], id="1")]
+        self.assertEqual(fast_decode.deserialize(copy.deepcopy(data), ([Message],), ['received_data'],
+                                                 self.configuration)[0].id, "1")
+        with self.assertRaises(ApiTypeError):
+            fast_decode.deserialize(copy.deepcopy(data), ([Message],), ['received_data'], self.configuration,
+                                    check_types=True)
+
+    def testUnsupported(self):
+        """Other response types are left to validate_and_convert_types"""
+        self.assertIs(fast_decode.deserialize("ok", (str,), ['received_data'], self.configuration),
+                      fast_decode.UNSUPPORTED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+    Chat
+
+    Tests of the iteration over cursor-paginated list endpoints.
+"""
+
+
+import asyncio
+import unittest
+
+from openapi_client.pagination import (aiterate_items, aiterate_pages,
+                                       iterate_items, iterate_pages)
+
+
+class FakeEndpoint(object):
+    """list endpoint paginating like the server: skip applies after the cursor"""
+
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def __call__(self, skip=0, limit=100, cursor=None, _return_http_data_only=True):
+        self.calls.append({'skip': skip, 'limit': limit, 'cursor': cursor})
+        start = 0 if cursor is None else self.items.index(int(cursor)) + 1
+        page = self.items[start + skip:start + skip + limit]
+        headers = {}
+        if len(page) == limit:
+            headers['X-Next-Cursor'] = str(page[-1])
+        return page, 200, headers
+
+
+class AsyncFakeEndpoint(FakeEndpoint):
+
+    async def __call__(self, **kwargs):
+        await asyncio.sleep(0)
+        return super(AsyncFakeEndpoint, self).__call__(**kwargs)
+
+
+class TestPagination(unittest.TestCase):
+    """iterate_pages and iterate_items unit tests"""
+
+    def testPages(self):
+        """Every page is requested once, following the cursor"""
+        endpoint = FakeEndpoint(list(range(10)))
+        self.assertEqual(list(iterate_pages(endpoint, limit=4)), [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual([call['cursor'] for call in endpoint.calls], [None, '3', '7'])
+
+    def testSkip(self):
+        """skip is only sent with the first request"""
+        endpoint = FakeEndpoint(list(range(10)))
+        self.assertEqual(list(iterate_items(endpoint, skip=3, limit=2)), [3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual([call['skip'] for call in endpoint.calls], [3, 0, 0, 0])
+
+    def testCursor(self):
+        """A known cursor resumes the iteration, with skip applied after it"""
+        endpoint = FakeEndpoint(list(range(10)))
+        self.assertEqual(list(iterate_items(endpoint, cursor='4', skip=1, limit=2)), [6, 7, 8, 9])
+        self.assertEqual([call['cursor'] for call in endpoint.calls], ['4', '7', '9'])
+        self.assertEqual([call['skip'] for call in endpoint.calls], [1, 0, 0])
+
+
+class TestAsyncPagination(unittest.TestCase):
+    """aiterate_pages and aiterate_items unit tests"""
+
+    def collect(self, iterator):
+        async def run():
+            return [item async for item in iterator]
+        return asyncio.run(run())
+
+    def testPages(self):
+        """Every page is requested once, following the cursor"""
+        endpoint = AsyncFakeEndpoint(list(range(10)))
+        self.assertEqual(self.collect(aiterate_pages(endpoint, limit=4)), [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual([call['cursor'] for call in endpoint.calls], [None, '3', '7'])
+
+    def testSkip(self):
+        """skip is only sent with the first request"""
+        endpoint = AsyncFakeEndpoint(list(range(10)))
+        self.assertEqual(self.collect(aiterate_items(endpoint, skip=3, limit=2)), [3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual([call['skip'] for call in endpoint.calls], [3, 0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+    Chat
+
+    Tests of the memoized type resolution helpers of model_utils.
+"""
+
+
+import unittest
+from datetime import datetime
+
+from openapi_client import model_utils
+from openapi_client.model.message import Message
+from openapi_client.model_utils import type_resolution_cache
+
+
+class TestTypeResolutionCache(unittest.TestCase):
+    """TypeResolutionCache unit tests"""
+
+    def setUp(self):
+        type_resolution_cache.reset()
+
+    def tearDown(self):
+        type_resolution_cache.reset()
+
+    def testHitsAndMisses(self):
+        """A spec holding lists is resolved once"""
+        first = model_utils.get_required_type_classes(([Message],), True)
+        second = model_utils.get_required_type_classes(([Message],), True)
+        self.assertIs(first, second)
+        self.assertEqual(first[0], (list,))
+        stats = type_resolution_cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertGreaterEqual(stats['misses'], 1)
+
+    def testReset(self):
+        """reset() forgets the results and the counters"""
+        model_utils.get_required_type_classes((int,), True)
+        type_resolution_cache.reset()
+        self.assertEqual(type_resolution_cache.stats(), {'entries': 0, 'hits': 0, 'misses': 0})
+
+    def testSpecsDoNotCollide(self):
+        """A list spec and a tuple of the same classes have different keys"""
+        self.assertNotEqual(model_utils.hashable_type_spec([int]), model_utils.hashable_type_spec((int,)))
+        self.assertEqual(model_utils.get_required_type_classes(([int],), True)[0], (list,))
+        self.assertEqual(model_utils.get_required_type_classes(((int,),), True)[0], (tuple,))
+
+    def testSimpleClass(self):
+        """bool stays distinct from int"""
+        self.assertIs(model_utils.get_simple_class(True), bool)
+        self.assertIs(model_utils.get_simple_class(1), int)
+        self.assertIs(model_utils.get_simple_class(Message), Message)
+
+    def testDatetime(self):
+        """Naive and zoned datetimes are parsed"""
+        self.assertEqual(model_utils.deserialize_primitive('2024-01-01T12:00:00.5', datetime, []),
+                         datetime(2024, 1, 1, 12, 0, 0, 500000))
+        self.assertIsNotNone(model_utils.deserialize_primitive('2024-01-01T12:00:00+02:00', datetime, []).tzinfo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,81 +1,157 @@
-from typing import List
+import os
+from typing import List, Optional
 
-from fastapi import Depends, FastAPI, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status, WebSocket, WebSocketDisconnect
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from datetime import datetime
 
-from server import crud, models, schemas
+from server import crud, events, migrations, models, pagination, schemas
+from server.bus import create_bus
+from server.cache import user_cache
+from server.connections import ConnectionManager, COALESCE_WINDOW, DROP_OLDEST
 from server.database import SessionLocal, engine
-
-models.Base.metadata.create_all(bind=engine)
+from server.history import message_history
+from server.ingest import MessageBatcher
+from server.passwords import password_hasher
+from server.presence import PresenceRegistry, SNAPSHOT_INTERVAL
+from server.sessions import bearer, session_tokens, SESSION_TOKEN_HEADER
+from server.versions import versions
 
 app = FastAPI(title="Chat")
 
+bus = create_bus(os.getenv("CHAT_BUS_URL"))
+manager = ConnectionManager(overflow=os.getenv("CHAT_WS_OVERFLOW", DROP_OLDEST),
+                            coalesce_window=float(os.getenv("CHAT_NOTIFY_WINDOW", COALESCE_WINDOW)), bus=bus)
+batcher = MessageBatcher(SessionLocal)
+presence = PresenceRegistry(snapshot_interval=float(os.getenv("CHAT_PRESENCE_SNAPSHOT", SNAPSHOT_INTERVAL)),
+                            bus=bus)
+user_cache.attach(bus)
+message_history.attach(bus)
+
+# reject requests acting on behalf of a user (and websocket connections) that carry no session token
+REQUIRE_TOKEN = os.getenv("CHAT_REQUIRE_TOKEN", "0") == "1"
+
+# login of the user allowed to kick and ban other users
+ADMIN_LOGIN = os.getenv("CHAT_ADMIN_LOGIN", "admin")
+
+
+@app.on_event("startup")
+async def create_tables():
+    """
+    create missing tables in the database and bring existing ones up to date
+    :return:
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(migrations.upgrade)
+    async with SessionLocal() as db:
+        await presence.load(db)
+    await bus.start()
+    async with SessionLocal() as db:
+        await load_general_window(db)
+    presence.start(SessionLocal)
+    batcher.start()
+
+
+async def load_general_window(db: AsyncSession):
+    """
+    fill the in-memory window of chat 'general' with its latest messages
+    :param db: independent database session/connection (SessionLocal)
+    :return:
+    """
+    message_history.general.load(await crud.get_latest_messages(db, models.conversation_key(0, 0),
+                                                                message_history.general.capacity + 1))
+
+
+async def resync():
+    """
+    rebuild the state kept in step through the bus once the subscription to the broker is back, since changes
+    published by other workers meanwhile are lost: cached users and messages are read again from the database,
+    the presence from the last snapshots and every ETag given out so far is void
+    :return:
+    """
+    await presence.snapshot(SessionLocal)
+    user_cache.clear()
+    message_history.reset()
+    versions.renew()
+    async with SessionLocal() as db:
+        await presence.resync(db, [connection.client_id for connection in manager.active_connections.values()])
+        await load_general_window(db)
+
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict() = dict()
-
-    async def connect(self, websocket: WebSocket, client_id):
-        """
-        connect user to chat
-        :param websocket: connection information
-        :param client_id: id client that connects
-        :return:
-        """
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        await manager.broadcast(f"status")
-
-    async def disconnect(self, client_id):
-        """
-        disconnect user from chat
-        :param client_id: id client that disconnects
-        :return:
-        """
-        self.active_connections.pop(client_id)
-        await manager.broadcast(f"status")
-
-    async def send_personal_message(self, message: str, client_id):
-        """
-        send personal message to user with given id
-        :param message: message to be sent
-        :param client_id: id of the client the message is being sent to
-        :return:
-        """
-        await self.active_connections[client_id].send_text(message)
-
-    async def broadcast(self, message: str):
-        """
-        send message to all active user
-        :param message: message to be sent
-        :return:
-        """
-        for connection in self.active_connections:
-            await self.active_connections[connection].send_text(message)
-
-
-manager = ConnectionManager()
+bus.on_resync(resync)
+
+
+@app.on_event("shutdown")
+async def flush_messages():
+    """
+    store messages still waiting for their batch and the current presence of users
+    :return:
+    """
+    await batcher.stop()
+    await presence.stop(SessionLocal)
+    await bus.stop()
+    password_hasher.stop()
+    await engine.dispose()
+
+
+@app.get("/stats/broadcast", include_in_schema=False)
+async def read_broadcast_stats():
+    """
+    fan-out and delivery latency, evicted connections and dropped frames
+    :return: broadcast statistics
+    """
+    return manager.summary()
+
+
+@app.get("/stats/cache", include_in_schema=False)
+async def read_cache_stats():
+    """
+    size, hits and misses of the user cache and of the recent message windows
+    :return: cache statistics
+    """
+    return {"users": user_cache.summary(), "history": message_history.summary(), "versions": versions.summary()}
+
+
+@app.get("/stats/passwords", include_in_schema=False)
+async def read_password_stats():
+    """
+    cost and pool size of password hashing, hashed, verified and upgraded passwords, issued and rejected tokens
+    :return: password and token statistics
+    """
+    return {"hashing": password_hasher.summary(), "tokens": session_tokens.summary()}
 
 
 @app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: int):
+async def websocket_endpoint(websocket: WebSocket, client_id: int, token: Optional[str] = None):
     """
     logging out the user
     :param websocket: connection information
     :param client_id: id of the client who logs out
+    :param token: session token issued at login, checked before the connection is accepted
     :return:
     """
+    user = presence.get(client_id)
+    if user is None or (token is None and REQUIRE_TOKEN) \
+            or (token is not None and (session_tokens.verify(token) != client_id or user.is_banned)):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     await manager.connect(websocket, client_id)
+    user = await presence.update_active(client_id, True)
+    await manager.notify_all(events.presence_frame(events.USER_ONLINE, user, True), events.presence_key(client_id))
     try:
         while True:
             data = await websocket.receive_text()
             # await manager.send_personal_message(f"You wrote: {data}", websocket)
             # await manager.broadcast(f"Client #{client_id} says: {data}")
     except WebSocketDisconnect:
-        await manager.disconnect(client_id)
-        await manager.broadcast(f"Client #{client_id} left the chat")
+        await manager.disconnect(client_id, websocket)
+        if client_id not in manager.active_connections:
+            user = await presence.update_active(client_id, False)
+            await manager.notify_all(events.presence_frame(events.USER_OFFLINE, user, False),
+                                     events.presence_key(client_id))
 
 
 # Dependency
@@ -83,217 +159,359 @@ async def websocket_endpoint(websocket: WebSocket, client_id: int):
 # use the same session through all the request and then close it after the request is finished.
 # Our dependency will create a new SQLAlchemy SessionLocal that will be used in a single request,
 # and then close it once the request is finished.
-def get_db():
+async def get_db():
     """
     creating independent database session/connection (SessionLocal) per request
     :return: independent database session/connection (SessionLocal) per request
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def session_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)):
+    """
+    identify the user by the signed token of the Authorization header, without querying the database
+    :param credentials: bearer token, None if the request has none
+    :return: id of the user the token was issued to or None if the request has no token
+    """
+    if credentials is None:
+        if REQUIRE_TOKEN:
+            raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+        return None
+    user_id = session_tokens.verify(credentials.credentials)
+    user = presence.get(user_id) if user_id is not None else None
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    if user.is_banned:
+        raise HTTPException(status_code=403, detail="User is banned")
+    return user_id
+
+
+def authorize(session: Optional[int], *user_ids: int):
+    """
+    make sure that the request acts on behalf of the user holding the session
+    :param session: id of the user returned by session_user, None if the request has no token
+    :param user_ids: ids of the users allowed to make the request
+    :return:
+    """
+    if session is not None and session not in user_ids:
+        raise HTTPException(status_code=403, detail="Not allowed for this session")
+
+
+def authenticated(session: Optional[int]):
+    """
+    make sure that the request carries a session token, whatever CHAT_REQUIRE_TOKEN says
+    :param session: id of the user returned by session_user, None if the request has no token
+    :return: id of the user holding the session
+    """
+    if session is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return session
+
+
+def authorize_admin(session: Optional[int]):
+    """
+    make sure that the request is made by the administrator (CHAT_ADMIN_LOGIN)
+    :param session: id of the user returned by session_user, None if the request has no token
+    :return:
+    """
+    user = presence.get(authenticated(session))
+    if user is None or user.login != ADMIN_LOGIN:
+        raise HTTPException(status_code=403, detail="Only the administrator can do this")
+
+
+def authorize_reader(session: Optional[int], receiver_id: int, sender_id: int):
+    """
+    make sure that a private conversation is only read by the users taking part in it, whatever CHAT_REQUIRE_TOKEN
+    says, like GET /message/ which leaves them out for requests without a token
+    :param session: id of the user returned by session_user, None if the request has no token
+    :param receiver_id: id of the user to whom the messages were sent
+    :param sender_id: id of the user from whom the messages were sent
+    :return:
+    """
+    if models.conversation_key(sender_id, receiver_id) != models.conversation_key(0, 0):
+        authorize(authenticated(session), receiver_id, sender_id)
 
 
 @app.get("/users/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_users(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                     cursor: Optional[str] = pagination.cursor_query(), db: AsyncSession = Depends(get_db)):
     """
-    set the active status to True for all active connections
+    give users from the database with their status taken from the presence registry,
+    304 without reading the database when the If-None-Match header holds the current ETag
+    :param request: request whose If-None-Match header is compared with the current ETag
+    :param response: response whose X-Next-Cursor header points to the next page
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param cursor: X-Next-Cursor header of the previous page
     :param db: independent database session/connection (SessionLocal) per request
     :return: List of all users in database
     """
-    users = crud.get_users(db, skip=skip, limit=limit)
-    for user in users:
-        user.is_active = True if user.id in manager.active_connections else False
-    return users
+    not_modified = versions.check(request, response, versions.users_tag())
+    if not_modified:
+        return not_modified
+    users = await crud.get_users(db, skip=skip, limit=limit, after_id=pagination.decode_id_cursor(cursor))
+    pagination.set_next_cursor(response, users, limit, lambda user: (user.id,))
+    return [presence.describe(user) for user in users]
 
 
 @app.post("/users/", response_model=schemas.User)
-async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, response: Response, db: AsyncSession = Depends(get_db)):
     """
     creating a new user
     :param user: new user to add to the database
+    :param response: response whose X-Session-Token header holds the session token of the new user
     :param db: independent database session/connection (SessionLocal) per request
     :return: new user
     """
-    db_user = crud.get_user_by_login(db, login=user.login)
+    db_user = await crud.get_user_by_login(db, login=user.login)
     if db_user:
         raise HTTPException(status_code=400, detail="Login already registered")
-    await manager.broadcast("status")
-    return crud.create_user(db=db, user=user)
+    db_user = await crud.create_user(db=db, user=user)
+    response.headers[SESSION_TOKEN_HEADER] = session_tokens.issue(db_user.id)
+    return await presence.update_user(db_user)
 
 
 @app.post("/users/login", response_model=schemas.User)
-def login_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def login_user(user: schemas.UserCreate, response: Response, db: AsyncSession = Depends(get_db)):
     """
     user login
     :param user: the user to be logged in
+    :param response: response whose X-Session-Token header holds the session token,
+                     to be sent back as "Authorization: Bearer <token>"
     :param db: independent database session/connection (SessionLocal) per request
     :return: user who has been logged in
     """
-    user = crud.login_user(db, user)
+    user = await crud.login_user(db, user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    response.headers[SESSION_TOKEN_HEADER] = session_tokens.issue(user.id)
+    return presence.describe(user)
 
 
 @app.put('/users/status', response_model=schemas.User)
-async def update_user_status(user: schemas.User, db: Session = Depends(get_db)):
+async def update_user_status(user: schemas.User, session: Optional[int] = Depends(session_user)):
     """
-    user status update (is_active)
+    user status update (is_active), kept in the presence registry and written to the database by its snapshots
     :param user: the user to be updated
-    :param db: independent database session/connection (SessionLocal) per request
+    :param session: id of the user holding the session token
     :return: updated user
     """
-    db_user = crud.update_user_status(db, user)
+    authorize(session, user.id)
+    db_user = await presence.update_active(user.id, user.is_active)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    if user.id in manager.active_connections and not user.is_active:
+    if not user.is_active:
         await manager.send_personal_message("offline", user.id)
-    return user
+    return db_user
 
 
 @app.get('/user/kick', response_model=schemas.User)
-async def kick_user(receiver_id: int, db: Session = Depends(get_db)):
+async def kick_user(receiver_id: int, session: Optional[int] = Depends(session_user)):
     """
     kicking users off the server
     :param receiver_id: id of the user to be kicked from the server
-    :param db: independent database session/connection (SessionLocal) per request
+    :param session: id of the user holding the session token, has to be the administrator
     :return: kicked user
     """
-    db_user = crud.get_user(db, user_id=receiver_id)
+    authorize_admin(session)
+    db_user = presence.get(receiver_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    if db_user.id in manager.active_connections and db_user.is_active:
+    if db_user.is_active:
         await manager.send_personal_message("kick", db_user.id)
     return db_user
 
 
 @app.put('/user/ban', response_model=schemas.User)
-async def ban_user(user: schemas.UserBan, db: Session = Depends(get_db)):
+async def ban_user(user: schemas.UserBan, session: Optional[int] = Depends(session_user),
+                   db: AsyncSession = Depends(get_db)):
     """
     banning users from the server
     :param user: the user to be banned from the server
+    :param session: id of the user holding the session token, has to be the administrator
     :param db: independent database session/connection (SessionLocal) per request
     :return: banned user
     """
-    db_user = crud.update_user_status_ban(db, user)
+    authorize_admin(session)
+    db_user = await crud.update_user_status_ban(db, user)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    if db_user.id in manager.active_connections and db_user.is_active:
-        await manager.send_personal_message("ban", db_user.id)
-    return db_user
+    user = await presence.update_user(db_user)
+    if user.is_active:
+        await manager.send_personal_message("ban", user.id)
+    event = events.USER_BANNED if user.is_banned else events.USER_UNBANNED
+    await manager.notify_all(events.presence_frame(event, user, user.is_active), events.presence_key(user.id))
+    return user
 
 
 @app.get("/users/status/{status}")
-def get_users_by_status(status: str, db: Session = Depends(get_db)):
+async def get_users_by_status(status: str):
     """
-    search for all users with a given status
+    search for all users with a given status, served from the presence registry
     :param status: the status of the is_active field
-    :param db: independent database session/connection (SessionLocal) per request
     :return: all users with a given status
     """
     if status.lower() == "active":
-        return crud.get_users_by_status(db, True)
+        return presence.with_status(True)
     elif status.lower() == "inactive":
-        return crud.get_users_by_status(db, False)
+        return presence.with_status(False)
     else:
         raise HTTPException(status_code=404, detail="Status not found")
 
 
 @app.get("/users/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db)):
+async def read_user(request: Request, response: Response, user_id: int, db: AsyncSession = Depends(get_db)):
     """
-    search for specified user with a given id
+    search for specified user with a given id, 304 when the If-None-Match header holds the current ETag
+    :param request: request whose If-None-Match header is compared with the current ETag
+    :param response: response getting the ETag header
     :param user_id: id of the user to find
     :param db: independent database session/connection (SessionLocal) per request
     :return: searched user
     """
-    db_user = crud.get_user(db, user_id=user_id)
+    not_modified = versions.check(request, response, versions.user_tag(user_id))
+    if not_modified:
+        return not_modified
+    db_user = await crud.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    return presence.describe(db_user)
 
 
 @app.get("/message/", response_model=List[schemas.Message])
-def read_all_messages(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_all_messages(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                            cursor: Optional[str] = pagination.cursor_query(),
+                            session: Optional[int] = Depends(session_user), db: AsyncSession = Depends(get_db)):
     """
-    give all messages contained in the database
+    give the messages of chat 'general' and of the conversations of the user holding the session
+    (only chat 'general' without a session), 304 when the If-None-Match header holds the current ETag
+    :param request: request whose If-None-Match header is compared with the current ETag
+    :param response: response whose X-Next-Cursor header points to the next page
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param cursor: X-Next-Cursor header of the previous page
+    :param session: id of the user holding the session token
     :param db: independent database session/connection (SessionLocal) per request
-    :return: All messages form database
+    :return: messages visible to the user
     """
-    messages = crud.get_all_messages(db, skip=skip, limit=limit)
+    not_modified = versions.check(request, response, versions.messages_tag(session or 0))
+    if not_modified:
+        return not_modified
+    messages = await crud.get_all_messages(db, skip=skip, limit=limit, after_id=pagination.decode_id_cursor(cursor),
+                                           participant=session if session is not None else 0)
+    pagination.set_next_cursor(response, messages, limit, lambda message: (message.id,))
     return messages
 
 
 @app.post("/message/{receiver_id}/", response_model=schemas.Message)
-async def create_message_from_user(message: schemas.MessageCreate, receiver_id: int, db: Session = Depends(get_db)):
+async def create_message_from_user(message: schemas.MessageCreate, receiver_id: int,
+                                   session: Optional[int] = Depends(session_user)):
     """
-    compose a new message
+    compose a new message, stored together with other messages sent at the same moment
     :param message: the message that was sent to the user
     :param receiver_id: id of the user to whom the message was sent
-    :param db: independent database session/connection (SessionLocal) per request
+    :param session: id of the user holding the session token, has to be the sender
     :return: created message
     """
+    authorize(session, message.from_usr)
+    db_message = await batcher.submit(message, receiver_id)
+    frame = events.message_frame(db_message)
     if receiver_id == 0:
-        await manager.broadcast("update_mess")
-    elif receiver_id in manager.active_connections:
-        await manager.send_personal_message("update_mess", receiver_id)
-    if message.from_usr in manager.active_connections:
-        await manager.send_personal_message("update_mess", message.from_usr)
-    return crud.create_message(db=db, message=message, receiver_id=receiver_id)
+        await manager.broadcast(frame)
+    else:
+        await manager.send_personal_message(frame, receiver_id)
+        if message.from_usr != receiver_id:
+            await manager.send_personal_message(frame, message.from_usr)
+    return db_message
 
 
 @app.get("/message/{receiver_id}/{sender_id}/", response_model=List[schemas.Message])
-def read_messages_to_user_from(receiver_id: int, sender_id: int, skip: int = 0, limit: int = 100,
-                               db: Session = Depends(get_db)):
+async def read_messages_to_user_from(request: Request, response: Response, receiver_id: int, sender_id: int,
+                                     skip: int = 0, limit: int = 100, cursor: Optional[str] = pagination.cursor_query(),
+                                     session: Optional[int] = Depends(session_user),
+                                     db: AsyncSession = Depends(get_db)):
     """
-    search for all messages from the user (sender_id) to user (receiver_id)
+    search for all messages from the user (sender_id) to user (receiver_id),
+    304 when the If-None-Match header holds the current ETag of the conversation
+    :param request: request whose If-None-Match header is compared with the current ETag
+    :param response: response whose X-Next-Cursor header points to the next page
     :param receiver_id: id of the user to whom the message was sent
     :param sender_id: id of the user from whom the message was sent
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param cursor: X-Next-Cursor header of the previous page
+    :param session: id of the user holding the session token, has to take part in the conversation
+                    unless it is chat 'general'
     :param db: independent database session/connection (SessionLocal) per request
     :return: all messages from user (sender_id) to user (receiver_id)
     """
-    messages = crud.get_messages_to_user_from(db, receiver_id=receiver_id, sender_id=sender_id, skip=skip,
-                                              limit=limit)
+    authorize_reader(session, receiver_id, sender_id)
+    not_modified = versions.check(request, response,
+                                  versions.conversation_tag(models.conversation_key(sender_id, receiver_id)))
+    if not_modified:
+        return not_modified
+    after_date, after_id = pagination.decode_date_id_cursor(cursor)
+    messages = await crud.get_messages_to_user_from(db, receiver_id=receiver_id, sender_id=sender_id, skip=skip,
+                                                    limit=limit, after_date=after_date, after_id=after_id)
+    pagination.set_next_cursor(response, messages, limit, lambda message: (message.date, message.id))
     return messages
 
 
 @app.get("/message/{receiver_id}/{sender_id}/{from_date}", response_model=List[schemas.Message])
-def read_messages_to_user_from_date(receiver_id: int, sender_id: int, from_date: datetime, skip: int = 0,
-                                    limit: int = 100, db: Session = Depends(get_db)):
+async def read_messages_to_user_from_date(request: Request, response: Response, receiver_id: int, sender_id: int,
+                                          from_date: datetime, skip: int = 0, limit: int = 100,
+                                          cursor: Optional[str] = pagination.cursor_query(),
+                                          session: Optional[int] = Depends(session_user),
+                                          db: AsyncSession = Depends(get_db)):
     """
-    search for all messages from the user (sender_id) to user (receiver_id) since given date
+    search for all messages from the user (sender_id) to user (receiver_id) since given date,
+    304 when the If-None-Match header holds the current ETag of the conversation
+    :param request: request whose If-None-Match header is compared with the current ETag
+    :param response: response whose X-Next-Cursor header points to the next page
     :param receiver_id: id of the user to whom the message was sent
     :param sender_id: id of the user from whom the message was sent
     :param from_date: date from which to look for messages
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param cursor: X-Next-Cursor header of the previous page
+    :param session: id of the user holding the session token, has to take part in the conversation
+                    unless it is chat 'general'
     :param db: independent database session/connection (SessionLocal) per request
     :return: all messages from user (sender_id) to user (receiver_id) since given date
     """
+    authorize_reader(session, receiver_id, sender_id)
+    not_modified = versions.check(request, response,
+                                  versions.conversation_tag(models.conversation_key(sender_id, receiver_id)))
+    if not_modified:
+        return not_modified
+    after_date, after_id = pagination.decode_date_id_cursor(cursor)
     if sender_id == 0:
-        messages = crud.get_messages_to_general(db, from_date)
+        messages = await crud.get_messages_to_general(db, from_date, skip=skip, limit=limit, after_date=after_date,
+                                                      after_id=after_id)
     else:
-        messages = crud.get_messages_to_user_from_date(db, receiver_id=receiver_id, sender_id=sender_id, date=from_date,
-                                                       skip=skip, limit=limit)
+        messages = await crud.get_messages_to_user_from_date(db, receiver_id=receiver_id, sender_id=sender_id,
+                                                             date=from_date, skip=skip, limit=limit,
+                                                             after_date=after_date, after_id=after_id)
+    pagination.set_next_cursor(response, messages, limit, lambda message: (message.date, message.id))
     return messages
 
 
 @app.delete("/message/{message_id}")
-def delete_message_by_id(message_id: int, db: Session = Depends(get_db)):
+async def delete_message_by_id(message_id: int, session: Optional[int] = Depends(session_user),
+                               db: AsyncSession = Depends(get_db)):
     """
     delete a message
     :param message_id: id of the message to delete
+    :param session: id of the user holding the session token, has to be the sender of the message
     :param db: independent database session/connection (SessionLocal) per request
     :return: confirmation that the operation was successful
     """
-    if crud.delete_message_by_id(db, message_id):
+    authenticated(session)
+    db_message = await crud.get_message(db, message_id)
+    if db_message is None:
+        return status.HTTP_204_NO_CONTENT
+    authorize(session, db_message.from_usr)
+    if await crud.delete_message_by_id(db, message_id):
         return status.HTTP_202_ACCEPTED
     return status.HTTP_204_NO_CONTENT
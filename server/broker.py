@@ -0,0 +1,97 @@
+"""
+minimal stand-in for redis speaking only the commands used by RedisBus (PUBLISH, SUBSCRIBE, UNSUBSCRIBE, PING, AUTH)
+
+meant for local runs and tests of several workers without a redis server:
+    python -m server.broker --port 6379
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+
+from server.bus import encode_command, read_reply
+
+
+def subscription_reply(kind: str, channel: str, count: int):
+    """
+    confirmation of a SUBSCRIBE or UNSUBSCRIBE command for a single channel
+    :param kind: subscribe or unsubscribe
+    :param channel: name of the channel
+    :param count: number of channels the client is subscribed to afterwards
+    :return: RESP encoded reply
+    """
+    return encode_command(kind, channel).replace(b"*2", b"*3", 1) + b":%d\r\n" % count
+
+
+class Broker:
+    def __init__(self):
+        """
+        channels with the writers of their subscribers
+        """
+        self.channels = defaultdict(set)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        serve a single client connection
+        :param reader: stream of the client
+        :param writer: stream of the client
+        :return:
+        """
+        subscribed = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    break
+                name, args = command[0].decode().upper(), [arg.decode() for arg in command[1:]]
+                if name == "PUBLISH":
+                    receivers = list(self.channels.get(args[0], ()))
+                    frame = encode_command("message", args[0], command[2])
+                    for receiver in receivers:
+                        receiver.write(frame)
+                    writer.write(b":%d\r\n" % len(receivers))
+                elif name == "SUBSCRIBE":
+                    for channel in args:
+                        self.channels[channel].add(writer)
+                        subscribed.add(channel)
+                        writer.write(subscription_reply("subscribe", channel, len(subscribed)))
+                elif name == "UNSUBSCRIBE":
+                    for channel in args or list(subscribed):
+                        self.channels[channel].discard(writer)
+                        subscribed.discard(channel)
+                        writer.write(subscription_reply("unsubscribe", channel, len(subscribed)))
+                elif name == "PING":
+                    writer.write(b"+PONG\r\n")
+                elif name == "AUTH":
+                    writer.write(b"+OK\r\n")
+                else:
+                    writer.write(f"-ERR unknown command '{name}'\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscribed:
+                self.channels[channel].discard(writer)
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        """
+        accept clients until cancelled
+        :param host: address to listen on
+        :param port: port to listen on
+        :return:
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(Broker().serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
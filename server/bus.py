@@ -0,0 +1,345 @@
+import abc
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+# Default time (in seconds) between two attempts to reach a broker that went away
+RECONNECT_DELAY = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def encode_command(*args):
+    """
+    serialize a command in the RESP protocol spoken by redis
+    :param args: command name and its arguments (str or bytes)
+    :return: bytes to be written to the socket
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """
+    read a single RESP reply
+    :param reader: stream connected to the broker
+    :return: str, int, bytes, list or None, errors are returned as ConnectionError instances
+    """
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Broker closed the connection")
+    kind, value = line[:1], line[1:-2]
+    if kind == b"+":
+        return value.decode()
+    if kind == b"-":
+        return ConnectionError(value.decode())
+    if kind == b":":
+        return int(value)
+    if kind == b"$":
+        size = int(value)
+        if size < 0:
+            return None
+        data = await reader.readexactly(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(value)
+        if size < 0:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"Unexpected reply from broker: {line!r}")
+
+
+class MessageBus(abc.ABC):
+    def __init__(self):
+        """
+        channels shared by all workers of the server, every worker delivers published payloads to its own handlers
+        """
+        self.node_id = uuid.uuid4().hex
+        self.handlers = defaultdict(list)
+        self.resync_handlers = []
+        self.published = 0
+        self.received = 0
+        self.failed = 0
+
+    def subscribe(self, channel: str, handler):
+        """
+        register a handler for payloads published on a channel
+        :param channel: name of the channel
+        :param handler: coroutine function called with every payload (dict)
+        :return:
+        """
+        self.handlers[channel].append(handler)
+
+    def on_resync(self, handler):
+        """
+        register a handler rebuilding state kept in step through the bus, called when payloads of the other workers
+        may have been missed
+        :param handler: coroutine function called without arguments
+        :return:
+        """
+        self.resync_handlers.append(handler)
+
+    async def resync(self):
+        """
+        call the resync handlers, a failing handler does not stop the other ones
+        :return:
+        """
+        for handler in self.resync_handlers:
+            try:
+                await handler()
+            except Exception:
+                self.failed += 1
+                logger.exception("Resynchronizing after a lost subscription failed")
+
+    async def publish(self, channel: str, payload: dict):
+        """
+        hand a payload to the handlers of this worker right away and forward it to the other workers
+        :param channel: name of the channel
+        :param payload: JSON serializable dict, handlers must not modify it
+        :return:
+        """
+        self.published += 1
+        await self.dispatch(channel, payload)
+        await self.forward(channel, payload)
+
+    async def dispatch(self, channel: str, payload: dict):
+        """
+        call the handlers of this worker, a failing handler does not stop the other ones
+        :param channel: name of the channel
+        :param payload: published payload
+        :return:
+        """
+        for handler in self.handlers.get(channel, ()):
+            try:
+                await handler(payload)
+            except Exception:
+                self.failed += 1
+
+    @abc.abstractmethod
+    async def forward(self, channel: str, payload: dict):
+        """
+        send a payload to the other workers, implemented by every backend
+        :param channel: name of the channel
+        :param payload: published payload
+        :return:
+        """
+
+    async def start(self):
+        """
+        connect to the broker
+        :return:
+        """
+
+    async def stop(self):
+        """
+        disconnect from the broker
+        :return:
+        """
+
+    def summary(self):
+        """
+        :return: dict with the backend name and message counters
+        """
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+            "failed": self.failed,
+        }
+
+
+class InProcessBus(MessageBus):
+    """
+    bus of a single worker, there is nobody to forward payloads to
+    """
+
+    async def forward(self, channel: str, payload: dict):
+        pass
+
+
+class RedisBus(MessageBus):
+    def __init__(self, host: str = "localhost", port: int = 6379, password: str = None,
+                 reconnect_delay: float = RECONNECT_DELAY):
+        """
+        bus backed by the PUBLISH/SUBSCRIBE commands of redis (or any broker speaking the same protocol)
+        :param host: address of the broker
+        :param port: port of the broker
+        :param password: password sent with AUTH, None skips authentication
+        :param reconnect_delay: time (in seconds) between two attempts to reach the broker
+        """
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.password = password
+        self.reconnect_delay = reconnect_delay
+        self.writer = None
+        self.replies = deque()
+        self.reply_reader = None
+        self.connecting = asyncio.Lock()
+        self.subscriber = None
+
+    async def open_connection(self):
+        """
+        open a new connection to the broker and authenticate it
+        :return: (reader, writer) pair
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password is not None:
+            writer.write(encode_command("AUTH", self.password))
+            reply = await read_reply(reader)
+            if isinstance(reply, ConnectionError):
+                writer.close()
+                raise reply
+        return reader, writer
+
+    async def start(self):
+        """
+        connect the publishing connection and start listening on all subscribed channels
+        :return:
+        """
+        await self._connect_publisher()
+        if self.subscriber is None:
+            ready = asyncio.get_running_loop().create_future()
+            self.subscriber = asyncio.create_task(self._listen(ready))
+            await ready
+
+    async def stop(self):
+        """
+        close both connections to the broker
+        :return:
+        """
+        for task in (self.subscriber, self.reply_reader):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.subscriber = self.reply_reader = None
+        self._close_publisher(ConnectionError("Bus stopped"))
+
+    async def forward(self, channel: str, payload: dict):
+        """
+        PUBLISH the payload, replies are matched to requests in order so publishes can be pipelined
+        :param channel: name of the channel
+        :param payload: published payload
+        :return:
+        """
+        data = json.dumps({"origin": self.node_id, "payload": payload}, separators=(",", ":"))
+        try:
+            if self.writer is None:
+                await self._connect_publisher()
+            reply = asyncio.get_running_loop().create_future()
+            self.replies.append(reply)
+            self.writer.write(encode_command("PUBLISH", channel, data))
+            await self.writer.drain()
+            await reply
+        except (ConnectionError, OSError) as error:
+            self.failed += 1
+            logger.warning("Publishing on channel %s failed: %s", channel, error)
+            self._close_publisher(ConnectionError("Connection to the broker lost"))
+
+    async def _connect_publisher(self):
+        """
+        open the publishing connection unless another task is already doing it
+        :return:
+        """
+        async with self.connecting:
+            if self.writer is not None:
+                return
+            reader, self.writer = await self.open_connection()
+            self.reply_reader = asyncio.create_task(self._read_replies(reader))
+
+    def _close_publisher(self, error: Exception):
+        """
+        drop the publishing connection and fail publishes still waiting for their reply
+        :param error: exception given to the waiting publishes
+        :return:
+        """
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        while self.replies:
+            reply = self.replies.popleft()
+            if not reply.done():
+                reply.set_exception(error)
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        """
+        resolve pending publishes with the replies of the broker
+        :param reader: stream of the publishing connection
+        :return:
+        """
+        try:
+            while True:
+                value = await read_reply(reader)
+                reply = self.replies.popleft()
+                if reply.done():
+                    continue
+                if isinstance(value, ConnectionError):
+                    reply.set_exception(value)
+                else:
+                    reply.set_result(value)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, IndexError):
+            self.reply_reader = None
+            self._close_publisher(ConnectionError("Connection to the broker lost"))
+
+    async def _listen(self, ready: asyncio.Future):
+        """
+        subscribe to all channels with handlers and dispatch payloads published by other workers,
+        reconnecting whenever the broker goes away; payloads published meanwhile are lost, so the resync handlers
+        run once the subscription is back, before any new payload is dispatched
+        :param ready: future resolved once the first subscription is confirmed
+        :return:
+        """
+        while True:
+            writer = None
+            try:
+                reader, writer = await self.open_connection()
+                channels = list(self.handlers)
+                writer.write(encode_command("SUBSCRIBE", *channels))
+                await writer.drain()
+                for _ in channels:
+                    await read_reply(reader)
+                if not ready.done():
+                    ready.set_result(None)
+                else:
+                    await self.resync()
+                while True:
+                    message = await read_reply(reader)
+                    if not isinstance(message, list) or len(message) != 3 or message[0] != b"message":
+                        continue
+                    envelope = json.loads(message[2])
+                    if envelope.get("origin") == self.node_id:
+                        continue
+                    self.received += 1
+                    await self.dispatch(message[1].decode(), envelope["payload"])
+            except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError) as error:
+                if not ready.done():
+                    ready.set_exception(error)
+                    return
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+def create_bus(url: str = None):
+    """
+    create the bus described by an url
+    :param url: None or memory:// for a single worker, redis://[:password@]host[:port] for a broker
+    :return: MessageBus
+    """
+    if not url or url.startswith("memory:"):
+        return InProcessBus()
+    parsed = urlparse(url)
+    if parsed.scheme != "redis":
+        raise ValueError(f"Unknown bus url: {url}")
+    return RedisBus(host=parsed.hostname or "localhost", port=parsed.port or 6379, password=parsed.password)
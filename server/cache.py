@@ -0,0 +1,160 @@
+import os
+import time
+from collections import OrderedDict
+
+from server import models
+from server.bus import MessageBus
+
+# Default number of users kept in the cache
+CACHE_SIZE = 1024
+
+# Default time (in seconds) after which a cached user is read from the database again
+CACHE_TTL = 60.0
+
+# Bus channel telling the other workers which users have changed
+USERS_CHANNEL = "chat:users"
+
+
+def copy_user(db_user: models.User):
+    """
+    copy of a user not attached to any session, safe to share between requests
+    :param db_user: user read from the database
+    :return: transient models.User with the same columns
+    """
+    return models.User(id=db_user.id, login=db_user.login, password=db_user.password, is_active=db_user.is_active,
+                       is_banned=db_user.is_banned)
+
+
+class UserCache:
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        """
+        least recently used users with an expiry time, reachable by id and by login
+        :param max_size: maximum number of cached users, 0 disables the cache
+        :param ttl: time (in seconds) a cached user stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.logins = dict()
+        self.bus = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidated = 0
+
+    def get(self, user_id: int):
+        """
+        :param user_id: id of the searched user
+        :return: cached user or None on a miss
+        """
+        entry = self.entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, user = entry
+        if expires < time.monotonic():
+            self.expired += 1
+            self.misses += 1
+            self.discard(user_id)
+            return None
+        self.entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def get_by_login(self, login: str):
+        """
+        :param login: login of the searched user
+        :return: cached user or None on a miss
+        """
+        user_id = self.logins.get(login)
+        if user_id is None:
+            self.misses += 1
+            return None
+        return self.get(user_id)
+
+    def put(self, db_user: models.User):
+        """
+        store a copy of a user read from the database
+        :param db_user: user read from the database, may be None
+        :return: the stored copy or None
+        """
+        if db_user is None or self.max_size <= 0:
+            return db_user
+        user = copy_user(db_user)
+        self.discard(user.id)
+        self.entries[user.id] = (time.monotonic() + self.ttl, user)
+        self.logins[user.login] = user.id
+        while len(self.entries) > self.max_size:
+            user_id, (_, oldest) = self.entries.popitem(last=False)
+            self.logins.pop(oldest.login, None)
+            self.evicted += 1
+        return user
+
+    def discard(self, user_id: int):
+        """
+        remove a user from the cache of this worker
+        :param user_id: id of the user
+        :return:
+        """
+        entry = self.entries.pop(user_id, None)
+        if entry is not None and self.logins.get(entry[1].login) == user_id:
+            del self.logins[entry[1].login]
+
+    def clear(self):
+        """
+        remove all users from the cache of this worker, used when invalidations may have been missed
+        :return:
+        """
+        self.entries.clear()
+        self.logins.clear()
+
+    async def invalidate(self, user_id: int):
+        """
+        remove a changed user from the caches of all workers
+        :param user_id: id of the changed user
+        :return:
+        """
+        self.invalidated += 1
+        if self.bus is None:
+            self.discard(user_id)
+        else:
+            await self.bus.publish(USERS_CHANNEL, {"id": user_id})
+
+    def attach(self, bus: MessageBus):
+        """
+        share invalidations with the other workers through the bus
+        :param bus: bus shared with the other workers
+        :return:
+        """
+        self.bus = bus
+        bus.subscribe(USERS_CHANNEL, self._on_invalidate)
+
+    async def _on_invalidate(self, event: dict):
+        """
+        apply an invalidation published on the bus
+        :param event: dict with the id of the changed user
+        :return:
+        """
+        self.discard(event["id"])
+
+    def summary(self):
+        """
+        :return: dict with the size of the cache and its counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated,
+        }
+
+
+user_cache = UserCache(max_size=int(os.getenv("CHAT_USER_CACHE_SIZE", CACHE_SIZE)),
+                       ttl=float(os.getenv("CHAT_USER_CACHE_TTL", CACHE_TTL)))
@@ -0,0 +1,405 @@
+import asyncio
+import time
+from collections import deque
+
+from fastapi import WebSocket
+
+from server.bus import InProcessBus, MessageBus
+
+# Default time (in seconds) a single send may take before the socket is considered stuck
+SEND_TIMEOUT = 2.0
+
+# Default number of frames waiting to be written to a single socket
+QUEUE_SIZE = 256
+
+# Default time (in seconds) during which frames with the same key (events.presence_key) are merged into one
+COALESCE_WINDOW = 0.05
+
+# Number of most recent samples kept for latency reporting
+LATENCY_SAMPLES = 1024
+
+# Default number of shards of the connection registry
+SHARDS = 16
+
+# Policies applied when the outbound queue of a connection is full
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+# Bus channel carrying frames to the workers holding the target sockets
+DELIVERY_CHANNEL = "chat:deliver"
+
+
+class LatencyStats:
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        """
+        rolling record of latencies
+        :param samples: number of most recent samples kept
+        """
+        self.latencies = deque(maxlen=samples)
+        self.count = 0
+
+    def record(self, latency: float):
+        """
+        record a single latency sample
+        :param latency: measured time in seconds
+        :return:
+        """
+        self.latencies.append(latency)
+        self.count += 1
+
+    def summary(self):
+        """
+        summarize recorded latencies
+        :return: dict with sample count and latency percentiles in milliseconds
+        """
+        ordered = sorted(self.latencies)
+
+        def percentile(p):
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "p50_ms": percentile(0.50),
+            "p90_ms": percentile(0.90),
+            "p99_ms": percentile(0.99),
+            "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+        }
+
+
+class Connection:
+    def __init__(self, manager, client_id, websocket: WebSocket):
+        """
+        single websocket with its own bounded outbound queue drained by a writer task
+        :param manager: manager the connection is registered in
+        :param client_id: id of the connected client
+        :param websocket: connection information
+        """
+        self.manager = manager
+        self.client_id = client_id
+        self.websocket = websocket
+        self.queue = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.pending = dict()
+        self.flush_handle = None
+        self.writer = asyncio.create_task(self._drain())
+
+    def notify(self, message: str, key=None):
+        """
+        queue a frame after the coalesce window, merging it with pending frames with the same key
+        :param message: frame to be sent
+        :param key: frames with the same key replace each other, defaults to the frame itself
+        :return:
+        """
+        if self.closed:
+            return
+        key = message if key is None else key
+        if self.manager.coalesce_window <= 0:
+            self.enqueue(message, key)
+            return
+        if key in self.pending:
+            self.manager.coalesced += 1
+        self.pending[key] = message
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.manager.coalesce_window, self._flush)
+
+    def _flush(self):
+        """
+        move merged frames into the outbound queue
+        :return:
+        """
+        self.flush_handle = None
+        pending, self.pending = self.pending, dict()
+        for key, message in pending.items():
+            self.enqueue(message, key)
+
+    def enqueue(self, message: str, key=None):
+        """
+        queue a message for the writer task, applying the overflow policy when the queue is full
+        :param message: message to be sent
+        :param key: key of a frame superseding queued frames with the same key (see notify), None for messages
+        :return: False if the connection had to be dropped, True otherwise
+        """
+        if self.closed:
+            return False
+        if len(self.queue) >= self.manager.queue_size:
+            policy = self.manager.overflow
+            if policy == DISCONNECT:
+                self.manager.dropped += 1
+                self.manager.evict(self)
+                return False
+            if policy == COALESCE and key is not None:
+                for position, (_, queued_at, queued_key) in enumerate(self.queue):
+                    if queued_key == key:
+                        # the newer frame takes the place of the outdated one
+                        self.queue[position] = (message, queued_at, key)
+                        self.manager.dropped += 1
+                        return True
+            self.queue.popleft()
+            self.manager.dropped += 1
+        self.queue.append((message, time.perf_counter(), key))
+        self.ready.set()
+        return True
+
+    async def _drain(self):
+        """
+        write queued messages to the socket, evicting it when a send fails or times out
+        :return:
+        """
+        while not self.closed:
+            await self.ready.wait()
+            while self.queue:
+                message, queued_at, _ = self.queue.popleft()
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(message), timeout=self.manager.send_timeout)
+                except Exception:
+                    self.manager.evict(self)
+                    return
+                self.manager.delivery_stats.record(time.perf_counter() - queued_at)
+            self.ready.clear()
+
+    def close(self):
+        """
+        stop the writer task and close the socket in the background
+        :return:
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self.pending.clear()
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        """
+        close the underlying socket, ignoring sockets that are already gone
+        :return:
+        """
+        try:
+            await asyncio.wait_for(self.websocket.close(), timeout=self.manager.send_timeout)
+        except Exception:
+            pass
+
+
+class Shard:
+    def __init__(self):
+        """
+        part of the connection registry with a cached snapshot of its connections;
+        a change only rebuilds the snapshot of its own shard
+        """
+        self.connections = dict()
+        self.cached = None
+
+    def snapshot(self):
+        """
+        connections of the shard at this moment, later connects and disconnects do not change the result
+        :return: tuple of connections, rebuilt only after the shard has changed
+        """
+        if self.cached is None:
+            self.cached = tuple(self.connections.values())
+        return self.cached
+
+    def add(self, connection: Connection):
+        """
+        register a connection, replacing the previous one of the same client
+        :param connection: the connection to register
+        :return: the replaced connection or None
+        """
+        previous = self.connections.get(connection.client_id)
+        self.connections[connection.client_id] = connection
+        self.cached = None
+        return previous
+
+    def remove(self, connection: Connection):
+        """
+        unregister a connection unless it has already been replaced
+        :param connection: the connection to unregister
+        :return: True if the connection was removed
+        """
+        if self.connections.get(connection.client_id) is not connection:
+            return False
+        del self.connections[connection.client_id]
+        self.cached = None
+        return True
+
+
+class ConnectionRegistry:
+    def __init__(self, shards: int = SHARDS):
+        """
+        connections of this worker split by client id into shards
+        :param shards: number of shards
+        """
+        self.shards = [Shard() for _ in range(shards)]
+
+    def shard(self, client_id):
+        """
+        :param client_id: id of the client
+        :return: shard holding the connection of the client
+        """
+        return self.shards[hash(client_id) % len(self.shards)]
+
+    def get(self, client_id):
+        """
+        :param client_id: id of the client
+        :return: connection of the client or None
+        """
+        return self.shard(client_id).connections.get(client_id)
+
+    def __contains__(self, client_id):
+        return client_id in self.shard(client_id).connections
+
+    def __len__(self):
+        return sum(len(shard.connections) for shard in self.shards)
+
+    def values(self):
+        """
+        :return: list of all connections at this moment
+        """
+        return [connection for shard in self.shards for connection in shard.snapshot()]
+
+    def fan_out(self, send):
+        """
+        call send for every connection, shard after shard, each over its snapshot so that connects,
+        disconnects and evictions caused by send cannot break the iteration
+        :param send: function called with every connection, must not block
+        :return:
+        """
+        for shard in self.shards:
+            if shard.connections:
+                for connection in shard.snapshot():
+                    send(connection)
+
+
+class ConnectionManager:
+    def __init__(self, send_timeout: float = SEND_TIMEOUT, queue_size: int = QUEUE_SIZE,
+                 overflow: str = DROP_OLDEST, coalesce_window: float = COALESCE_WINDOW, bus: MessageBus = None,
+                 shards: int = SHARDS):
+        """
+        registry of the websocket connections of this worker, frames for other workers go through the bus
+        :param send_timeout: time (in seconds) after which a slow socket is evicted
+        :param queue_size: maximum number of frames waiting for a single socket
+        :param overflow: policy applied when a queue is full (drop_oldest, coalesce or disconnect), coalesce replaces
+                         a queued frame with the same key as a new notify_all frame and drops the oldest frame otherwise
+        :param coalesce_window: time (in seconds) during which frames with the same key are merged, 0 disables it
+        :param bus: bus shared with the other workers, a single worker bus by default
+        :param shards: number of shards of the connection registry
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.active_connections = ConnectionRegistry(shards)
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.coalesce_window = coalesce_window
+        self.broadcast_stats = LatencyStats()
+        self.delivery_stats = LatencyStats()
+        self.evicted = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.bus = bus if bus is not None else InProcessBus()
+        self.bus.subscribe(DELIVERY_CHANNEL, self.deliver)
+
+    async def connect(self, websocket: WebSocket, client_id):
+        """
+        connect user to chat
+        :param websocket: connection information
+        :param client_id: id client that connects
+        :return:
+        """
+        await websocket.accept()
+        previous = self.active_connections.shard(client_id).add(Connection(self, client_id, websocket))
+        if previous is not None:
+            previous.close()
+
+    async def disconnect(self, client_id, websocket: WebSocket = None):
+        """
+        disconnect user from chat
+        :param client_id: id client that disconnects
+        :param websocket: socket that disconnected, used to ignore stale disconnects after a reconnect
+        :return:
+        """
+        connection = self.active_connections.get(client_id)
+        if connection is None or (websocket is not None and connection.websocket is not websocket):
+            return
+        self.active_connections.shard(client_id).remove(connection)
+        connection.close()
+
+    def evict(self, connection: Connection):
+        """
+        drop a connection that is too slow or has failed
+        :param connection: the connection to drop
+        :return:
+        """
+        if self.active_connections.shard(connection.client_id).remove(connection):
+            self.evicted += 1
+        connection.close()
+
+    async def send_personal_message(self, message: str, client_id):
+        """
+        send personal message to user with given id, on whichever worker the user is connected
+        :param message: message to be sent
+        :param client_id: id of the client the message is being sent to
+        :return:
+        """
+        await self.bus.publish(DELIVERY_CHANNEL, {"op": "personal", "client_id": client_id, "message": message})
+
+    async def broadcast(self, message: str):
+        """
+        send message to all active users of all workers, only queueing it for each connection's writer
+        :param message: message to be sent
+        :return:
+        """
+        await self.bus.publish(DELIVERY_CHANNEL, {"op": "broadcast", "message": message})
+
+    async def notify_all(self, message: str, key=None):
+        """
+        send a frame to all active users, merged with frames with the same key within the coalesce window
+        :param message: frame to be sent
+        :param key: frames with the same key replace each other, defaults to the frame itself
+        :return:
+        """
+        await self.bus.publish(DELIVERY_CHANNEL, {"op": "notify_all", "message": message, "key": key})
+
+    async def deliver(self, envelope: dict):
+        """
+        hand a frame published on the bus to the sockets of this worker
+        :param envelope: dict with the operation (personal, broadcast or notify_all), the frame
+                         and, depending on the operation, the target client or the coalescing key
+        :return:
+        """
+        op, message = envelope["op"], envelope["message"]
+        if op == "personal":
+            connection = self.active_connections.get(envelope["client_id"])
+            if connection is not None:
+                connection.enqueue(message)
+            return
+        start = time.perf_counter()
+        if op == "broadcast":
+            self.active_connections.fan_out(lambda connection: connection.enqueue(message))
+        else:
+            self.active_connections.fan_out(lambda connection: connection.notify(message, envelope["key"]))
+        self.broadcast_stats.record(time.perf_counter() - start)
+
+    def summary(self):
+        """
+        summarize fan-out and delivery behaviour
+        :return: dict with connection counts and latency percentiles
+        """
+        return {
+            "connections": len(self.active_connections),
+            "evicted": self.evicted,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "broadcast": self.broadcast_stats.summary(),
+            "delivery": self.delivery_stats.summary(),
+            "bus": self.bus.summary(),
+        }
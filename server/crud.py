@@ -1,69 +1,100 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, tuple_, update
 from datetime import datetime
 
 from server import models, schemas
+from server.cache import user_cache
+from server.history import message_history
+from server.passwords import password_hasher
 
 
-def get_user(db: Session, user_id: int):
+async def load_user(db: AsyncSession, user_id: int):
     """
-    query that retrieves from the database of the user with the given id
+    query that retrieves from the database of the user with the given id, bypassing the cache
     :param db: the database being searched
     :param user_id: the id of the searched user
-    :return: found user
+    :return: found user attached to the session, safe to modify
     """
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    result = await db.execute(select(models.User).filter(models.User.id == user_id))
+    return result.scalars().first()
 
 
-def get_user_by_login(db: Session, login: str):
+async def get_user(db: AsyncSession, user_id: int):
     """
-    query that retrieves from the database of the user with the given login
+    query that retrieves from the cache or the database of the user with the given id
+    :param db: the database being searched
+    :param user_id: the id of the searched user
+    :return: found user (read only)
+    """
+    db_user = user_cache.get(user_id)
+    if db_user is None:
+        db_user = user_cache.put(await load_user(db, user_id))
+    return db_user
+
+
+async def get_user_by_login(db: AsyncSession, login: str):
+    """
+    query that retrieves from the cache or the database of the user with the given login
     :param db: the database being searched
     :param login: the login of the searched user
-    :return: found user
+    :return: found user (read only)
     """
-    return db.query(models.User).filter(models.User.login == login).first()
+    db_user = user_cache.get_by_login(login)
+    if db_user is None:
+        result = await db.execute(select(models.User).filter(models.User.login == login))
+        db_user = user_cache.put(result.scalars().first())
+    return db_user
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: int = None):
     """
     query that returns all users in the database
     :param db: the database being searched
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param after_id: id of the last seen user, only users with bigger ids are returned
     :return: All users from database
     """
-    return db.query(models.User).offset(skip).limit(limit).all()
+    query = select(models.User).order_by(models.User.id)
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
     """
     query that adds a new user to the database
     :param db: the database being searched
     :param user: new user to be added to the database
     :return: added user
     """
-    password = user.password
+    password = await password_hasher.hash(user.password)
     db_user = models.User(login=user.login, password=password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    user_cache.put(db_user)
     return db_user
 
 
-def get_messages_to_user(db: Session, receiver_id: int, skip: int = 0, limit: int = 100):
+def after_cursor(query, after_date: datetime = None, after_id: int = None):
     """
-    query that finds all messages that have been received by a user with a given id
-    :param db: the database being searched
-    :param receiver_id: id of the user who received the message
-    :param skip: number of first missed results
-    :param limit: limit for searched queries
-    :return: all messages received by the user with the given id
+    narrow a conversation query to messages placed after the last seen one in (date, id) order
+    :param query: query over messages of a single conversation
+    :param after_date: date of the last seen message
+    :param after_id: id of the last seen message
+    :return: narrowed query
     """
-    return db.query(models.Message).filter(models.Message.to_usr == receiver_id).offset(skip).limit(limit).all()
+    if after_date is None:
+        return query
+    if after_id is None:
+        return query.filter(models.Message.date > after_date)
+    return query.filter(tuple_(models.Message.date, models.Message.id) > tuple_(after_date, after_id))
 
 
-def get_messages_to_user_from(db: Session, receiver_id: int, sender_id: int, skip: int = 0, limit: int = 100):
+async def get_messages_to_user_from(db: AsyncSession, receiver_id: int, sender_id: int, skip: int = 0,
+                                    limit: int = 100, after_date: datetime = None, after_id: int = None):
     """
     query that finds all messages that have been sent by a user with a given id to a user with a given id
     :param db: the database being searched
@@ -71,147 +102,256 @@ def get_messages_to_user_from(db: Session, receiver_id: int, sender_id: int, ski
     :param sender_id: id of the user who sent the message
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param after_date: date of the last seen message, only later messages are returned
+    :param after_id: id of the last seen message, breaks ties between messages with the same date
     :return: all messages that have been sent by a user with a given id to a user with a given id
     """
-    return db.query(models.Message) \
-        .filter(or_(and_(models.Message.to_usr == receiver_id, models.Message.from_usr == sender_id),
-                    and_(models.Message.to_usr == sender_id, models.Message.from_usr == receiver_id))) \
-        .order_by(models.Message.date) \
+    messages = await get_recent_messages(db, models.conversation_key(sender_id, receiver_id), datetime.min, skip,
+                                         limit, after_date, after_id)
+    if messages is not None:
+        return messages
+    query = select(models.Message) \
+        .filter(models.Message.conversation == models.conversation_key(sender_id, receiver_id)) \
+        .order_by(models.Message.date, models.Message.id)
+    query = after_cursor(query, after_date, after_id) \
         .offset(skip) \
-        .limit(limit) \
-        .all()
+        .limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
 
 
-def get_messages_to_general(db: Session, date: datetime, skip: int = 0, limit: int = 100):
+async def get_messages_to_general(db: AsyncSession, date: datetime, skip: int = 0, limit: int = 100,
+                                  after_date: datetime = None, after_id: int = None):
     """
-    a query that finds all messages sent in chat 'general' since the given date
+    a query that finds all messages sent in chat 'general' since the given date, answered from the in-memory
+    window when it holds all of them
     :param db: the database being searched
     :param date: date from which messages are searched for
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param after_date: date of the last seen message, only later messages are returned
+    :param after_id: id of the last seen message, breaks ties between messages with the same date
     :return: all messages sent in chat 'general' since the given date
     """
-    return db.query(models.Message) \
-        .filter(models.Message.to_usr == 0, models.Message.date > date) \
-        .order_by(models.Message.date) \
+    messages = message_history.general_since(date, skip, limit, after_date, after_id)
+    if messages is not None:
+        return messages
+    query = select(models.Message) \
+        .filter(models.Message.conversation == models.conversation_key(0, 0), models.Message.date > date) \
+        .order_by(models.Message.date, models.Message.id)
+    query = after_cursor(query, after_date, after_id) \
         .offset(skip) \
-        .limit(limit) \
-        .all()
+        .limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
 
 
-def get_messages_to_user_from_date(db: Session, receiver_id: int, date: datetime, sender_id: int, skip: int = 0,
-                                   limit: int = 100):
+async def get_messages_to_user_from_date(db: AsyncSession, receiver_id: int, date: datetime, sender_id: int,
+                                         skip: int = 0, limit: int = 100, after_date: datetime = None,
+                                         after_id: int = None):
     """
-    query that searches for all messages sent by a user with a given id to a user with a given id from a given date
+    query that searches for all messages sent by a user with a given id to a user with a given id from a given date,
+    answered from the in-memory window of the conversation when it holds all of them
     :param db: the database being searched
     :param receiver_id: id of the user who received the message
     :param date: date from which messages are searched for
     :param sender_id: id of the user who sent the message
     :param skip: number of first missed results
     :param limit: limit for searched queries
+    :param after_date: date of the last seen message, only later messages are returned
+    :param after_id: id of the last seen message, breaks ties between messages with the same date
     :return: all messages sent by a user with a given id to a user with a given id from a given date
     """
-    return db.query(models.Message) \
-        .filter(and_(or_(and_(models.Message.to_usr == receiver_id, models.Message.from_usr == sender_id),
-                         and_(models.Message.to_usr == sender_id, models.Message.from_usr == receiver_id)),
-                     models.Message.date > date)) \
-        .order_by(models.Message.date) \
+    messages = await get_recent_messages(db, models.conversation_key(sender_id, receiver_id), date, skip, limit,
+                                         after_date, after_id)
+    if messages is not None:
+        return messages
+    query = select(models.Message) \
+        .filter(models.Message.conversation == models.conversation_key(sender_id, receiver_id),
+                models.Message.date > date) \
+        .order_by(models.Message.date, models.Message.id)
+    query = after_cursor(query, after_date, after_id) \
         .offset(skip) \
-        .limit(limit) \
-        .all()
+        .limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
 
 
-def get_all_messages(db: Session, skip: int = 0, limit: int = 100):
+async def get_recent_messages(db: AsyncSession, conversation: str, date: datetime, skip: int = 0, limit: int = 100,
+                              after_date: datetime = None, after_id: int = None):
     """
-    query that returns all sent messages
+    messages of a conversation later than the given date taken from its in-memory window,
+    the window is read from the database the first time the conversation is asked for
     :param db: the database being searched
+    :param conversation: key of the conversation (models.conversation_key)
+    :param date: date from which messages are searched for
     :param skip: number of first missed results
     :param limit: limit for searched queries
-    :return: all sent messages
+    :param after_date: date of the last seen message, only later messages are returned
+    :param after_id: id of the last seen message, breaks ties between messages with the same date
+    :return: list of messages or None if the window does not hold all of them
     """
-    return db.query(models.Message).offset(skip).limit(limit).all()
+    if conversation == models.conversation_key(0, 0):
+        return message_history.general_since(date, skip, limit, after_date, after_id)
+    messages = message_history.conversation_since(conversation, date, skip, limit, after_date, after_id)
+    if messages is not None:
+        return messages
+    window = message_history.open_conversation(conversation)
+    if window is None or window.loaded:
+        return None
+    latest = await get_latest_messages(db, conversation, window.capacity + 1)
+    message_history.load_conversation(conversation, window, latest)
+    if not window.covers(date):
+        return None
+    return window.since(date, skip, limit, after_date, after_id)
 
 
-def create_message(db: Session, message: schemas.MessageCreate, receiver_id: int):
+async def get_latest_messages(db: AsyncSession, conversation: str, limit: int):
     """
-    query that adds a new message to the database
+    query that finds the most recent messages of a conversation
     :param db: the database being searched
-    :param message: message sent to the user
-    :param receiver_id: id of the user who received the message
-    :return: added message
+    :param conversation: key of the conversation (models.conversation_key)
+    :param limit: limit for searched queries
+    :return: most recent messages of the conversation, newest first
     """
-    db_message = models.Message(**message.dict(), date=datetime.now(), to_usr=receiver_id)
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    return db_message
+    result = await db.execute(select(models.Message)
+                              .filter(models.Message.conversation == conversation)
+                              .order_by(models.Message.date.desc(), models.Message.id.desc())
+                              .limit(limit))
+    return result.scalars().all()
 
 
-def update_user_status(db: Session, user: schemas.User):
+async def get_all_messages(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: int = None,
+                           participant: int = None):
     """
-    query that changes the user's status (is_active)
+    query that returns all sent messages
     :param db: the database being searched
-    :param user: the user whose status is to be changed
-    :return: searched user
+    :param skip: number of first missed results
+    :param limit: limit for searched queries
+    :param after_id: id of the last seen message, only messages with bigger ids are returned
+    :param participant: id of a user, only messages of chat 'general' and of his conversations are returned,
+                        0 returns only chat 'general', None returns every message
+    :return: all sent messages
     """
-    db_user = db.query(models.User).filter(models.User.id == user.id).first()
-    if db_user:
-        db_user.is_active = user.is_active
-        db.commit()
-        db.refresh(db_user)
-    return db_user
+    query = select(models.Message).order_by(models.Message.id)
+    if participant is not None:
+        query = query.filter(or_(models.Message.conversation == models.conversation_key(0, 0),
+                                 models.Message.from_usr == participant, models.Message.to_usr == participant))
+    if after_id is not None:
+        query = query.filter(models.Message.id > after_id)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def create_messages(db: AsyncSession, messages: list):
+    """
+    query that adds many new messages to the database in a single transaction,
+    the caller puts them into the message history once the transaction is committed
+    :param db: the database being searched
+    :param messages: list of (message, receiver_id) pairs, message being sent to the user with id receiver_id
+    :return: added messages with their ids and dates assigned, in the same order
+    """
+    db_messages = [models.Message(**message.dict(), date=datetime.now(), to_usr=receiver_id,
+                                  conversation=models.conversation_key(message.from_usr, receiver_id))
+                   for message, receiver_id in messages]
+    db.add_all(db_messages)
+    await db.commit()
+    return db_messages
 
 
-def update_user_status_ban(db: Session, user: schemas.UserBan):
+async def update_user_status_ban(db: AsyncSession, user: schemas.UserBan):
     """
     query that changes the user's status (is_banned)
     :param db: the database being searched
     :param user: the user whose status is to be changed
     :return: searched user
     """
-    db_user = db.query(models.User).filter(models.User.id == user.id).first()
+    db_user = await load_user(db, user_id=user.id)
     if db_user:
         db_user.is_banned = user.is_banned
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        await user_cache.invalidate(db_user.id)
     return db_user
 
 
-def login_user(db: Session, user: schemas.UserCreate):
+async def login_user(db: AsyncSession, user: schemas.UserCreate):
     """
     query that checks if a given user exists in the database
     :param db: the database being searched
     :param user: the user to log in
     :return: searched user or None if user is not found
     """
-    db_user = db.query(models.User).filter(models.User.login == user.login).filter(
-        models.User.password == user.password).first()
-    if db_user:
-        return db_user
-    return None
+    db_user = await get_user_by_login(db, user.login)
+    if not await password_hasher.verify(user.password, db_user.password if db_user else None):
+        return None
+    if password_hasher.needs_upgrade(db_user.password):
+        await update_user_password(db, db_user.id, await password_hasher.hash(user.password))
+    return db_user
+
+
+async def update_user_password(db: AsyncSession, user_id: int, password: str):
+    """
+    query that replaces the stored password of a user, used to hash legacy plaintext passwords
+    and to rehash passwords after the cost has changed
+    :param db: the database being searched
+    :param user_id: id of the user
+    :param password: new hash of the password
+    :return:
+    """
+    await db.execute(update(models.User).where(models.User.id == user_id).values(password=password))
+    await db.commit()
+    password_hasher.upgraded += 1
+    await user_cache.invalidate(user_id)
+
+
+async def get_message(db: AsyncSession, message_id: int):
+    """
+    query that finds the message with the given id
+    :param db: the database being searched
+    :param message_id: id of the searched message
+    :return: found message or None
+    """
+    return await db.get(models.Message, message_id)
 
 
-def delete_message_by_id(db: Session, message_id: int):
+async def delete_message_by_id(db: AsyncSession, message_id: int):
     """
     query that removes the message with the given id from the database
     :param db: the database being searched
     :param message_id: message with the given id
     :return: confirmation that the operation was successful
     """
-    db_message = db.query(models.Message).get(message_id)
+    db_message = await db.get(models.Message, message_id)
     if db_message:
-        db.delete(db_message)
-        db.commit()
+        await db.delete(db_message)
+        await db.commit()
+        await message_history.forget(message_id, db_message.conversation)
         return True
     return False
 
 
-def get_users_by_status(db: Session, status: bool):
+async def get_all_users(db: AsyncSession):
+    """
+    query that returns all users in the database without paging
+    :param db: the database being searched
+    :return: All users from database
+    """
+    result = await db.execute(select(models.User).order_by(models.User.id))
+    return result.scalars().all()
+
+
+async def update_users_active(db: AsyncSession, user_ids: list, is_active: bool):
     """
-    a query that will find all users with a given status
+    query that changes the status (is_active) of many users at once
     :param db: the database being searched
-    :param status: status of searched users
-    :return: all users with a given status
+    :param user_ids: ids of the users whose status is to be changed
+    :param is_active: new status
+    :return:
     """
-    db_users = db.query(models.User).filter(models.User.is_active == status).all()
-    return db_users
+    if not user_ids:
+        return
+    await db.execute(update(models.User).where(models.User.id.in_(user_ids)).values(is_active=is_active))
+    await db.commit()
+    for user_id in user_ids:
+        user_cache.discard(user_id)
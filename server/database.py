@@ -1,15 +1,99 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Default number of database connections kept open between requests
+POOL_SIZE = 5
+
+# Default number of extra connections opened under load and closed once returned
+MAX_OVERFLOW = 10
+
+
+class StorageProfile:
+    def __init__(self, journal_mode: str, synchronous: str, cache_size: int, mmap_size: int, temp_store: str,
+                 busy_timeout: int):
+        """
+        SQLite settings applied to every new connection of the pool
+        :param journal_mode: journal mode (WAL lets readers and a writer work at the same time)
+        :param synchronous: how often SQLite waits for data to reach the disk (OFF, NORMAL, FULL, EXTRA)
+        :param cache_size: page cache size, in pages when positive or in KiB when negative
+        :param mmap_size: number of bytes of the database file read through memory mapping, 0 disables it
+        :param temp_store: where temporary tables and indices are kept (DEFAULT, FILE, MEMORY)
+        :param busy_timeout: time (in milliseconds) a connection waits for a lock before failing
+        """
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.temp_store = temp_store
+        self.busy_timeout = busy_timeout
+
+    def pragmas(self):
+        """
+        statements applying the profile to a connection
+        :return: list of PRAGMA statements
+        """
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA cache_size={self.cache_size}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            f"PRAGMA temp_store={self.temp_store}",
+            f"PRAGMA busy_timeout={self.busy_timeout}",
+        ]
+
+
+STORAGE_PROFILES = {
+    # WAL without a sync on every commit: a power loss may roll back the last transactions,
+    # but the database stays consistent
+    "throughput": StorageProfile(journal_mode="WAL", synchronous="NORMAL", cache_size=-65536,
+                                 mmap_size=268435456, temp_store="MEMORY", busy_timeout=5000),
+    # WAL with a sync on every commit: a committed message survives a power loss
+    "durable": StorageProfile(journal_mode="WAL", synchronous="FULL", cache_size=-16384,
+                              mmap_size=0, temp_store="DEFAULT", busy_timeout=5000),
+}
+
+# Create a database URL for SQLAlchemy (aiosqlite runs SQLite calls in its own thread)
+SQLALCHEMY_DATABASE_URL = os.getenv("CHAT_DATABASE_URL", "sqlite+aiosqlite:///./server/server.db")
+
+# Choose the SQLite settings used by the server
+storage_profile = STORAGE_PROFILES[os.getenv("CHAT_STORAGE_PROFILE", "throughput")]
+
+# SQLAlchemy gives file databases of aiosqlite a NullPool, which would open a connection (and a thread) and apply
+# the storage profile again for every session; keep them open instead so the page cache and mmap outlive requests
+if make_url(SQLALCHEMY_DATABASE_URL).database not in (None, "", ":memory:"):
+    pool_args = {"poolclass": AsyncAdaptedQueuePool,
+                 "pool_size": int(os.getenv("CHAT_DATABASE_POOL_SIZE", POOL_SIZE)),
+                 "max_overflow": int(os.getenv("CHAT_DATABASE_MAX_OVERFLOW", MAX_OVERFLOW))}
+else:
+    pool_args = {}
+
+# Create the SQLAlchemy async engine
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, **pool_args)
+
 
-# Create a database URL for SQLAlchemy
-SQLALCHEMY_DATABASE_URL = "sqlite:///./server/server.db"
+@event.listens_for(engine.sync_engine, "connect")
+def apply_storage_profile(dbapi_connection, connection_record):
+    """
+    apply the storage profile to a new connection of the pool
+    :param dbapi_connection: the new connection
+    :param connection_record: pool record of the connection
+    :return:
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in storage_profile.pragmas():
+        cursor.execute(pragma)
+    cursor.close()
 
-# Create the SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 
-# Create a SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create a SessionLocal class handing out async sessions
+# Objects stay readable after commit, so they can be returned without another round-trip to the database
+SessionLocal = sessionmaker(engine, class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False)
 
 # Create a Base class
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
@@ -0,0 +1,52 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from server import models, schemas
+
+# Names of the typed events sent over the websocket as JSON frames
+MESSAGE = "message"
+USER_ONLINE = "user_online"
+USER_OFFLINE = "user_offline"
+USER_BANNED = "user_banned"
+USER_UNBANNED = "user_unbanned"
+
+
+def event_frame(event: str, data):
+    """
+    serialize a typed event into a websocket frame
+    :param event: name of the event
+    :param data: payload of the event (pydantic model or plain data)
+    :return: JSON frame
+    """
+    return json.dumps({"event": event, "data": jsonable_encoder(data)})
+
+
+def message_frame(message: models.Message):
+    """
+    serialize a stored message into a websocket frame
+    :param message: message read from the database
+    :return: JSON frame carrying the serialized schemas.Message
+    """
+    return event_frame(MESSAGE, schemas.Message.from_orm(message))
+
+
+def presence_frame(event: str, user: models.User, is_active: bool):
+    """
+    serialize a presence change of a user into a websocket frame
+    :param event: kind of change (user_online, user_offline, user_banned or user_unbanned)
+    :param user: user whose presence changed
+    :param is_active: whether the user is connected right now
+    :return: JSON frame carrying the serialized schemas.User
+    """
+    return event_frame(event, schemas.User(id=user.id, login=user.login, is_active=is_active,
+                                           is_banned=user.is_banned))
+
+
+def presence_key(user_id: int):
+    """
+    key under which presence frames of one user replace each other while pending
+    :param user_id: id of the user
+    :return: coalescing key
+    """
+    return f"presence:{user_id}"
@@ -0,0 +1,368 @@
+import os
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from server import models
+from server.bus import MessageBus
+from server.versions import versions
+
+# Default number of most recent messages of chat 'general' kept in memory
+GENERAL_WINDOW = 1000
+
+# Default number of most recent messages kept in memory for every other conversation
+CONVERSATION_WINDOW = 200
+
+# Default memory (in bytes) all conversation windows together may take
+HISTORY_BUDGET = 16 * 1024 * 1024
+
+# Approximate memory (in bytes) taken by a cached message apart from its content
+MESSAGE_OVERHEAD = 256
+
+# Bus channel carrying new and deleted messages to the other workers
+MESSAGES_CHANNEL = "chat:messages"
+
+
+def copy_message(db_message: models.Message):
+    """
+    copy of a message not attached to any session, safe to share between requests
+    :param db_message: message read from the database
+    :return: transient models.Message with the same columns
+    """
+    return models.Message(id=db_message.id, from_usr=db_message.from_usr, to_usr=db_message.to_usr,
+                          msg_content=db_message.msg_content, date=db_message.date,
+                          conversation=db_message.conversation)
+
+
+def message_size(message: models.Message):
+    """
+    :param message: cached message
+    :return: approximate memory (in bytes) taken by the message
+    """
+    return MESSAGE_OVERHEAD + len(message.msg_content)
+
+
+def message_payload(db_message: models.Message):
+    """
+    :param db_message: stored message
+    :return: JSON serializable dict with the columns of the message
+    """
+    return {"id": db_message.id, "from_usr": db_message.from_usr, "to_usr": db_message.to_usr,
+            "msg_content": db_message.msg_content, "date": db_message.date.isoformat(),
+            "conversation": db_message.conversation}
+
+
+class MessageWindow:
+    def __init__(self, capacity: int):
+        """
+        ring buffer with the most recent messages of one conversation in (date, id) order
+        :param capacity: maximum number of kept messages
+        """
+        self.capacity = capacity
+        self.messages = deque()
+        self.ids = set()
+        self.bytes = 0
+        # every message with a date later than floor is in the window, None until the window is loaded
+        self.floor = None
+        self.loaded = False
+
+    def load(self, latest: list):
+        """
+        fill the window with messages read from the database, keeping the ones that arrived meanwhile
+        :param latest: up to capacity + 1 most recent messages of the conversation, newest first
+        :return:
+        """
+        if len(latest) > self.capacity:
+            self.floor = latest[self.capacity].date
+            latest = latest[:self.capacity]
+        else:
+            self.floor = datetime.min
+        self.loaded = True
+        for db_message in reversed(latest):
+            self.add(db_message)
+
+    def add(self, db_message: models.Message):
+        """
+        put a new message into the window, dropping the oldest one when the window is full
+        :param db_message: stored message
+        :return:
+        """
+        if self.capacity <= 0:
+            return
+        if db_message.id in self.ids or (self.floor is not None and db_message.date <= self.floor):
+            return
+        message = copy_message(db_message)
+        if len(self.messages) >= self.capacity:
+            oldest = self.messages.popleft()
+            self.ids.discard(oldest.id)
+            self.bytes -= message_size(oldest)
+            if self.floor is None or oldest.date > self.floor:
+                self.floor = oldest.date
+        key = (message.date, message.id)
+        position = len(self.messages)
+        while position and (self.messages[position - 1].date, self.messages[position - 1].id) > key:
+            position -= 1
+        self.messages.insert(position, message)
+        self.ids.add(message.id)
+        self.bytes += message_size(message)
+
+    def discard(self, message_id: int):
+        """
+        remove a deleted message
+        :param message_id: id of the deleted message
+        :return:
+        """
+        if message_id not in self.ids:
+            return
+        self.ids.discard(message_id)
+        for message in self.messages:
+            if message.id == message_id:
+                self.messages.remove(message)
+                self.bytes -= message_size(message)
+                return
+
+    def covers(self, date: datetime):
+        """
+        :param date: date after which messages are searched for
+        :return: True if all messages later than the date are in the window
+        """
+        return self.loaded and date >= self.floor
+
+    def since(self, date: datetime, skip: int = 0, limit: int = 100, after_date: datetime = None,
+              after_id: int = None):
+        """
+        messages later than the given date in (date, id) order, like crud.get_messages_to_user_from_date
+        :param date: date after which messages are searched for, must be covered by the window
+        :param skip: number of first missed results
+        :param limit: limit for searched queries
+        :param after_date: date of the last seen message, only later messages are returned
+        :param after_id: id of the last seen message, breaks ties between messages with the same date
+        :return: list of messages
+        """
+        found = []
+        for message in reversed(self.messages):
+            if message.date <= date:
+                break
+            if after_date is not None:
+                if after_id is None and message.date <= after_date:
+                    break
+                if after_id is not None and (message.date, message.id) <= (after_date, after_id):
+                    break
+            found.append(message)
+        found.reverse()
+        return found[skip:skip + limit]
+
+    def size(self):
+        """
+        :return: number of kept messages
+        """
+        return len(self.messages)
+
+
+class MessageHistory:
+    def __init__(self, general_window: int = GENERAL_WINDOW, conversation_window: int = CONVERSATION_WINDOW,
+                 budget: int = HISTORY_BUDGET):
+        """
+        recent messages kept in memory in front of the database
+        :param general_window: number of most recent messages of chat 'general' kept in memory, 0 disables it
+        :param conversation_window: number of most recent messages kept for every other conversation,
+                                    0 disables these windows
+        :param budget: memory (in bytes) all conversation windows together may take, least recently used
+                       conversations are dropped beyond it
+        """
+        self.general = MessageWindow(general_window)
+        self.conversation_window = conversation_window
+        self.budget = budget
+        self.conversations = OrderedDict()
+        self.bytes = 0
+        self.bus = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evicted = 0
+
+    def general_since(self, date: datetime, skip: int = 0, limit: int = 100, after_date: datetime = None,
+                      after_id: int = None):
+        """
+        messages of chat 'general' later than the given date, when the window holds all of them
+        :param date: date after which messages are searched for
+        :param skip: number of first missed results
+        :param limit: limit for searched queries
+        :param after_date: date of the last seen message
+        :param after_id: id of the last seen message
+        :return: list of messages or None if the database has to be asked
+        """
+        if self.general.capacity <= 0 or not self.general.covers(date):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.general.since(date, skip, limit, after_date, after_id)
+
+    def conversation_since(self, conversation: str, date: datetime, skip: int = 0, limit: int = 100,
+                           after_date: datetime = None, after_id: int = None):
+        """
+        messages of a conversation later than the given date, when its window holds all of them
+        :param conversation: key of the conversation (models.conversation_key)
+        :param date: date after which messages are searched for
+        :param skip: number of first missed results
+        :param limit: limit for searched queries
+        :param after_date: date of the last seen message
+        :param after_id: id of the last seen message
+        :return: list of messages or None if the window is missing or too short
+        """
+        window = self.conversations.get(conversation)
+        if window is None or not window.covers(date):
+            self.misses += 1
+            return None
+        self.conversations.move_to_end(conversation)
+        self.hits += 1
+        return window.since(date, skip, limit, after_date, after_id)
+
+    def open_conversation(self, conversation: str):
+        """
+        create the window of a conversation before its messages are read from the database,
+        so that messages stored meanwhile are not lost
+        :param conversation: key of the conversation (models.conversation_key)
+        :return: the window or None if conversation windows are disabled
+        """
+        if self.conversation_window <= 0 or self.budget <= 0:
+            return None
+        window = self.conversations.get(conversation)
+        if window is None:
+            window = self.conversations[conversation] = MessageWindow(self.conversation_window)
+        return window
+
+    def load_conversation(self, conversation: str, window: MessageWindow, latest: list):
+        """
+        fill the window of a conversation with messages read from the database
+        :param conversation: key of the conversation (models.conversation_key)
+        :param window: window returned by open_conversation
+        :param latest: up to capacity + 1 most recent messages of the conversation, newest first
+        :return:
+        """
+        self.loads += 1
+        self._resize(conversation, window, lambda: window.load(latest))
+
+    def _resize(self, conversation: str, window: MessageWindow, change):
+        """
+        apply a change to a conversation window and drop least recently used conversations beyond the budget
+        :param conversation: key of the conversation
+        :param window: changed window, possibly already dropped
+        :param change: function changing the window
+        :return:
+        """
+        before = window.bytes
+        change()
+        if self.conversations.get(conversation) is not window:
+            return
+        self.bytes += window.bytes - before
+        while self.bytes > self.budget and self.conversations:
+            _, oldest = self.conversations.popitem(last=False)
+            self.bytes -= oldest.bytes
+            self.evicted += 1
+
+    def add(self, db_messages: list):
+        """
+        put new messages into the windows of this worker
+        :param db_messages: stored messages
+        :return:
+        """
+        for db_message in db_messages:
+            versions.bump_conversation(db_message.conversation)
+            if db_message.conversation == models.conversation_key(0, 0):
+                self.general.add(db_message)
+                continue
+            window = self.conversations.get(db_message.conversation)
+            if window is not None:
+                self.conversations.move_to_end(db_message.conversation)
+                self._resize(db_message.conversation, window, lambda: window.add(db_message))
+
+    def discard(self, message_id: int, conversation: str):
+        """
+        remove a deleted message from the windows of this worker
+        :param message_id: id of the deleted message
+        :param conversation: key of the conversation of the message
+        :return:
+        """
+        versions.bump_conversation(conversation)
+        if conversation == models.conversation_key(0, 0):
+            self.general.discard(message_id)
+            return
+        window = self.conversations.get(conversation)
+        if window is not None:
+            self._resize(conversation, window, lambda: window.discard(message_id))
+
+    def reset(self):
+        """
+        forget the windows of this worker, used when changes of other workers may have been missed;
+        conversation windows are loaded again on their next read, the general window has to be loaded by the caller
+        :return:
+        """
+        self.general = MessageWindow(self.general.capacity)
+        self.conversations.clear()
+        self.bytes = 0
+
+    async def record(self, db_messages: list):
+        """
+        put new messages into the windows of all workers
+        :param db_messages: stored messages
+        :return:
+        """
+        self.add(db_messages)
+        if self.bus is not None:
+            await self.bus.forward(MESSAGES_CHANNEL, {"op": "add", "messages": [message_payload(db_message)
+                                                                             for db_message in db_messages]})
+
+    async def forget(self, message_id: int, conversation: str):
+        """
+        remove a deleted message from the windows of all workers
+        :param message_id: id of the deleted message
+        :param conversation: key of the conversation of the message
+        :return:
+        """
+        self.discard(message_id, conversation)
+        if self.bus is not None:
+            await self.bus.forward(MESSAGES_CHANNEL, {"op": "delete", "id": message_id,
+                                                      "conversation": conversation})
+
+    def attach(self, bus: MessageBus):
+        """
+        share new and deleted messages with the other workers through the bus
+        :param bus: bus shared with the other workers
+        :return:
+        """
+        self.bus = bus
+        bus.subscribe(MESSAGES_CHANNEL, self._on_event)
+
+    async def _on_event(self, event: dict):
+        """
+        apply a change published by another worker
+        :param event: dict with the operation (add or delete) and the messages or the id and conversation
+        :return:
+        """
+        if event["op"] == "delete":
+            self.discard(event["id"], event["conversation"])
+            return
+        self.add([models.Message(**dict(message, date=datetime.fromisoformat(message["date"])))
+                  for message in event["messages"]])
+
+    def summary(self):
+        """
+        :return: dict with the sizes of the windows and the hit and miss counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "general": self.general.size(),
+            "conversations": len(self.conversations),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "loads": self.loads,
+            "evicted": self.evicted,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+message_history = MessageHistory(general_window=int(os.getenv("CHAT_GENERAL_WINDOW", GENERAL_WINDOW)),
+                                 conversation_window=int(os.getenv("CHAT_CONVERSATION_WINDOW", CONVERSATION_WINDOW)),
+                                 budget=int(os.getenv("CHAT_HISTORY_BUDGET", HISTORY_BUDGET)))
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+from server import crud, schemas
+from server.history import message_history
+
+# Default maximum number of messages written in one transaction
+MAX_BATCH = 256
+
+# Default time (in seconds) the first message of a batch waits for others to join it
+MAX_DELAY = 0.002
+
+# Put in the queue by stop(), everything queued before it is written before the writer returns
+STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBatcher:
+    def __init__(self, session_factory, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY):
+        """
+        collects new messages into micro-batches and stores each batch in a single transaction
+        :param session_factory: factory of async database sessions (SessionLocal)
+        :param max_batch: maximum number of messages written in one transaction
+        :param max_delay: time (in seconds) the first message of a batch waits for others to join it
+        """
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue()
+        self.task = None
+        self.batches = 0
+        self.messages = 0
+
+    def start(self):
+        """
+        start the background writer
+        :return:
+        """
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        write everything that is still queued and stop the background writer
+        :return:
+        """
+        if self.task is None:
+            return
+        await self.queue.put(STOP)
+        await self.task
+        self.task = None
+
+    async def submit(self, message: schemas.MessageCreate, receiver_id: int):
+        """
+        queue a new message and wait until the batch containing it is committed
+        :param message: message sent to the user
+        :param receiver_id: id of the user who received the message
+        :return: added message with its id and date assigned
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((message, receiver_id, future))
+        return await future
+
+    async def _run(self):
+        """
+        gather queued messages until the batch is full or the delay has passed, then write them;
+        once stop() has queued STOP the batch being gathered and the rest of the queue are written before returning
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if self.queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self.queue.get_nowait()
+                if item is STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+        # messages submitted while stopping
+        batch = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.max_batch):
+            await self._write(batch[start:start + self.max_batch])
+
+    async def _write(self, batch: list):
+        """
+        store a batch in one transaction and resolve the waiting requests;
+        if the transaction fails the messages are retried one by one so that only the faulty ones fail,
+        once it is committed the messages are stored and no later failure makes them fail or retried
+        :param batch: list of (message, receiver_id, future) tuples
+        :return:
+        """
+        try:
+            async with self.session_factory() as db:
+                db_messages = await crud.create_messages(db, [(message, receiver_id)
+                                                              for message, receiver_id, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                for entry in batch:
+                    await self._write([entry])
+                return
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.messages += len(batch)
+        try:
+            await message_history.record(db_messages)
+        except Exception:
+            logger.exception("Recording %d stored messages in the history failed", len(db_messages))
+        for (_, _, future), db_message in zip(batch, db_messages):
+            if not future.done():
+                future.set_result(db_message)
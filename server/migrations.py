@@ -0,0 +1,31 @@
+from sqlalchemy import inspect, text
+
+from server import models
+
+
+def add_conversation_column(connection):
+    """
+    add the conversation key and its index to a messages table created before they existed
+    :param connection: synchronous connection (run through AsyncConnection.run_sync)
+    :return:
+    """
+    columns = [column["name"] for column in inspect(connection).get_columns("messages")]
+    if "conversation" not in columns:
+        connection.execute(text("ALTER TABLE messages ADD COLUMN conversation VARCHAR"))
+        # must match models.conversation_key
+        connection.execute(text("UPDATE messages SET conversation = CASE "
+                                "WHEN to_usr = 0 THEN '0' "
+                                "WHEN from_usr < to_usr THEN from_usr || ':' || to_usr "
+                                "ELSE to_usr || ':' || from_usr END"))
+    for index in models.Message.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def upgrade(connection):
+    """
+    create missing tables and bring existing ones up to date with the models
+    :param connection: synchronous connection (run through AsyncConnection.run_sync)
+    :return:
+    """
+    models.Base.metadata.create_all(connection)
+    add_conversation_column(connection)
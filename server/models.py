@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, DateTime
 
 from .database import Base
 
@@ -14,9 +14,23 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_banned = Column(Boolean, default=False)
 
+def conversation_key(sender_id: int, receiver_id: int):
+    """
+    normalized key of the conversation a message belongs to, the same in both directions
+    :param sender_id: id of the user who sent the message
+    :param receiver_id: id of the user who received the message, 0 for chat 'general'
+    :return: '0' for chat 'general', otherwise 'smaller id:bigger id'
+    """
+    if receiver_id == 0 or sender_id == 0:
+        return "0"
+    return f"{min(sender_id, receiver_id)}:{max(sender_id, receiver_id)}"
+
+
 # Create SQLAlchemy models from the Base class
 class Message(Base):
     __tablename__ = "messages"
+    # History of a conversation is read in (date, id) order, starting after a given date or cursor
+    __table_args__ = (Index("ix_messages_conversation_date_id", "conversation", "date", "id"),)
 
     # Create model attributes/columns
     id = Column(Integer, primary_key=True, index=True)
@@ -24,3 +38,4 @@ class Message(Base):
     to_usr = Column(Integer, ForeignKey('users.id'), index=True, nullable=False)
     msg_content = Column(String, nullable=False)
     date = Column(DateTime, nullable=False)
+    conversation = Column(String)
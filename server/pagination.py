@@ -0,0 +1,88 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Query, Response
+
+# Response header carrying the cursor of the next page, missing on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def cursor_query():
+    """
+    declaration of the optional cursor query parameter of list endpoints
+    :return: query parameter defaulting to None (first page)
+    """
+    return Query(None, description=f"{NEXT_CURSOR_HEADER} header of the previous page")
+
+
+def encode_cursor(*key):
+    """
+    pack the sort key of the last returned row into an opaque cursor
+    :param key: values of the sort key (ints and datetimes)
+    :return: url-safe cursor token
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int):
+    """
+    unpack a cursor created by encode_cursor
+    :param cursor: cursor token received from the client
+    :param size: expected number of values in the sort key
+    :return: list of the key values
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_id_cursor(cursor: str):
+    """
+    unpack a cursor of a list sorted by id
+    :param cursor: cursor token received from the client, may be None
+    :return: id of the last row of the previous page or None
+    """
+    if cursor is None:
+        return None
+    after_id, = decode_cursor(cursor, 1)
+    if not isinstance(after_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after_id
+
+
+def decode_date_id_cursor(cursor: str):
+    """
+    unpack a cursor of a list sorted by (date, id)
+    :param cursor: cursor token received from the client, may be None
+    :return: (date, id) of the last row of the previous page or (None, None)
+    """
+    if cursor is None:
+        return None, None
+    after_date, after_id = decode_cursor(cursor, 2)
+    try:
+        after_date = datetime.fromisoformat(after_date)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after_date, after_id
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key):
+    """
+    add the cursor of the next page to the response when the page is full
+    :param response: response being prepared
+    :param rows: rows of the current page
+    :param limit: requested page size
+    :param key: function returning the sort key of a row as a tuple
+    :return:
+    """
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
@@ -0,0 +1,136 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of PBKDF2-SHA256 iterations of a new password hash
+ITERATIONS = 600000
+
+# Default number of passwords hashed or verified at the same time
+WORKERS = 4
+
+# Prefix of hashes made by PasswordHasher, stored passwords without it are legacy plaintext ones
+ALGORITHM = "pbkdf2_sha256"
+
+# Length (in bytes) of the random salt of a new password hash
+SALT_SIZE = 16
+
+
+def hash_password(password: str, iterations: int, salt: bytes = None):
+    """
+    hash a password with PBKDF2-SHA256, blocking - run it in the worker pool
+    :param password: password in plaintext
+    :param iterations: number of PBKDF2 iterations
+    :param salt: salt of the hash, random when not given
+    :return: string like pbkdf2_sha256$iterations$salt$hash to be stored in the database
+    """
+    salt = salt if salt is not None else os.urandom(SALT_SIZE)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([ALGORITHM, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def verify_password(password: str, stored: str):
+    """
+    compare a password with a stored hash (or a legacy plaintext password), blocking - run it in the worker pool
+    :param password: password in plaintext
+    :param stored: value of the password column
+    :return: True if the password is correct
+    """
+    if not is_hashed(stored):
+        return hmac.compare_digest(stored.encode(), password.encode())
+    _, iterations, salt, _ = stored.split("$")
+    return hmac.compare_digest(hash_password(password, int(iterations), base64.b64decode(salt)).encode(),
+                               stored.encode())
+
+
+def is_hashed(stored: str):
+    """
+    :param stored: value of the password column
+    :return: True if the value is a hash made by hash_password
+    """
+    return stored.startswith(ALGORITHM + "$")
+
+
+class PasswordHasher:
+    def __init__(self, iterations: int = ITERATIONS, workers: int = WORKERS):
+        """
+        hashes and verifies passwords in a pool of threads so that the event loop keeps serving other requests,
+        hashlib releases the GIL while it computes PBKDF2, so the threads run in parallel
+        :param iterations: number of PBKDF2 iterations of new hashes, older hashes are upgraded on login
+        :param workers: number of passwords hashed or verified at the same time, further ones wait in line
+        """
+        self.iterations = iterations
+        self.workers = workers
+        self.executor = None
+        self.hashed = 0
+        self.verified = 0
+        self.upgraded = 0
+        # compared against when the login is unknown so that a missing user takes as long as a wrong password
+        self.dummy = None
+
+    async def _run(self, function, *args):
+        """
+        run a blocking function in the worker pool
+        :param function: function to run
+        :param args: arguments of the function
+        :return: result of the function
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="passwords")
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def hash(self, password: str):
+        """
+        :param password: password in plaintext
+        :return: hash to be stored in the database
+        """
+        self.hashed += 1
+        return await self._run(hash_password, password, self.iterations)
+
+    async def verify(self, password: str, stored: str = None):
+        """
+        :param password: password in plaintext
+        :param stored: value of the password column, None if the user does not exist
+        :return: True if the password is correct
+        """
+        self.verified += 1
+        if stored is None:
+            if self.dummy is None:
+                self.dummy = await self._run(hash_password, "", self.iterations)
+            await self._run(verify_password, password, self.dummy)
+            return False
+        return await self._run(verify_password, password, stored)
+
+    def needs_upgrade(self, stored: str):
+        """
+        :param stored: value of the password column
+        :return: True if the value is a plaintext password or a hash with a different cost
+        """
+        return not is_hashed(stored) or stored.split("$")[1] != str(self.iterations)
+
+    def stop(self):
+        """
+        stop the worker threads
+        :return:
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def summary(self):
+        """
+        :return: dict with the cost, the pool size and the counters
+        """
+        return {
+            "iterations": self.iterations,
+            "workers": self.workers,
+            "hashed": self.hashed,
+            "verified": self.verified,
+            "upgraded": self.upgraded,
+        }
+
+
+password_hasher = PasswordHasher(iterations=int(os.getenv("CHAT_PASSWORD_ITERATIONS", ITERATIONS)),
+                                 workers=int(os.getenv("CHAT_PASSWORD_WORKERS", WORKERS)))
@@ -0,0 +1,208 @@
+import asyncio
+
+from server import crud, models, schemas
+from server.bus import InProcessBus, MessageBus
+from server.versions import versions
+
+# Default time (in seconds) between two snapshots of the presence to the database
+SNAPSHOT_INTERVAL = 30.0
+
+# Bus channel keeping the registries of all workers in step
+PRESENCE_CHANNEL = "chat:presence"
+
+
+class PresenceRegistry:
+    def __init__(self, snapshot_interval: float = SNAPSHOT_INTERVAL, bus: MessageBus = None):
+        """
+        in-memory source of truth for the is_active status of users
+        :param snapshot_interval: time (in seconds) between two snapshots to the database, 0 disables them
+        :param bus: bus shared with the other workers, a single worker bus by default
+        """
+        self.snapshot_interval = snapshot_interval
+        self.users = dict()
+        self.active = set()
+        self.dirty = set()
+        self.task = None
+        self.bus = bus if bus is not None else InProcessBus()
+        self.bus.subscribe(PRESENCE_CHANNEL, self._on_event)
+
+    async def load(self, db):
+        """
+        fill the registry with all users, everybody starts offline
+        :param db: the database being searched
+        :return:
+        """
+        self.users.clear()
+        self.active.clear()
+        self.dirty.clear()
+        for db_user in await crud.get_all_users(db):
+            self.add(db_user)
+
+    async def resync(self, db, connected: list):
+        """
+        read all users again after changes of other workers may have been missed, their status being the last
+        snapshot in the database except for the users connected to this worker, who stay active
+        :param db: the database being searched
+        :param connected: ids of the users connected to this worker
+        :return:
+        """
+        db_users = await crud.get_all_users(db)
+        self.users.clear()
+        self.active = {db_user.id for db_user in db_users if db_user.is_active} | set(connected)
+        self.dirty.clear()
+        for db_user in db_users:
+            self.add(db_user)
+
+    def add(self, db_user: models.User):
+        """
+        register a new user or refresh the stored data of an existing one in this worker only
+        :param db_user: user read from the database (or a schemas.User carrying its stored status)
+        :return:
+        """
+        self.users[db_user.id] = self.describe(db_user)
+        versions.bump_user(db_user.id)
+        if db_user.is_active != (db_user.id in self.active):
+            self.dirty.add(db_user.id)
+
+    def get(self, user_id: int):
+        """
+        current state of the user with the given id
+        :param user_id: id of the searched user
+        :return: found user or None
+        """
+        return self.users.get(user_id)
+
+    def is_active(self, user_id: int):
+        """
+        :param user_id: id of the user
+        :return: True if the user is active
+        """
+        return user_id in self.active
+
+    def set_active(self, user_id: int, is_active: bool):
+        """
+        change the status (is_active) of a user in this worker only
+        :param user_id: id of the user
+        :param is_active: new status
+        :return: current state of the user or None if the user is unknown
+        """
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        if is_active != (user_id in self.active):
+            if is_active:
+                self.active.add(user_id)
+            else:
+                self.active.discard(user_id)
+            self.dirty.add(user_id)
+            user = self.users[user_id] = user.copy(update={"is_active": is_active})
+            versions.bump_user(user_id)
+        return user
+
+    async def update_active(self, user_id: int, is_active: bool):
+        """
+        change the status (is_active) of a user in the registries of all workers
+        :param user_id: id of the user
+        :param is_active: new status
+        :return: current state of the user or None if the user is unknown
+        """
+        if user_id not in self.users:
+            return None
+        await self.bus.publish(PRESENCE_CHANNEL, {"op": "active", "id": user_id, "is_active": is_active})
+        return self.users[user_id]
+
+    async def update_user(self, db_user: models.User):
+        """
+        register or refresh a user in the registries of all workers
+        :param db_user: user read from the database
+        :return: current state of the user
+        """
+        await self.bus.publish(PRESENCE_CHANNEL, {"op": "user", "id": db_user.id, "login": db_user.login,
+                                                  "is_banned": db_user.is_banned, "is_active": db_user.is_active})
+        return self.users[db_user.id]
+
+    async def _on_event(self, event: dict):
+        """
+        apply a change published on the bus
+        :param event: dict with the operation (active or user) and the changed fields
+        :return:
+        """
+        if event["op"] == "active":
+            self.set_active(event["id"], event["is_active"])
+        else:
+            self.add(schemas.User(id=event["id"], login=event["login"], is_banned=event["is_banned"],
+                                  is_active=event["is_active"]))
+
+    def with_status(self, is_active: bool):
+        """
+        all users with a given status
+        :param is_active: status of searched users
+        :return: list of users
+        """
+        if is_active:
+            return [self.users[user_id] for user_id in self.active]
+        return [user for user_id, user in self.users.items() if user_id not in self.active]
+
+    def describe(self, db_user: models.User):
+        """
+        copy of a user read from the database with the status taken from the registry
+        :param db_user: user read from the database
+        :return: user to be returned to the client
+        """
+        return schemas.User(id=db_user.id, login=db_user.login, is_banned=db_user.is_banned,
+                            is_active=db_user.id in self.active)
+
+    async def snapshot(self, session_factory):
+        """
+        write the status of users changed since the last snapshot to the database
+        :param session_factory: factory of async database sessions (SessionLocal)
+        :return:
+        """
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        try:
+            async with session_factory() as db:
+                await crud.update_users_active(db, [user_id for user_id in dirty if user_id in self.active], True)
+                await crud.update_users_active(db, [user_id for user_id in dirty if user_id not in self.active],
+                                               False)
+        except Exception:
+            self.dirty |= dirty
+            raise
+
+    def start(self, session_factory):
+        """
+        start taking periodic snapshots
+        :param session_factory: factory of async database sessions (SessionLocal)
+        :return:
+        """
+        if self.task is None and self.snapshot_interval > 0:
+            self.task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self, session_factory):
+        """
+        stop the periodic snapshots and take the last one
+        :param session_factory: factory of async database sessions (SessionLocal)
+        :return:
+        """
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.snapshot(session_factory)
+
+    async def _run(self, session_factory):
+        """
+        take a snapshot every snapshot_interval seconds
+        :param session_factory: factory of async database sessions (SessionLocal)
+        :return:
+        """
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.snapshot(session_factory)
+            except Exception:
+                pass
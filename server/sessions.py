@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+from fastapi.security import HTTPBearer
+
+# Response header carrying the session token issued at login and registration
+SESSION_TOKEN_HEADER = "X-Session-Token"
+
+# Default time (in seconds) a session token stays valid
+TOKEN_TTL = 24 * 60 * 60
+
+# Reads "Authorization: Bearer <token>" without rejecting requests that have none
+bearer = HTTPBearer(auto_error=False)
+
+
+class SessionTokens:
+    def __init__(self, secret: str = None, ttl: float = TOKEN_TTL):
+        """
+        stateless session tokens: the id of the user and an expiry time signed with HMAC-SHA256,
+        checked without touching the database
+        :param secret: key shared by all workers, a random one (valid only in this process) when not given
+        :param ttl: time (in seconds) a token stays valid
+        """
+        self.secret = (secret or secrets.token_hex(32)).encode()
+        self.ttl = ttl
+        self.issued = 0
+        self.rejected = 0
+
+    def _sign(self, payload: str):
+        """
+        :param payload: signed part of the token
+        :return: url-safe signature of the payload
+        """
+        digest = hmac.new(self.secret, payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+    def issue(self, user_id: int):
+        """
+        :param user_id: id of the logged in user
+        :return: token like <user_id>.<expiry>.<signature>
+        """
+        self.issued += 1
+        payload = f"{user_id}.{int(time.time() + self.ttl)}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str):
+        """
+        check the signature (in constant time) and the expiry of a token
+        :param token: token received from the client
+        :return: id of the user or None if the token is forged, malformed or expired
+        """
+        payload, _, signature = token.rpartition(".")
+        user_id, _, expires = payload.partition(".")
+        if not hmac.compare_digest(self._sign(payload).encode(), signature.encode()) \
+                or not user_id.isdigit() or not expires.isdigit() or int(expires) < time.time():
+            self.rejected += 1
+            return None
+        return int(user_id)
+
+    def summary(self):
+        """
+        :return: dict with the issued and rejected tokens
+        """
+        return {"ttl": self.ttl, "issued": self.issued, "rejected": self.rejected}
+
+
+session_tokens = SessionTokens(secret=os.getenv("CHAT_SECRET_KEY"), ttl=float(os.getenv("CHAT_TOKEN_TTL", TOKEN_TTL)))
@@ -0,0 +1,14 @@
+"""
+tests of the server, which read their settings from the environment when server modules are imported:
+they get a database of their own and cheap password hashes
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+DATABASE_DIRECTORY = tempfile.mkdtemp(prefix="chat-test-")
+atexit.register(shutil.rmtree, DATABASE_DIRECTORY, ignore_errors=True)
+
+os.environ["CHAT_DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(DATABASE_DIRECTORY, 'chat.db')}"
+os.environ["CHAT_PASSWORD_ITERATIONS"] = "1000"
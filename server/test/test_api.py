@@ -0,0 +1,82 @@
+"""
+tests of the HTTP endpoints through the FastAPI test client, run from the root of the repository:
+    python -m pytest -q server/test
+"""
+import unittest
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+class TestApi(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(main.app)
+        cls.client.__enter__()
+        cls.users = {}
+        for login in ("alice", "bob", "carol"):
+            response = cls.client.post("/users/", json={"login": f"api-{login}", "password": "secret"})
+            token = response.headers["x-session-token"]
+            cls.users[login] = (response.json()["id"], {"Authorization": f"Bearer {token}"})
+        alice, headers = cls.users["alice"]
+        bob, _ = cls.users["bob"]
+        for receiver in (bob, 0):
+            response = cls.client.post(f"/message/{receiver}/", json={"msg_content": "hello", "from_usr": alice},
+                                       headers=headers)
+            assert response.status_code == 200, response.text
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+
+    def conversation_paths(self):
+        """
+        :return: both endpoints reading the conversation of alice and bob
+        """
+        alice, bob = self.users["alice"][0], self.users["bob"][0]
+        return [f"/message/{bob}/{alice}/", f"/message/{bob}/{alice}/1970-01-01T00:00:00"]
+
+    def test_private_conversation_needs_token(self):
+        for path in self.conversation_paths():
+            self.assertEqual(self.client.get(path).status_code, 401)
+
+    def test_private_conversation_of_others(self):
+        for path in self.conversation_paths():
+            self.assertEqual(self.client.get(path, headers=self.users["carol"][1]).status_code, 403)
+
+    def test_private_conversation_of_participant(self):
+        for path in self.conversation_paths():
+            response = self.client.get(path, headers=self.users["bob"][1])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([message["msg_content"] for message in response.json()], ["hello"])
+
+    def test_resync(self):
+        carol, headers = self.users["carol"]
+        tag = self.client.get(f"/users/{carol}").headers["etag"]
+        # a worker that missed the registration of carol on another worker rejects her token
+        user = main.presence.users.pop(carol)
+        self.assertEqual(self.client.get(self.conversation_paths()[0], headers=headers).status_code, 401)
+        self.client.portal.call(main.resync)
+        self.assertEqual(main.presence.get(carol).login, user.login)
+        self.assertEqual(self.client.get(self.conversation_paths()[0], headers=headers).status_code, 403)
+        self.assertEqual(self.client.get(f"/users/{carol}", headers={"If-None-Match": tag}).status_code, 200)
+        self.assertEqual(len(main.message_history.general.since(datetime(1970, 1, 1))), 1)
+
+    def test_if_none_match_star(self):
+        self.assertEqual(self.client.get("/users/999999", headers={"If-None-Match": "*"}).status_code, 404)
+        response = self.client.get(f"/users/{self.users['bob'][0]}", headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 200)
+        tag = response.headers["etag"]
+        response = self.client.get(f"/users/{self.users['bob'][0]}", headers={"If-None-Match": f'"x", {tag}'})
+        self.assertEqual(response.status_code, 304)
+
+    def test_general_without_token(self):
+        response = self.client.get("/message/0/0/1970-01-01T00:00:00")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hello", [message["msg_content"] for message in response.json()])
+
+
+if __name__ == "__main__":
+    unittest.main()
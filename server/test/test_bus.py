@@ -0,0 +1,161 @@
+"""
+tests of RedisBus against the stand-in broker, run from the root of the repository:
+    python -m pytest -q server/test
+"""
+import asyncio
+import unittest
+
+from server.broker import Broker
+from server.bus import InProcessBus, MessageBus, RedisBus
+
+
+class DroppingBroker(Broker):
+    def __init__(self):
+        """
+        broker able to drop all of its client connections at once
+        """
+        super().__init__()
+        self.writers = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        try:
+            await super().handle(reader, writer)
+        finally:
+            self.writers.discard(writer)
+
+    def drop(self):
+        """
+        close every client connection, as a restarting broker would
+        :return:
+        """
+        for writer in list(self.writers):
+            writer.close()
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    """
+    poll a condition until it holds
+    :param condition: function returning a bool
+    :param timeout: time (in seconds) after which the test fails
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+class TestRedisBus(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.broker = DroppingBroker()
+        self.server = await asyncio.start_server(self.broker.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.received = {"first": [], "second": []}
+        self.buses = {}
+        for name in self.received:
+            bus = RedisBus("127.0.0.1", port, reconnect_delay=0.05)
+
+            async def handler(payload, name=name):
+                self.received[name].append(payload)
+
+            bus.subscribe("events", handler)
+            await bus.start()
+            self.buses[name] = bus
+
+    async def asyncTearDown(self):
+        for bus in self.buses.values():
+            await bus.stop()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_cross_delivery(self):
+        await self.buses["first"].publish("events", {"n": 1})
+        await self.buses["second"].publish("events", {"n": 2})
+        await wait_for(lambda: len(self.received["first"]) == 2 and len(self.received["second"]) == 2)
+        self.assertCountEqual(self.received["first"], [{"n": 1}, {"n": 2}])
+        self.assertCountEqual(self.received["second"], [{"n": 1}, {"n": 2}])
+        self.assertEqual(self.buses["first"].received, 1)
+        self.assertEqual(self.buses["second"].received, 1)
+
+    async def test_no_echo(self):
+        for n in range(10):
+            await self.buses["first"].publish("events", {"n": n})
+        await wait_for(lambda: len(self.received["second"]) == 10)
+        # the payloads of a bus reach its own handlers only once, through dispatch, never back from the broker
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.received["first"], [{"n": n} for n in range(10)])
+        self.assertEqual(self.buses["first"].received, 0)
+
+    async def test_reconnect(self):
+        await self.buses["first"].publish("events", {"n": 1})
+        await wait_for(lambda: len(self.received["second"]) == 1)
+
+        self.broker.drop()
+        await wait_for(lambda: self.buses["first"].writer is None and self.buses["second"].writer is None)
+        # the subscribers are back once the broker knows both of them again
+        await wait_for(lambda: len(self.broker.channels["events"]) == 2)
+
+        with self.assertNoLogs("server.bus", level="WARNING"):
+            await self.buses["first"].publish("events", {"n": 2})
+            await self.buses["second"].publish("events", {"n": 3})
+        await wait_for(lambda: len(self.received["first"]) == 3 and len(self.received["second"]) == 3)
+        self.assertCountEqual(self.received["first"], [{"n": 1}, {"n": 2}, {"n": 3}])
+        self.assertCountEqual(self.received["second"], [{"n": 1}, {"n": 2}, {"n": 3}])
+        self.assertEqual(self.buses["first"].failed, 0)
+
+    async def test_resync_after_reconnect(self):
+        resyncs = {name: [] for name in self.buses}
+        for name, bus in self.buses.items():
+
+            async def resync(name=name):
+                resyncs[name].append(len(self.received[name]))
+
+            bus.on_resync(resync)
+        await self.buses["first"].publish("events", {"n": 1})
+        await wait_for(lambda: len(self.received["second"]) == 1)
+        self.assertEqual(resyncs, {"first": [], "second": []})
+
+        self.broker.drop()
+        await wait_for(lambda: resyncs["first"] and resyncs["second"])
+        # the handlers run once per lost subscription, before payloads published afterwards are dispatched
+        await self.buses["first"].publish("events", {"n": 2})
+        await wait_for(lambda: len(self.received["second"]) == 2)
+        self.assertEqual(resyncs, {"first": [1], "second": [1]})
+
+    async def test_publish_failure_is_logged(self):
+        self.server.close()
+        self.broker.drop()
+        await self.server.wait_closed()
+        await wait_for(lambda: self.buses["first"].writer is None)
+
+        with self.assertLogs("server.bus", level="WARNING") as logs:
+            await self.buses["first"].publish("events", {"n": 1})
+        self.assertIn("events", logs.output[0])
+        self.assertEqual(self.buses["first"].failed, 1)
+        # the payload still reached the handlers of the publishing worker
+        self.assertEqual(self.received["first"], [{"n": 1}])
+
+
+class TestInProcessBus(unittest.IsolatedAsyncioTestCase):
+    async def test_backend_required(self):
+        with self.assertRaises(TypeError):
+            MessageBus()
+
+    async def test_local_delivery(self):
+        bus = InProcessBus()
+        received = []
+
+        async def handler(payload):
+            received.append(payload)
+
+        bus.subscribe("events", handler)
+        await bus.publish("events", {"n": 1})
+        self.assertEqual(received, [{"n": 1}])
+        self.assertEqual(bus.summary()["published"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+tests of the outbound queues of ConnectionManager with sockets that stop reading, run from the root of the repository:
+    python -m pytest -q server/test
+"""
+import asyncio
+import json
+import unittest
+
+from server import events, models
+from server.connections import COALESCE, DROP_OLDEST, ConnectionManager
+
+
+class StuckWebSocket:
+    def __init__(self):
+        """
+        socket whose client does not read until release() is called
+        """
+        self.sent = []
+        self.reading = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        await self.reading.wait()
+        self.sent.append(message)
+
+    async def close(self):
+        pass
+
+    def release(self):
+        self.reading.set()
+
+
+def presence(user_id: int, is_active: bool):
+    """
+    :return: presence frame of a user and its coalescing key
+    """
+    user = models.User(id=user_id, login=f"user{user_id}", is_banned=False)
+    return (events.presence_frame(events.USER_ONLINE if is_active else events.USER_OFFLINE, user, is_active),
+            events.presence_key(user_id))
+
+
+class TestOverflow(unittest.IsolatedAsyncioTestCase):
+    async def connect(self, overflow: str):
+        """
+        :param overflow: overflow policy of the manager
+        :return: manager with one stuck socket whose queue is full of messages
+        """
+        manager = ConnectionManager(queue_size=4, overflow=overflow, coalesce_window=0)
+        websocket = StuckWebSocket()
+        await manager.connect(websocket, 1)
+        await manager.notify_all(*presence(2, True))
+        for n in range(3):
+            await manager.broadcast(f"message {n}")
+        # the first frame is already being sent, the queue holds the others
+        await asyncio.sleep(0)
+        return manager, websocket
+
+    async def received(self, manager: ConnectionManager, websocket: StuckWebSocket):
+        websocket.release()
+        await asyncio.sleep(0.01)
+        await manager.disconnect(1)
+        return websocket.sent
+
+    async def test_coalesce_replaces_frame_with_same_key(self):
+        manager, websocket = await self.connect(COALESCE)
+        await manager.notify_all(*presence(3, True))
+        await manager.notify_all(*presence(3, False))
+        sent = await self.received(manager, websocket)
+        self.assertEqual([json.loads(frame)["event"] if frame.startswith("{") else frame for frame in sent],
+                         ["user_online", "message 0", "message 1", "message 2", "user_offline"])
+        self.assertEqual(manager.dropped, 1)
+
+    async def test_coalesce_drops_oldest_without_key(self):
+        manager, websocket = await self.connect(COALESCE)
+        await manager.broadcast("message 3")
+        await manager.broadcast("message 4")
+        sent = await self.received(manager, websocket)
+        self.assertEqual(sent[1:], ["message 1", "message 2", "message 3", "message 4"])
+        self.assertEqual(manager.dropped, 1)
+
+    async def test_drop_oldest(self):
+        manager, websocket = await self.connect(DROP_OLDEST)
+        await manager.notify_all(*presence(3, True))
+        await manager.notify_all(*presence(3, False))
+        sent = await self.received(manager, websocket)
+        self.assertEqual(len(sent), 5)
+        self.assertIn("user_online", sent[-2])
+        self.assertIn("user_offline", sent[-1])
+        self.assertEqual(manager.dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+tests of the in-memory message history, run from the root of the repository:
+    python -m pytest -q server/test
+"""
+import unittest
+from datetime import datetime, timedelta
+
+from server import models
+from server.history import MessageHistory
+
+
+def message(message_id: int, sender: int = 1, receiver: int = 0):
+    """
+    :param message_id: id of the message, also orders the dates
+    :param sender: id of the sender
+    :param receiver: id of the receiver, 0 for chat 'general'
+    :return: stored message
+    """
+    return models.Message(id=message_id, from_usr=sender, to_usr=receiver, msg_content=f"m{message_id}",
+                          date=datetime(2024, 1, 1) + timedelta(seconds=message_id),
+                          conversation=models.conversation_key(sender, receiver))
+
+
+class TestMessageHistory(unittest.TestCase):
+    def test_general_window(self):
+        history = MessageHistory(general_window=2)
+        history.general.load([])
+        history.add([message(i) for i in range(1, 4)])
+        self.assertEqual([m.id for m in history.general_since(datetime(2024, 1, 1, 0, 0, 2))], [3])
+        # the oldest message was dropped, the window no longer covers its date
+        self.assertIsNone(history.general_since(datetime(2024, 1, 1)))
+
+    def test_general_window_disabled(self):
+        history = MessageHistory(general_window=0)
+        history.general.load([message(1)])
+        history.add([message(i) for i in range(2, 5)])
+        history.discard(2, models.conversation_key(0, 0))
+        self.assertEqual(history.general.size(), 0)
+        self.assertIsNone(history.general_since(datetime(2024, 1, 1)))
+
+    def test_reset(self):
+        history = MessageHistory(general_window=10)
+        history.general.load([message(1)])
+        window = history.open_conversation(models.conversation_key(1, 2))
+        history.load_conversation(models.conversation_key(1, 2), window, [message(2, 1, 2)])
+        history.reset()
+        # nothing is answered from memory until the windows are loaded again
+        self.assertIsNone(history.general_since(datetime(2024, 1, 1)))
+        self.assertIsNone(history.conversation_since(models.conversation_key(1, 2), datetime(2024, 1, 1)))
+        self.assertEqual((history.summary()["conversations"], history.bytes), (0, 0))
+
+    def test_conversation_windows_disabled(self):
+        history = MessageHistory(conversation_window=0)
+        self.assertIsNone(history.open_conversation(models.conversation_key(1, 2)))
+        history.add([message(1, 1, 2)])
+        self.assertEqual(history.summary()["conversations"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+tests of MessageBatcher against a temporary SQLite database, run from the root of the repository:
+    python -m pytest -q server/test
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from server import migrations, models, schemas
+from server.history import message_history
+from server.ingest import MessageBatcher
+
+
+class TestMessageBatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory.name, 'chat.db')}")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(migrations.upgrade)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.batcher = MessageBatcher(self.session_factory, max_delay=0.01)
+        self.batcher.start()
+
+    async def asyncTearDown(self):
+        await self.batcher.stop()
+        await self.engine.dispose()
+
+    async def submit(self, count: int):
+        """
+        submit messages to chat 'general' at the same time
+        :param count: number of messages
+        :return: stored messages
+        """
+        return await asyncio.gather(*(self.batcher.submit(schemas.MessageCreate(msg_content=f"m{i}", from_usr=1), 0)
+                                      for i in range(count)))
+
+    async def stored(self):
+        """
+        :return: dict of the message contents in the database with their number of rows
+        """
+        async with self.session_factory() as db:
+            result = await db.execute(select(models.Message.msg_content, func.count())
+                                      .group_by(models.Message.msg_content))
+            return dict(result.all())
+
+    async def test_batch(self):
+        messages = await self.submit(5)
+        self.assertEqual([message.msg_content for message in messages], [f"m{i}" for i in range(5)])
+        self.assertEqual(await self.stored(), {f"m{i}": 1 for i in range(5)})
+        self.assertEqual(self.batcher.batches, 1)
+
+    async def test_failure_after_commit(self):
+        with mock.patch.object(message_history, "record", side_effect=RuntimeError("history")):
+            with self.assertLogs("server.ingest", level="ERROR"):
+                messages = await self.submit(5)
+        # committed messages are neither retried nor reported as failed
+        self.assertTrue(all(message.id is not None for message in messages))
+        self.assertEqual(await self.stored(), {f"m{i}": 1 for i in range(5)})
+        self.assertEqual(self.batcher.messages, 5)
+
+    async def test_stop_writes_queued_messages(self):
+        pending = asyncio.ensure_future(self.submit(3))
+        await asyncio.sleep(0)
+        await self.batcher.stop()
+        self.assertEqual(len(await pending), 3)
+        self.assertEqual(await self.stored(), {"m0": 1, "m1": 1, "m2": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
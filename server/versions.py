@@ -0,0 +1,113 @@
+import uuid
+from collections import defaultdict
+
+from fastapi import Request, Response
+
+
+class Versions:
+    def __init__(self):
+        """
+        counters increased on every change of users and conversations, used to build ETags;
+        the epoch changes with every start so tags of a previous run or of another worker never match
+        """
+        self.epoch = uuid.uuid4().hex[:8]
+        self.users = 0
+        self.user_versions = defaultdict(int)
+        self.messages = 0
+        self.conversation_versions = defaultdict(int)
+        self.not_modified = 0
+
+    def bump_user(self, user_id: int):
+        """
+        record a change of a user (data or presence)
+        :param user_id: id of the changed user
+        :return:
+        """
+        self.users += 1
+        self.user_versions[user_id] += 1
+
+    def bump_conversation(self, conversation: str):
+        """
+        record a new or deleted message
+        :param conversation: key of the conversation of the message (models.conversation_key)
+        :return:
+        """
+        self.messages += 1
+        self.conversation_versions[conversation] += 1
+
+    def renew(self):
+        """
+        change the epoch so that no tag given out so far matches any more,
+        used when changes of other workers may have been missed
+        :return:
+        """
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def tag(self, *parts):
+        """
+        weak ETag built from the epoch and the given version numbers
+        :param parts: version numbers (and other values) the response depends on
+        :return: header value like W/"epoch-1-2"
+        """
+        return 'W/"' + "-".join([self.epoch] + [str(part) for part in parts]) + '"'
+
+    def users_tag(self):
+        """
+        :return: ETag of the list of users
+        """
+        return self.tag("u", self.users)
+
+    def user_tag(self, user_id: int):
+        """
+        :param user_id: id of the user
+        :return: ETag of a single user
+        """
+        return self.tag("u", user_id, self.user_versions.get(user_id, 0))
+
+    def messages_tag(self, viewer: int = 0):
+        """
+        :param viewer: id of the user the list is filtered for, 0 for chat 'general' only
+        :return: ETag of the list of all messages seen by the user
+        """
+        return self.tag("m", viewer, self.messages)
+
+    def conversation_tag(self, conversation: str):
+        """
+        :param conversation: key of the conversation (models.conversation_key)
+        :return: ETag of the history of the conversation
+        """
+        return self.tag("c", conversation, self.conversation_versions.get(conversation, 0))
+
+    def check(self, request: Request, response: Response, tag: str):
+        """
+        compare the If-None-Match header of the request with the current tag; '*' is not honoured, it only
+        makes sense for requests changing a resource and the check runs before the resource is known to exist
+        :param request: incoming request
+        :param response: response being prepared, gets the ETag header
+        :param tag: current ETag of the requested resource
+        :return: empty 304 response when the client already has the current version, None otherwise
+        """
+        response.headers["ETag"] = tag
+        header = request.headers.get("if-none-match")
+        if header is None:
+            return None
+        candidates = [candidate.strip() for candidate in header.split(",")]
+        weak = tag[2:]
+        if any(candidate == tag or candidate == weak for candidate in candidates):
+            self.not_modified += 1
+            return Response(status_code=304, headers={"ETag": tag})
+        return None
+
+    def summary(self):
+        """
+        :return: dict with the counters
+        """
+        return {
+            "epoch": self.epoch,
+            "users": self.users,
+            "messages": self.messages,
+            "not_modified": self.not_modified,
+        }
+
+
+versions = Versions()